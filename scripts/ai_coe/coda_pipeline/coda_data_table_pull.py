@@ -1,6 +1,6 @@
 import os
-import pandas as pd
-from codaio import Coda, Document
+from scripts.ai_coe.coda_pipeline.coda_export import CodaExporter, CsvSink
+from scripts.ai_coe.coda_pipeline.snapshot_cache import CodaSnapshotCache
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -22,37 +22,41 @@ def export_coda_table_to_csv(document_id: str, table_id: str, output_filename: s
         print("Cannot run export: CODA_TOKEN is missing.")
         return
 
-    try:
-        coda_client = Coda(coda_api_token)
-
-        print(f"Loading document ID: {document_id}")
-        doc = Document(document_id, coda=coda_client)
+    exporter = CodaExporter(coda_api_token)
+    export_coda_tables_to_csv([(document_id, table_id, output_filename)], exporter)
 
-        print(f"Fetching table ID: {table_id}")
-        table = doc.get_table(table_id)
 
-        df = pd.DataFrame(table.to_dict())
-        print(df)
-        df.to_csv(output_filename, index=False, header=True)
-        print(f"\n✅ Successfully exported {len(df)} rows to {output_filename}")
-
-    except Exception as e:
-        print(f"An error occurred during the export process: {e}")
+def export_coda_tables_to_csv(jobs, exporter: CodaExporter = None, cache: CodaSnapshotCache = None):
+    """
+    Exports several Coda tables to local CSV files concurrently, sharing one API client.
 
+    Rows are streamed to each CSV as pages arrive. Tables that have not changed since the last
+    export are written from the local snapshot cache, at the cost of one metadata request each.
 
+    Args:
+        jobs: (document_id, table_id, output_filename) tuples.
+        exporter: Optional CodaExporter to reuse. One is created from CODA_TOKEN when omitted.
+        cache: Optional CodaSnapshotCache (defaults to the one at CODA_SNAPSHOT_CACHE or ~/.cache/coda_snapshots).
+    """
+    if not coda_api_token and exporter is None:
+        print("Cannot run export: CODA_TOKEN is missing.")
+        return
 
-# run function to get privilege table and then extension table from coda
-# privilege table
-DOC_ID = "m6G_7OVfdq"
-TABLE_ID = "table-RC54btGLAp"
-OUTPUT_FILE = 'sku-privilege-table-export.csv'
+    try:
+        exporter = exporter or CodaExporter(coda_api_token)
+        cache = cache or CodaSnapshotCache(os.getenv("CODA_SNAPSHOT_CACHE", "~/.cache/coda_snapshots"))
+        cache.export(exporter, [(doc_id, table_id, CsvSink(output_filename)) for doc_id, table_id, output_filename in jobs])
 
-export_coda_table_to_csv(DOC_ID, TABLE_ID, OUTPUT_FILE)
+    except Exception as e:
+        print(f"An error occurred during the export process: {e}")
 
 
-# extension table
+# privilege table and extension table in coda
 DOC_ID = "m6G_7OVfdq"
-TABLE_ID = "table-c4x55SFhUm"
-OUTPUT_FILE = 'sku-extension-table-export.csv'
+SKU_TABLE_EXPORTS = [
+    (DOC_ID, "table-RC54btGLAp", 'sku-privilege-table-export.csv'),  # privilege table
+    (DOC_ID, "table-c4x55SFhUm", 'sku-extension-table-export.csv'),  # extension table
+]
 
-export_coda_table_to_csv(DOC_ID, TABLE_ID, OUTPUT_FILE)
+if __name__ == "__main__":
+    export_coda_tables_to_csv(SKU_TABLE_EXPORTS)
@@ -0,0 +1,260 @@
+import csv
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import timezone
+from email.utils import parsedate_to_datetime
+from typing import Optional, Dict, List, Tuple
+
+import pandas as pd
+import requests
+from requests.adapters import HTTPAdapter
+
+
+CODA_API_BASE = "https://coda.io/apis/v1"
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds to wait from a Retry-After header, given as seconds or as an HTTP date. None if absent or unreadable."""
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        # "-0000" dates come back naive, HTTP dates are always UTC
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(retry_at.timestamp() - time.time(), 0.0)
+
+
+class AdaptiveRateLimiter:
+    """
+    Spaces out requests shared by all export workers.
+
+    The gap between requests doubles every time Coda answers 429 (or its rate-limit headers say we
+    are out of budget) and shrinks back towards `min_interval` as requests succeed.
+    """
+
+    def __init__(self, min_interval: float = 0.0, max_interval: float = 60.0):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.interval = min_interval
+        self._next_slot = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        """Blocks until this caller's turn to send a request."""
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+    def on_success(self, headers):
+        with self._lock:
+            remaining = headers.get('X-RateLimit-Remaining')
+            reset = headers.get('X-RateLimit-Reset')
+            if remaining is not None and reset is not None and float(remaining) <= 0:
+                # Out of budget for this window, hold everyone until it resets (seconds, or an epoch timestamp)
+                pause = float(reset)
+                if pause > 1e9:
+                    pause -= time.time()
+                self._next_slot = max(self._next_slot, time.monotonic() + max(pause, 0))
+            self.interval = max(self.min_interval, self.interval * 0.8)
+
+    def on_throttled(self, retry_after: Optional[float]):
+        with self._lock:
+            self.interval = min(self.max_interval, max(self.interval * 2, 0.5))
+            pause = retry_after if retry_after is not None else self.interval
+            self._next_slot = max(self._next_slot, time.monotonic() + pause)
+
+
+class CsvSink:
+    """Writes exported rows to a CSV file as pages arrive. An empty table still gets its header row."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.rows = 0
+        self._handle = None
+        self._writer = None
+
+    def write_rows(self, columns: List[str], rows: List[dict]):
+        if self._writer is None:
+            self._handle = open(self.path, 'w', newline='')
+            self._writer = csv.DictWriter(self._handle, fieldnames=columns, extrasaction='ignore')
+            self._writer.writeheader()
+        self._writer.writerows(rows)
+        self.rows += len(rows)
+
+    def close(self):
+        if self._handle is not None:
+            self._handle.close()
+        print(f"\n✅ Successfully exported {self.rows} rows to {self.path}")
+
+
+class DataFrameSink:
+    """
+    Collects exported rows and builds a DataFrame once the table is done (available as .df).
+
+    The frame keeps the table's columns even when it has no rows, so an empty table still has its
+    SKU/Privilege columns downstream.
+    """
+
+    def __init__(self):
+        self.df = None
+        self._columns = None
+        self._rows = []
+
+    def write_rows(self, columns: List[str], rows: List[dict]):
+        self._columns = columns
+        self._rows.extend(rows)
+
+    def close(self):
+        self.df = pd.DataFrame(self._rows, columns=self._columns)
+        self._rows = []
+
+
+class CodaExporter:
+    """
+    Exports Coda tables over the REST API with one shared HTTP session.
+
+    Each (doc_id, table_id, sink) job pages through its table and hands every page to its sink as
+    soon as it arrives. Jobs run concurrently on a thread pool and share an adaptive rate limiter
+    that backs off on 429 responses.
+    """
+
+    def __init__(self, api_token: Optional[str] = None, base_url: str = CODA_API_BASE, max_workers: int = 4,
+                 page_size: int = 500, max_retries: int = 6, timeout: float = 60.0):
+        """
+        Parameters:
+            api_token (str): Coda API token (defaults to the CODA_TOKEN environment variable).
+            base_url (str): API root, point it at a local fake server for tests.
+            max_workers (int): Tables fetched at the same time.
+            page_size (int): Rows requested per page (Coda caps this at 500).
+            max_retries (int): Attempts per page on 429/5xx/connection errors.
+            timeout (float): Seconds before an individual request times out.
+        """
+        api_token = api_token or os.getenv("CODA_TOKEN")
+        if not api_token:
+            raise ValueError("Configuration Error: CODA_TOKEN is missing.")
+
+        self.base_url = base_url.rstrip('/')
+        self.max_workers = max_workers
+        self.page_size = page_size
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.rate_limiter = AdaptiveRateLimiter()
+
+        self.session = requests.Session()
+        self.session.headers.update({"Authorization": f"Bearer {api_token}"})
+        adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def get(self, path: str, params: Optional[dict] = None, headers: Optional[dict] = None) -> requests.Response:
+        """GETs an API path, retrying with jittered backoff on 429, 5xx and connection errors."""
+        url = f"{self.base_url}{path}"
+        for attempt in range(1, self.max_retries + 1):
+            self.rate_limiter.wait()
+            try:
+                response = self.session.get(url, params=params, headers=headers, timeout=self.timeout)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if attempt == self.max_retries:
+                    raise
+                print(f"Request to {path} failed ({e}), retrying (attempt {attempt}/{self.max_retries})")
+                time.sleep(random.uniform(0, min(30, 2 ** attempt)))
+                continue
+
+            if response.status_code == 429:
+                self.rate_limiter.on_throttled(parse_retry_after(response.headers.get('Retry-After')))
+                print(f"Rate limited by Coda on {path}, backing off (attempt {attempt}/{self.max_retries})")
+                if attempt == self.max_retries:
+                    response.raise_for_status()
+                continue
+            if response.status_code >= 500 and attempt < self.max_retries:
+                time.sleep(random.uniform(0, min(30, 2 ** attempt)))
+                continue
+
+            response.raise_for_status()
+            self.rate_limiter.on_success(response.headers)
+            return response
+
+    def _get_paged(self, path: str, params: dict):
+        """Yields the 'items' of every page of a paginated Coda endpoint."""
+        params = dict(params)
+        while True:
+            payload = self.get(path, params=params).json()
+            yield payload.get('items', [])
+            page_token = payload.get('nextPageToken')
+            if not page_token:
+                return
+            params = {'pageToken': page_token}
+
+    def list_columns(self, document_id: str, table_id: str) -> List[str]:
+        """Returns a table's column names in display order."""
+        columns = []
+        for items in self._get_paged(f"/docs/{document_id}/tables/{table_id}/columns", {'limit': 100}):
+            columns.extend(item['name'] for item in items)
+        return columns
+
+    def iter_row_pages(self, document_id: str, table_id: str):
+        """Yields each page of a table's rows as a list of {column name: value} dicts."""
+        params = {'useColumnNames': 'true', 'valueFormat': 'simple', 'limit': self.page_size}
+        for items in self._get_paged(f"/docs/{document_id}/tables/{table_id}/rows", params):
+            yield [item['values'] for item in items]
+
+    def export_table(self, document_id: str, table_id: str, sink) -> int:
+        """
+        Streams one table into a sink.
+
+        The sink gets write_rows(columns, []) before any page, so it knows the table's columns even
+        when there are no rows.
+
+        Returns:
+            int: Number of rows exported.
+        """
+        print(f"Fetching table ID: {table_id} from document ID: {document_id}")
+        columns = self.list_columns(document_id, table_id)
+        total = 0
+        try:
+            sink.write_rows(columns, [])
+            for rows in self.iter_row_pages(document_id, table_id):
+                sink.write_rows(columns, rows)
+                total += len(rows)
+        finally:
+            sink.close()
+        return total
+
+    def export(self, jobs: List[Tuple[str, str, object]]) -> Dict[Tuple[str, str], int]:
+        """
+        Runs several table exports concurrently.
+
+        Parameters:
+            jobs (list): (doc_id, table_id, sink) tuples. A sink has write_rows(columns, rows) and close().
+
+        Returns:
+            dict: {(doc_id, table_id): rows exported}. Raises the first error once every job has finished.
+        """
+        results = {}
+        errors = []
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {executor.submit(self.export_table, doc_id, table_id, sink): (doc_id, table_id)
+                       for doc_id, table_id, sink in jobs}
+            for future in as_completed(futures):
+                job = futures[future]
+                try:
+                    results[job] = future.result()
+                except Exception as e:
+                    print(f"An error occurred exporting {job[1]} from {job[0]}: {e}")
+                    errors.append(e)
+        if errors:
+            raise errors[0]
+        return results
@@ -0,0 +1,122 @@
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+from typing import List
+
+import pandas as pd
+
+
+# Separator used to build one string key out of a composite key, unlikely to appear in Coda values
+KEY_SEPARATOR = '\x1f'
+
+
+class SyncStateStore:
+    """
+    Keeps the per-table watermark for incremental Coda syncs.
+
+    For every row last pushed to the warehouse we store a content hash keyed on the table's
+    composite key (e.g. (SKU, Privilege)). Comparing a fresh export against it tells us which rows
+    were added or changed and which disappeared, so only those need to be staged and merged.
+    """
+
+    def __init__(self, path: str = '~/.cache/coda_sync_state.sqlite'):
+        """
+        Parameters:
+            path (str): SQLite file holding the watermarks (created if missing).
+        """
+        self.path = os.path.expanduser(path)
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        with self._connect() as db:
+            db.execute("""
+                create table if not exists row_hashes (
+                    table_id text not null,
+                    row_key text not null,
+                    row_hash text not null,
+                    primary key (table_id, row_key)
+                )""")
+            db.execute("""
+                create table if not exists sync_runs (
+                    table_id text not null,
+                    synced_at real not null,
+                    changed integer not null,
+                    deleted integer not null
+                )""")
+
+    @contextmanager
+    def _connect(self):
+        db = sqlite3.connect(self.path, timeout=30)
+        try:
+            with db:
+                yield db
+        finally:
+            db.close()
+
+    @staticmethod
+    def row_keys(df: pd.DataFrame, key_columns: List[str]) -> pd.Series:
+        """Returns one string key per row built from the composite key columns."""
+        return df[key_columns].astype(str).agg(KEY_SEPARATOR.join, axis=1)
+
+    @staticmethod
+    def row_hashes(df: pd.DataFrame) -> pd.Series:
+        """Returns a content hash per row, computed over the string form of every column."""
+        # Hash the string form so a dtype change alone does not look like a content change
+        return pd.util.hash_pandas_object(df.astype(str), index=False).astype(str)
+
+    def compute_delta(self, table_id: str, df: pd.DataFrame, key_columns: List[str]) -> dict:
+        """
+        Compares a fresh export of a table against its stored watermark.
+
+        Parameters:
+            table_id (str): The Coda table ID (e.g. 'table-RC54btGLAp').
+            df (pd.DataFrame): The full, formatted export of the table.
+            key_columns (list): Columns forming the table's composite key.
+
+        Returns:
+            dict with
+                'table_id': the table ID,
+                'changed': DataFrame of new or modified rows (to stage and merge),
+                'deleted': DataFrame of the key columns of rows no longer in Coda,
+                'unchanged': number of rows identical to the last sync,
+                'hashes': {row_key: row_hash} for the whole export, saved by commit().
+        """
+        if df[key_columns].duplicated().any():
+            raise ValueError(f"Duplicate ({', '.join(key_columns)}) keys in {table_id}, cannot compute a delta.")
+
+        keys = self.row_keys(df, key_columns)
+        hashes = self.row_hashes(df)
+
+        with self._connect() as db:
+            previous = dict(db.execute("select row_key, row_hash from row_hashes where table_id = ?", (table_id,)))
+
+        previous_hashes = keys.map(previous)
+        changed_mask = (previous_hashes != hashes).to_numpy()  # NaN (new key) never equals a hash
+        deleted_keys = sorted(set(previous) - set(keys))
+        deleted = pd.DataFrame([k.split(KEY_SEPARATOR) for k in deleted_keys], columns=key_columns)
+
+        print(f"{table_id}: {int(changed_mask.sum())} new/changed, {len(deleted)} deleted, {int((~changed_mask).sum())} unchanged rows.")
+        return {
+            'table_id': table_id,
+            'changed': df[changed_mask],
+            'deleted': deleted,
+            'unchanged': int((~changed_mask).sum()),
+            'hashes': dict(zip(keys, hashes)),
+        }
+
+    def commit(self, delta: dict):
+        """
+        Saves the watermark from compute_delta(). Call it only once the changes are in the warehouse,
+        so a failed run is retried in full next time.
+        """
+        table_id = delta['table_id']
+        with self._connect() as db:
+            db.execute("delete from row_hashes where table_id = ?", (table_id,))
+            db.executemany("insert into row_hashes (table_id, row_key, row_hash) values (?, ?, ?)",
+                           [(table_id, k, h) for k, h in delta['hashes'].items()])
+            db.execute("insert into sync_runs (table_id, synced_at, changed, deleted) values (?, ?, ?, ?)",
+                       (table_id, time.time(), len(delta['changed']), len(delta['deleted'])))
+
+    def reset(self, table_id: str):
+        """Forgets a table's watermark, so the next sync pushes every row."""
+        with self._connect() as db:
+            db.execute("delete from row_hashes where table_id = ?", (table_id,))
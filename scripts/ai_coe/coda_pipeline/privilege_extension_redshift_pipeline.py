@@ -1,21 +1,21 @@
 import os
-import google.auth
-import gspread
-from oauth2client.service_account import ServiceAccountCredentials
 import pandas as pd
-import datetime
-from datatools.data_warehouse import DataWarehouse
-import json
+import threading
+import time
+from contextlib import contextmanager
+from scripts.redshift.redshift import DataWarehouse
+from scripts.redshift.object_store import S3ObjectStore
+from scripts.redshift.promotion import promote
+from scripts.ai_coe.coda_pipeline.delta_sync import SyncStateStore
+from scripts.ai_coe.coda_pipeline.table_schema import SKU_TABLE_SCHEMA, SKU_TABLE_KEY, normalize_frame
 
-import prefect
 from datatools.prefect import Deployment
 from prefect import flow, task
-from prefect.blocks.system import Secret
+from prefect.task_runners import ConcurrentTaskRunner
 from datatools.prefect.blocks.custom.secret_json import SecretJSON #had to install this separately. ran `prefect block register --module datatools.prefect.blocks.custom.secret_json` in terminal and then run `prefect server start` prefect and then went to `Check out the dashboard at http://127.0.0.1:4200` in my browser to set up the secrects for the local version
 from prefect.logging import get_run_logger
-import os
-import pandas as pd
-from codaio import Coda, Document
+from scripts.ai_coe.coda_pipeline.coda_export import CodaExporter, DataFrameSink
+from scripts.ai_coe.coda_pipeline.snapshot_cache import CodaSnapshotCache
 from dotenv import load_dotenv
 
 # Load .env vars
@@ -25,39 +25,94 @@ coda_api_token = os.getenv("CODA_TOKEN")
 if not coda_api_token:
     print("Error: CODA_TOKEN is not loaded!")
 
+# One entry per Coda table synced to Redshift. Adding a table is a new entry here.
+CODA_TABLES = [
+    {
+        'doc_id': 'm6G_7OVfdq',
+        'table_id': 'table-RC54btGLAp',
+        'prod_schema': 'metrics_ops_resolution',
+        'prod_table': 'sku_privileges',
+        'staging_schema': 'sandbox_ops_resolution',
+        'schema': SKU_TABLE_SCHEMA,
+        'key_columns': SKU_TABLE_KEY,
+    },
+    {
+        'doc_id': 'm6G_7OVfdq',
+        'table_id': 'table-c4x55SFhUm',
+        'prod_schema': 'metrics_ops_resolution',
+        'prod_table': 'sku_extensions',
+        'staging_schema': 'sandbox_ops_resolution',
+        'schema': SKU_TABLE_SCHEMA,
+        'key_columns': SKU_TABLE_KEY,
+    },
+]
+
+class StageTimings:
+    """
+    (prod_table, stage, seconds) for every stage of one flow run, summarized at the end of it.
+
+    A plain object rather than a list so Prefect hands the tasks this instance instead of a copy.
+    """
+
+    def __init__(self):
+        self.rows = []
+        self._lock = threading.Lock()
+
+    def add(self, table: str, stage: str, seconds: float):
+        with self._lock:
+            self.rows.append((table, stage, seconds))
+
+
+@contextmanager
+def stage_timer(timings: StageTimings, table: str, stage: str):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        if timings is not None:
+            timings.add(table, stage, elapsed)
+        get_run_logger().info(f'{table}: {stage} took {elapsed:.2f}s')
 
-# Need to test this will format the df returned from the export_coda_table_to_df function
+
+# Types the df returned from the export_coda_table_to_df function and rejects duplicate keys before staging
 @task
-def format_data_for_upload(df: pd.DataFrame):
-    
-    df.replace('null', None, inplace=True)
-    df.replace('', None, inplace=True)
+def format_data_for_upload(df: pd.DataFrame, schema: dict = SKU_TABLE_SCHEMA, key_columns: list = SKU_TABLE_KEY, table: str = '',
+                           timings: StageTimings = None):
+    with stage_timer(timings, table, 'format'):
+        return normalize_frame(df, schema, key_columns)
 
-    # df = df.drop(columns=['index'])
+@task
+def fetch_coda_table(document_id: str, table_id: str, exporter: CodaExporter, cache: CodaSnapshotCache = None, table: str = '',
+                     timings: StageTimings = None):
+    with stage_timer(timings, table, 'coda fetch'):
+        df = export_coda_table_to_df(document_id, table_id, exporter, cache)
+    if df is None:
+        raise ValueError(f'Could not export Coda table {table_id}')
     return df
 
-def export_coda_table_to_df(document_id: str, table_id: str):
+def export_coda_table_to_df(document_id: str, table_id: str, exporter: CodaExporter = None, cache: CodaSnapshotCache = None):
     """
     Returns a DataFrame for coda table
 
     Args:
         document_id: The ID of the Coda Document (e.g., 'm6G_7OVfdq').
         table_id: The ID of the table within the document (e.g., 'table-RC54btGLAp').
+        exporter: Optional CodaExporter to share one API session across tables.
+        cache: Optional CodaSnapshotCache, the table is only downloaded if it changed since the cached snapshot.
     """
-    if not coda_api_token:
+    if not coda_api_token and exporter is None:
         print("Cannot run export: CODA_TOKEN is missing.")
         return
 
     try:
-        coda_client = Coda(coda_api_token)
-
-        print(f"Loading document ID: {document_id}")
-        doc = Document(document_id, coda=coda_client)
-
-        print(f"Fetching table ID: {table_id}")
-        table = doc.get_table(table_id)
-
-        df = pd.DataFrame(table.to_dict())
+        exporter = exporter or CodaExporter(coda_api_token)
+        if cache is not None:
+            df = cache.fetch(exporter, document_id, table_id)
+        else:
+            sink = DataFrameSink()
+            exporter.export_table(document_id, table_id, sink)
+            df = sink.df
         print(f"\n✅ Successfully returning df of row length: {len(df)} ")
         return df
 
@@ -65,112 +120,112 @@ def export_coda_table_to_df(document_id: str, table_id: str):
         print(f"An error occurred during the export process: {e}")
 
 
-def rs_connection(credentials: dict):
+def rs_connection(credentials: dict, pool_size: int = None):
     dw = DataWarehouse(
         user = credentials['username'],
         password = credentials['password'],
-        connection='psycopg2')
+        connection='psycopg2',
+        host = credentials.get('host') or os.getenv('DB_HOST'),
+        pool_size = pool_size)
     return dw
 
 
+def copy_store():
+    """
+    S3 bucket used to stage COPY loads, configured through REDSHIFT_COPY_BUCKET / REDSHIFT_COPY_IAM_ROLE.
 
-# NEED TO REVIEW
-@task
-def create_staging_table(warehouse_credentials, staging_schema, prod_schema, prod_table):
-    logger=get_run_logger()
-    query1 = f"""create table if not exists {staging_schema}.{prod_table}_temp (like {prod_schema}.{prod_table})"""
-    query2 = f"""delete from {staging_schema}.{prod_table}_temp where 1=1;""" 
-    print()
-    logger.info('CREATE/CLEAR STAGING DATA')
-    logger.info(query1)
-    logger.info(query2)
-    warehouse_credentials.run(query1)
-    warehouse_credentials.run(query2)
+    Returns None when not configured, in which case loads fall back to execute_values inserts.
+    """
+    bucket = os.getenv("REDSHIFT_COPY_BUCKET")
+    if not bucket:
+        return None
+    return S3ObjectStore(bucket, prefix=os.getenv("REDSHIFT_COPY_PREFIX", "coda-sku-sync/"), iam_role=os.getenv("REDSHIFT_COPY_IAM_ROLE"))
 
-    return 1
 
-# NEED TO REVIEW
-@task
-def write_data_to_staging_table(warehouse_credentials, staging_schema: str, prod_table: str, df:pd.DataFrame, done):
-    warehouse_credentials.dataframe_to_sql(dataframe=df, schema=staging_schema, table=(prod_table + '_temp'), replace=False, batch_size=1000, column_names=list(df.columns), index=False)
 
-    return 1
+@task
+def promote_to_prod(warehouse_credentials, delta: dict, prod_schema, staging_schema, prod_table, key_columns, timings: StageTimings = None):
+    logger=get_run_logger()
+    df = delta['changed']
+    if not len(df):
+        # Only stage and merge what changed since the last successful sync
+        logger.info(f'{prod_table}: NOTHING CHANGED, SKIPPING STAGE AND MERGE')
+        return {'inserted': 0, 'updated': 0, 'unchanged': 0, 'deleted': 0}
+    logger.info(f'{prod_table}: STAGE AND MERGE INTO PROD')
+    # Create/clear staging, COPY, update changed rows and insert new ones in one transaction
+    with stage_timer(timings, prod_table, 'stage and merge'):
+        counts = promote(warehouse_credentials, df, prod_schema=prod_schema, prod_table=prod_table,
+                         staging_schema=staging_schema, key_columns=key_columns, store=copy_store())
+    logger.info(f'{prod_table}: STAGING DATA MERGED WITH PROD: {counts}')
+    return counts
 
-#NEED TO REVIEW
 @task
-def promote_to_prod(warehouse_credentials, prod_schema, staging_schema, prod_table, done):
+def compute_table_delta(sync_state: SyncStateStore, table_id: str, df: pd.DataFrame, key_columns: list, table: str = '',
+                        timings: StageTimings = None):
     logger=get_run_logger()
-    logger.info(' ')
-    logger.info('MERGE STAGING DATA WITH PROD DATA')
-
-    # This query uses a composite key: (SKU, Privilege)
-    #
-    queries = f"""
-        merge into {prod_schema}.{prod_table}
-        using {staging_schema}.{prod_table}_temp temp 
-           on ({prod_table}.SKU = temp.SKU and {prod_table}.Privilege = temp.Privilege) 
-        
-        when matched then
-            update set
-                Tab = temp.Tab,
-                Category = temp.Category,
-                Privilege = temp.Privilege,
-                Notes = temp.Notes,
-                SKU = temp.SKU
-                Enabled = temp.Enabled
-
-        
-        when not matched then
-            insert (Tab, Category, Privilege, Notes, SKU, Enabled) 
-            VALUES (temp.Tab, temp.Category, temp.Privilege, temp.Notes, temp.SKU, temp.Enabled);
-    """
-    logger.info(queries)
-    warehouse_credentials.run(queries)
+    with stage_timer(timings, table, 'delta'):
+        delta = sync_state.compute_delta(table_id, df, key_columns)
+    logger.info(f"{table_id}: {len(delta['changed'])} new/changed rows to stage, {delta['unchanged']} unchanged")
+    if len(delta['deleted']):
+        # Deletions are reported, not applied, prod rows are only ever removed by hand
+        logger.warning(f"{table_id}: {len(delta['deleted'])} rows no longer in Coda:\n{delta['deleted'].to_string(index=False)}")
+    return delta
 
-    logger.info('STAGING DATA MERGED WITH PROD')
+@task
+def commit_sync_state(sync_state: SyncStateStore, delta: dict, done):
+    sync_state.commit(delta)
     return 1
 
-@flow(name='redshift-coda-sku-update-run')
-def main_flow():
-    redshift_creds = SecretJSON.load('resolution-redshift-service-account').get()
-
-    # PRIVILEGE TABLE
-    # dw set-up
-    schema = 'metrics_ops_resolution'
-    table = 'sku_privileges'
-    staging_schema = 'sandbox_ops_resolution'
-
-    # coda set-up
-    DOC_ID = "m6G_7OVfdq"
-    TABLE_ID = "table-RC54btGLAp"
+def submit_table_sync(config: dict, warehouse, sync_state: SyncStateStore, coda_exporter: CodaExporter, snapshot_cache: CodaSnapshotCache,
+                      timings: StageTimings = None):
+    """Submits one table's fetch -> format -> delta -> promote -> commit chain. Each task starts as soon as its inputs are ready."""
+    table = config['prod_table']
+    df = fetch_coda_table.submit(config['doc_id'], config['table_id'], coda_exporter, snapshot_cache, table=table, timings=timings)
+    formatted_df = format_data_for_upload.submit(df, config['schema'], config['key_columns'], table=table, timings=timings)
+    delta = compute_table_delta.submit(sync_state, config['table_id'], formatted_df, config['key_columns'], table=table, timings=timings)
+    counts = promote_to_prod.submit(warehouse, delta, prod_schema=config['prod_schema'], staging_schema=config['staging_schema'],
+                                    prod_table=table, key_columns=config['key_columns'], timings=timings)
+    return counts, commit_sync_state.submit(sync_state, delta, done=counts)
 
-    priv_df = export_coda_table_to_df(DOC_ID, TABLE_ID)
-    priv_formatted_df = format_data_for_upload(priv_df)
 
-    warehouse_conn = rs_connection(redshift_creds)
-    done1 = create_staging_table(warehouse_conn, staging_schema=staging_schema, prod_schema=schema, prod_table=table)
-    done2 = write_data_to_staging_table(warehouse_conn, staging_schema=staging_schema, prod_table=table, df=priv_formatted_df, done=done1)
-    done3 = promote_to_prod(warehouse_conn, prod_schema=schema, staging_schema=staging_schema, prod_table=table, done=done2)
-
-
-
-    # EXTENSION TABLE FLOW
-    # dw set-up
-    schema = 'metrics_ops_resolution'
-    table = 'sku_extensions'
-    staging_schema = 'sandbox_ops_resolution'
-
-    # coda set-up
-    DOC_ID = "m6G_7OVfdq"
-    TABLE_ID = "table-c4x55SFhUm"
-
-    priv_df = export_coda_table_to_df(DOC_ID, TABLE_ID)
-    priv_formatted_df = format_data_for_upload(priv_df)
-
-    warehouse_conn = rs_connection(redshift_creds)
-    done1 = create_staging_table(warehouse_conn, staging_schema=staging_schema, prod_schema=schema, prod_table=table)
-    done2 = write_data_to_staging_table(warehouse_conn, staging_schema=staging_schema, prod_table=table, df=priv_formatted_df, done=done1)
-    done3 = promote_to_prod(warehouse_conn, prod_schema=schema, staging_schema=staging_schema, prod_table=table, done=done2)
+@flow(name='redshift-coda-sku-update-run', task_runner=ConcurrentTaskRunner())
+def main_flow(tables: list = None):
+    logger=get_run_logger()
+    tables = tables or CODA_TABLES
+    redshift_creds = SecretJSON.load('resolution-redshift-service-account').get()
+    sync_state = SyncStateStore(os.getenv("CODA_SYNC_STATE", "~/.cache/coda_sync_state.sqlite"))
+    coda_exporter = CodaExporter(coda_api_token)
+    snapshot_cache = CodaSnapshotCache(os.getenv("CODA_SNAPSHOT_CACHE", "~/.cache/coda_snapshots"))
+    # One pooled warehouse shared by every table's chain
+    warehouse_conn = rs_connection(redshift_creds, pool_size=len(tables))
+    timings = StageTimings()
+
+    started = time.perf_counter()
+    failed = {}
+    try:
+        # The per-table chains are independent, so both tables fetch, format and load at the same time
+        submitted = {config['prod_table']: submit_table_sync(config, warehouse_conn, sync_state, coda_exporter, snapshot_cache, timings)
+                     for config in tables}
+        # Let every chain finish before looking at results, the pool closed below is shared with the ones still running
+        for counts, committed in submitted.values():
+            counts.wait()
+            committed.wait()
+        for table, (counts, committed) in submitted.items():
+            try:
+                result = counts.result()
+                committed.result()
+                logger.info(f'{table}: {result}')
+            except Exception as e:
+                logger.error(f'{table}: SYNC FAILED: {e}')
+                failed[table] = e
+    finally:
+        warehouse_conn.close()
+
+    for table, stage, seconds in sorted(timings.rows):
+        logger.info(f'{table:<20} {stage:<16} {seconds:8.2f}s')
+    logger.info(f'Synced {len(tables) - len(failed)} of {len(tables)} tables in {time.perf_counter() - started:.2f}s')
+    if failed:
+        raise RuntimeError(f"Coda sync failed for {', '.join(failed)}") from next(iter(failed.values()))
 
 
 deployment = Deployment(prefect_version="2.0", entrypoint="scripts/ai_coe/coda/redshift-pipeline.py:main_flow", work_queue="b1-prv", tags=["provisioning"], cron="0 0 * * 0") # run update at midnight on Sundays? Maybe everyday instead would be better?
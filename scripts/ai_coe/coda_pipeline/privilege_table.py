@@ -1,6 +1,6 @@
 import os
-import pandas as pd
-from codaio import Coda, Document
+from scripts.ai_coe.coda_pipeline.coda_export import CodaExporter
+from scripts.ai_coe.coda_pipeline.snapshot_cache import CodaSnapshotCache
 from dotenv import load_dotenv
 
 
@@ -9,20 +9,21 @@ from dotenv import load_dotenv
 doc_id = "m6G_7OVfdq"
 table_id = "table-RC54btGLAp"
 
-load_dotenv()
-coda_api_token = os.getenv("CODA_TOKEN")
-coda_client = Coda(coda_api_token)
-
-print(f"Token Loaded: {bool(coda_api_token)}")
-if not coda_api_token:
-    print("Error: CODA_TOKEN is not loaded!")
-    
-#select the relevent document using ID
-doc = Document(doc_id, coda=coda_client)
-
-doc.list_tables()
-# print(doc.list_tables())
-table = doc.get_table(table_id)
-# print(table.to_dict())
-df = pd.DataFrame(table.to_dict())
-df.to_csv('sku-privilege-table.csv', index = False, header=True)
+
+
+def main(output_filename='sku-privilege-table.csv'):
+    load_dotenv()
+    coda_api_token = os.getenv("CODA_TOKEN")
+
+    print(f"Token Loaded: {bool(coda_api_token)}")
+    if not coda_api_token:
+        print("Error: CODA_TOKEN is not loaded!")
+
+    # Only downloads the table if it changed since the last cached snapshot
+    cache = CodaSnapshotCache(os.getenv("CODA_SNAPSHOT_CACHE", "~/.cache/coda_snapshots"))
+    df = cache.fetch(CodaExporter(coda_api_token), doc_id, table_id)
+    df.to_csv(output_filename, index = False, header=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+import argparse
+import json
+import os
+import sys
+from typing import Dict, Iterable, List
+
+import pandas as pd
+
+from scripts.ai_coe.coda_pipeline.table_schema import NULL_VALUES
+
+# Pre-flight check of ticket products against the SKU tables, so the automation failures
+#   Some product code could not be parsed: .
+#   Some Packages are not recognized or does not exist: ["1003"]
+# are caught before a ticket is submitted instead of read back from its audit log. Issues use the
+# same failure classes as audit_events.py, so they line up with the failure index.
+ISSUE_BLANK_PRODUCT_CODE = 'unparsed_product_code'
+ISSUE_UNKNOWN_PACKAGE = 'unrecognized_package_ids'
+ISSUE_NO_PACKAGES = 'no_valid_packages'
+
+# Coda exports written by coda_data_table_pull.py and the Redshift tables the pipeline syncs them to
+SKU_EXPORT_FILES = ['sku-privilege-table-export.csv', 'sku-extension-table-export.csv']
+SKU_WAREHOUSE_TABLES = ['metrics_ops_resolution.sku_privileges', 'metrics_ops_resolution.sku_extensions']
+
+# Labels of the License Information table on a ticket (scrape_products_from_ticket / ticket_page_parser)
+TICKET_PRODUCT_FIELDS = {'product': 'Product', 'product_code': 'Product Code', 'package_codes': 'Package IDs'}
+# provisioning_lines columns written by soql_extract.py. Lines there belong to a brand account, not a ticket.
+SOQL_PRODUCT_FIELDS = {'brand_account_id': 'Brand_Account__c', 'product': 'Product_Name__c',
+                       'product_code': 'Product_Code__c', 'package_codes': 'Internal_Bundle_Id__c'}
+
+# First column of a product lines frame, depending on where the lines came from
+LINE_KEYS = {'ticket_id': 'tickets', 'brand_account_id': 'brand accounts'}
+ISSUE_COLUMNS = ['line', 'product', 'product_code', 'package_code', 'issue']
+# Package ID cells hold one or more codes: "1003, 1004", '["1003"]'...
+PACKAGE_SEPARATORS = r'[\s,;"\'\[\]]+'
+
+# scrape_journal.py, for reading a ScrapeJournal of scraped tickets
+ODO_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'odo')
+
+
+class SkuIndex:
+    """
+    The set of package codes the provisioning automation recognizes, as a hashed pandas Index.
+
+    Built from the SKU column of the sku_privileges and sku_extensions tables, whichever source they
+    come from. Lookups are a vectorized isin() over any number of codes at once.
+    """
+
+    def __init__(self, codes: Iterable[str]):
+        codes = pd.Series(list(codes), dtype='string').str.strip()
+        codes = codes[codes.notna() & ~codes.isin(NULL_VALUES)]
+        self.codes = pd.Index(codes.unique(), dtype='string')
+
+    def __len__(self):
+        return len(self.codes)
+
+    def __contains__(self, code):
+        return str(code).strip() in self.codes
+
+    def unknown(self, codes: pd.Series) -> pd.Series:
+        """Boolean mask of the codes not in the index."""
+        return ~codes.astype('string').str.strip().isin(self.codes)
+
+    @classmethod
+    def from_frames(cls, frames: Iterable[pd.DataFrame], code_column: str = 'SKU') -> 'SkuIndex':
+        frames = list(frames)
+        for df in frames:
+            if code_column not in df.columns:
+                raise ValueError(f"Column {code_column!r} missing from SKU table (columns: {list(df.columns)})")
+        return cls(pd.concat([df[code_column] for df in frames], ignore_index=True) if frames else [])
+
+    @classmethod
+    def from_csv(cls, paths: List[str] = SKU_EXPORT_FILES, code_column: str = 'SKU') -> 'SkuIndex':
+        """Loads the Coda CSV exports (see coda_data_table_pull.py)."""
+        return cls.from_frames((pd.read_csv(path, usecols=[code_column], dtype=str, keep_default_na=False)
+                                for path in paths), code_column)
+
+    @classmethod
+    def from_warehouse(cls, warehouse, tables: List[str] = SKU_WAREHOUSE_TABLES, code_column: str = 'sku') -> 'SkuIndex':
+        """Loads the synced Redshift tables through a DataWarehouse, one query per table run concurrently."""
+        frames = warehouse.run_many({table: f"select distinct {code_column} from {table}" for table in tables})
+        return cls.from_frames(frames.values(), code_column)
+
+
+def product_lines(tickets: Dict[str, list], fields: Dict[str, str] = TICKET_PRODUCT_FIELDS) -> pd.DataFrame:
+    """
+    Flattens scraped ticket products into one row per product line.
+
+    Args:
+        tickets: {ticket_id: products} as returned by scrape_products_from_ticket, or
+            {ticket_id: record} from scrape_ticket_record / ScrapeJournal.results().
+        fields: Ticket labels for 'product', 'product_code' and 'package_codes'.
+
+    Returns:
+        DataFrame with columns ticket_id, line, product, product_code, package_codes.
+    """
+    rows = []
+    for ticket_id, products in tickets.items():
+        if isinstance(products, dict):
+            products = products.get('products') or []
+        for line, product in enumerate(products):
+            rows.append((ticket_id, line, product.get(fields['product']), product.get(fields['product_code']),
+                         product.get(fields['package_codes'])))
+    return pd.DataFrame(rows, columns=['ticket_id', 'line', 'product', 'product_code', 'package_codes'])
+
+
+def soql_product_lines(provisioning_lines: pd.DataFrame, fields: Dict[str, str] = SOQL_PRODUCT_FIELDS) -> pd.DataFrame:
+    """Same as product_lines() for the provisioning_lines table of the SOQL extract."""
+    lines = pd.DataFrame({column: provisioning_lines.get(source) for column, source in fields.items()},
+                         index=provisioning_lines.index)
+    if pd.api.types.is_float_dtype(lines['package_codes']):
+        # Integer IDs come back as floats (1003.0) when some lines have none
+        lines['package_codes'] = lines['package_codes'].astype('Int64')
+    lines.insert(1, 'line', lines.groupby('brand_account_id', sort=False).cumcount())
+    return lines.reset_index(drop=True)
+
+
+def line_key(lines: pd.DataFrame) -> str:
+    """The column identifying whose product lines these are, ticket_id or brand_account_id."""
+    for key in LINE_KEYS:
+        if key in lines.columns:
+            return key
+    raise ValueError(f"Product lines need one of {list(LINE_KEYS)} (columns: {list(lines.columns)})")
+
+
+def validate(lines: pd.DataFrame, index: SkuIndex) -> pd.DataFrame:
+    """
+    Checks every product line in one vectorized pass.
+
+    Flags blank product codes, lines without any package code and package codes missing from the
+    SKU index.
+
+    Args:
+        lines: Frame from product_lines() or soql_product_lines().
+        index: Known package codes.
+
+    Returns:
+        DataFrame with one row per issue, columns ticket_id (brand_account_id for SOQL lines), line,
+        product, product_code, package_code (None unless the issue is about one code) and issue.
+    """
+    key = line_key(lines)
+    product_code = lines['product_code'].astype('string').str.strip()
+    blank_code = product_code.isna() | product_code.isin(NULL_VALUES)
+
+    # One row per package code, split out of the cells all at once
+    packages = (lines['package_codes'].astype('string').str.strip(' "\'[]')
+                .str.split(PACKAGE_SEPARATORS).explode().astype('string'))
+    packages = packages[packages.notna() & (packages != '')]
+    no_packages = ~lines.index.isin(packages.index)
+    unknown = packages[index.unknown(packages)]
+
+    issues = [
+        lines[blank_code].assign(package_code=None, issue=ISSUE_BLANK_PRODUCT_CODE),
+        lines[no_packages & ~blank_code].assign(package_code=None, issue=ISSUE_NO_PACKAGES),
+        lines.loc[unknown.index].assign(package_code=unknown.values, issue=ISSUE_UNKNOWN_PACKAGE),
+    ]
+    columns = [key] + ISSUE_COLUMNS
+    issues = pd.concat([frame for frame in issues if len(frame)] or [pd.DataFrame(columns=columns)])
+    return issues[columns].sort_values([key, 'line'], kind='stable').reset_index(drop=True)
+
+
+def summarize(issues: pd.DataFrame, lines: pd.DataFrame, top: int = 10) -> dict:
+    """
+    Counts per issue type and the most frequent unknown package codes.
+
+    'records' and 'records_with_issues' count tickets or brand accounts, as named by 'key'.
+    """
+    key = line_key(lines)
+    unknown = issues.loc[issues['issue'] == ISSUE_UNKNOWN_PACKAGE, 'package_code']
+    return {
+        'key': key,
+        'records': int(lines[key].nunique()),
+        'product_lines': len(lines),
+        'records_with_issues': int(issues[key].nunique()),
+        'issues': issues['issue'].value_counts().to_dict(),
+        'top_unknown_packages': unknown.value_counts().head(top).to_dict(),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Check ticket products against the SKU tables before submitting them.')
+    parser.add_argument('tickets', help='ScrapeJournal .sqlite, {ticket_id: products} .json, or provisioning_lines .jsonl/.csv from soql_extract.py')
+    parser.add_argument('--sku-csv', nargs='+', default=SKU_EXPORT_FILES, help='Coda SKU table exports')
+    parser.add_argument('--output', default='sku_issues.csv')
+    args = parser.parse_args(argv)
+
+    index = SkuIndex.from_csv(args.sku_csv)
+    if args.tickets.endswith('.sqlite'):
+        sys.path.insert(0, ODO_DIR)
+        from scrape_journal import ScrapeJournal
+        journal = ScrapeJournal(args.tickets)
+        lines = product_lines(journal.results())
+        journal.close()
+    elif args.tickets.endswith('.json'):
+        with open(args.tickets) as infile:
+            lines = product_lines(json.load(infile))
+    elif args.tickets.endswith('.jsonl'):
+        lines = soql_product_lines(pd.read_json(args.tickets, lines=True, dtype=False))
+    else:
+        lines = soql_product_lines(pd.read_csv(args.tickets, dtype=str, keep_default_na=False))
+
+    issues = validate(lines, index)
+    issues.to_csv(args.output, index=False)
+    summary = summarize(issues, lines)
+    label = LINE_KEYS[summary['key']]
+    print(f"{summary['records']} {label}, {summary['product_lines']} product lines checked against {len(index)} SKUs")
+    print(f"{summary['records_with_issues']} {label} with issues: {summary['issues']}")
+    if summary['top_unknown_packages']:
+        print(f"Most frequent unknown packages: {summary['top_unknown_packages']}")
+    print(f"Issues written to {args.output}")
+    # Non-zero so a pre-flight step in a script or CI stops before the tickets are submitted
+    return 1 if len(issues) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
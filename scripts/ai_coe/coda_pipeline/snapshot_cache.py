@@ -0,0 +1,267 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+import pyarrow.parquet as pq
+
+from scripts.ai_coe.coda_pipeline.coda_export import CodaExporter, DataFrameSink
+from scripts.ai_coe.coda_pipeline.delta_sync import SyncStateStore
+
+
+class _SnapshotTee:
+    """Passes exported pages on to another sink as they arrive, keeping them for the snapshot."""
+
+    def __init__(self, sink):
+        self.sink = sink
+        self.frame = DataFrameSink()
+
+    def write_rows(self, columns: List[str], rows: List[dict]):
+        self.sink.write_rows(columns, rows)
+        self.frame.write_rows(columns, rows)
+
+    def close(self):
+        try:
+            self.sink.close()
+        finally:
+            self.frame.close()
+
+
+class CodaSnapshotCache:
+    """
+    Local cache of Coda table snapshots.
+
+    fetch() returns a table as a DataFrame, export_table()/export() stream it into a sink the way
+    CodaExporter does.
+
+    Before downloading a table, one metadata request checks its updatedAt (sending the last ETag,
+    so Coda can answer 304). An unchanged table is served from disk, so repeated exports cost a
+    single API call each. Snapshots are zstd-compressed Parquet files named by a hash of their
+    content, so identical downloads share one file. The last `history` snapshots of each table are
+    kept for diffing.
+    """
+
+    def __init__(self, directory: str = '~/.cache/coda_snapshots', history: int = 5):
+        """
+        Parameters:
+            directory (str): Where snapshots and their index live.
+            history (int): Snapshots kept per table, the newest included.
+        """
+        if history < 1:
+            raise ValueError(f"Configuration Error: history must be at least 1, got {history}")
+        self.directory = os.path.expanduser(directory)
+        self.history = history
+        os.makedirs(self.directory, exist_ok=True)
+        self._index_path = os.path.join(self.directory, 'index.sqlite')
+        self._lock = threading.Lock()
+        with self._connect() as db:
+            db.execute("""
+                create table if not exists snapshots (
+                    doc_id text not null,
+                    table_id text not null,
+                    updated_at text not null,
+                    etag text,
+                    content_hash text not null,
+                    rows integer not null,
+                    fetched_at real not null,
+                    primary key (doc_id, table_id, updated_at)
+                )""")
+
+    @contextmanager
+    def _connect(self):
+        db = sqlite3.connect(self._index_path, timeout=30)
+        try:
+            with db:
+                yield db
+        finally:
+            db.close()
+
+    def _path(self, content_hash: str) -> str:
+        return os.path.join(self.directory, f"{content_hash}.parquet")
+
+    def snapshots(self, doc_id: str, table_id: str) -> List[dict]:
+        """Cached snapshots of a table, newest first."""
+        with self._connect() as db:
+            rows = db.execute("""
+                select updated_at, etag, content_hash, rows, fetched_at from snapshots
+                where doc_id = ? and table_id = ? order by fetched_at desc""", (doc_id, table_id)).fetchall()
+        return [dict(zip(['updated_at', 'etag', 'content_hash', 'rows', 'fetched_at'], row)) for row in rows]
+
+    def load(self, doc_id: str, table_id: str, version: int = 0) -> Optional[pd.DataFrame]:
+        """Reads a cached snapshot, 0 being the newest, 1 the one before... None if there is none."""
+        snapshots = self.snapshots(doc_id, table_id)
+        if version >= len(snapshots):
+            return None
+        return pd.read_parquet(self._path(snapshots[version]['content_hash']))
+
+    def _check(self, exporter: CodaExporter, doc_id: str, table_id: str) -> Tuple[Optional[dict], str, Optional[str]]:
+        """
+        Asks Coda whether a table changed since its newest snapshot.
+
+        Returns:
+            (snapshot, updated_at, etag): the snapshot to serve, None if the table must be downloaded,
+            and the table's current version to store with a new snapshot.
+        """
+        snapshots = self.snapshots(doc_id, table_id)
+        latest = snapshots[0] if snapshots else None
+
+        headers = {'If-None-Match': latest['etag']} if latest and latest['etag'] else None
+        response = exporter.get(f"/docs/{doc_id}/tables/{table_id}", headers=headers)
+        if latest and response.status_code == 304:
+            print(f"Coda table {table_id} not modified, using cached snapshot from {latest['updated_at']}")
+            return latest, latest['updated_at'], latest['etag']
+
+        metadata = response.json()
+        updated_at = metadata.get('updatedAt') or ''
+        if latest and updated_at and updated_at == latest['updated_at']:
+            print(f"Coda table {table_id} unchanged since {updated_at}, using cached snapshot")
+            return latest, updated_at, latest['etag']
+        return None, updated_at or time.strftime('%Y-%m-%dT%H:%M:%S'), response.headers.get('ETag')
+
+    def fetch(self, exporter: CodaExporter, doc_id: str, table_id: str) -> pd.DataFrame:
+        """
+        Returns the current contents of a Coda table, downloading it only if it changed since the
+        last cached snapshot.
+        """
+        snapshot, updated_at, etag = self._check(exporter, doc_id, table_id)
+        if snapshot is not None:
+            return pd.read_parquet(self._path(snapshot['content_hash']))
+
+        sink = DataFrameSink()
+        exporter.export_table(doc_id, table_id, sink)
+        return self.put(doc_id, table_id, sink.df, updated_at, etag)
+
+    def export_table(self, exporter: CodaExporter, doc_id: str, table_id: str, sink) -> int:
+        """
+        Streams the current contents of a Coda table into a sink (e.g. a CsvSink), like
+        CodaExporter.export_table. Changed tables are passed on page by page as they download and
+        snapshotted, unchanged ones are read back from their snapshot in page-sized batches.
+
+        Returns:
+            int: Number of rows exported.
+        """
+        snapshot, updated_at, etag = self._check(exporter, doc_id, table_id)
+        if snapshot is not None:
+            return self.stream(snapshot, sink, exporter.page_size)
+
+        tee = _SnapshotTee(sink)
+        total = exporter.export_table(doc_id, table_id, tee)
+        self.put(doc_id, table_id, tee.frame.df, updated_at, etag)
+        return total
+
+    def stream(self, snapshot: dict, sink, batch_size: int = 500) -> int:
+        """Writes a cached snapshot (from snapshots()) into a sink without loading it whole."""
+        parquet_file = pq.ParquetFile(self._path(snapshot['content_hash']))
+        columns = parquet_file.schema_arrow.names
+        total = 0
+        try:
+            # Columns first, an empty snapshot has no batches to carry them
+            sink.write_rows(columns, [])
+            for batch in parquet_file.iter_batches(batch_size=batch_size):
+                rows = batch.to_pylist()
+                sink.write_rows(columns, rows)
+                total += len(rows)
+        finally:
+            sink.close()
+        return total
+
+    def export(self, exporter: CodaExporter, jobs: List[Tuple[str, str, object]]) -> Dict[Tuple[str, str], int]:
+        """
+        export_table() for several (doc_id, table_id, sink) jobs at once, using the exporter's worker count.
+
+        Returns:
+            dict: {(doc_id, table_id): rows exported}. Raises the first error once every job has finished.
+        """
+        results = {}
+        errors = []
+        with ThreadPoolExecutor(max_workers=exporter.max_workers) as executor:
+            futures = {executor.submit(self.export_table, exporter, doc_id, table_id, sink): (doc_id, table_id)
+                       for doc_id, table_id, sink in jobs}
+            for future in as_completed(futures):
+                job = futures[future]
+                try:
+                    results[job] = future.result()
+                except Exception as e:
+                    print(f"An error occurred exporting {job[1]} from {job[0]}: {e}")
+                    errors.append(e)
+        if errors:
+            raise errors[0]
+        return results
+
+    def fetch_many(self, exporter: CodaExporter, tables: List[Tuple[str, str]]) -> Dict[Tuple[str, str], pd.DataFrame]:
+        """fetch() for several (doc_id, table_id) pairs at once, using the exporter's worker count."""
+        with ThreadPoolExecutor(max_workers=exporter.max_workers) as executor:
+            frames = executor.map(lambda job: self.fetch(exporter, *job), tables)
+            return dict(zip(tables, frames))
+
+    @staticmethod
+    def _content_hash(df: pd.DataFrame) -> str:
+        digest = hashlib.sha256('\x1f'.join(map(str, df.columns)).encode())
+        if len(df):
+            digest.update(pd.util.hash_pandas_object(df.astype(str), index=False).values.tobytes())
+        return digest.hexdigest()[:32]
+
+    @staticmethod
+    def _parquet_safe(df: pd.DataFrame) -> pd.DataFrame:
+        """Coda columns can mix numbers, text and lists, which Parquet cannot store in one column. Those become text."""
+        df = df.copy()
+        for column in df.columns[df.dtypes == object]:
+            kinds = set(df[column].dropna().map(type))
+            if len(kinds) > 1 or (kinds and not kinds <= {str, bool, int, float}):
+                df[column] = df[column].map(lambda value: value if value is None or isinstance(value, str) else str(value))
+        return df
+
+    def put(self, doc_id: str, table_id: str, df: pd.DataFrame, updated_at: str, etag: Optional[str] = None) -> pd.DataFrame:
+        """Stores a snapshot, prunes old ones and returns the frame as it will read back from the cache."""
+        df = self._parquet_safe(df)
+        content_hash = self._content_hash(df)
+        path = self._path(content_hash)
+
+        # One writer at a time, so pruning never removes a file another put() has just written
+        with self._lock:
+            if not os.path.exists(path):
+                tmp_path = f"{path}.tmp"
+                df.to_parquet(tmp_path, index=False, compression='zstd')
+                os.replace(tmp_path, path)
+
+            with self._connect() as db:
+                db.execute("insert or replace into snapshots values (?, ?, ?, ?, ?, ?, ?)",
+                           (doc_id, table_id, updated_at, etag, content_hash, len(df), time.time()))
+                db.execute("""
+                    delete from snapshots where doc_id = ? and table_id = ? and updated_at not in (
+                        select updated_at from snapshots where doc_id = ? and table_id = ?
+                        order by fetched_at desc limit ?)""", (doc_id, table_id, doc_id, table_id, self.history))
+                referenced = {row[0] for row in db.execute("select content_hash from snapshots")}
+            for name in os.listdir(self.directory):
+                if name.endswith('.parquet') and name[:-len('.parquet')] not in referenced:
+                    os.remove(os.path.join(self.directory, name))
+
+        print(f"Cached snapshot of {table_id} ({len(df)} rows, updated {updated_at})")
+        return pd.read_parquet(path)
+
+    def diff(self, doc_id: str, table_id: str, key_columns: List[str], older: int = 1, newer: int = 0) -> dict:
+        """
+        Compares two cached snapshots of a table (by default the newest and the one before it).
+
+        Returns:
+            dict: {'added', 'removed', 'changed'} DataFrames, 'changed' holding the newer rows.
+        """
+        old_df, new_df = self.load(doc_id, table_id, older), self.load(doc_id, table_id, newer)
+        if old_df is None or new_df is None:
+            raise ValueError(f"Need snapshots {newer} and {older} of {table_id}, only {len(self.snapshots(doc_id, table_id))} cached")
+
+        old_keys, new_keys = SyncStateStore.row_keys(old_df, key_columns), SyncStateStore.row_keys(new_df, key_columns)
+        previous_hashes = new_keys.map(dict(zip(old_keys, SyncStateStore.row_hashes(old_df))))
+        added = previous_hashes.isna()
+        changed = ~added & (previous_hashes != SyncStateStore.row_hashes(new_df))
+        removed = ~old_keys.isin(set(new_keys))
+        return {
+            'added': new_df[added].reset_index(drop=True),
+            'removed': old_df[removed].reset_index(drop=True),
+            'changed': new_df[changed].reset_index(drop=True),
+        }
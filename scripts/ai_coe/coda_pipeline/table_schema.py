@@ -0,0 +1,89 @@
+import pandas as pd
+
+# Declared column types for the Coda tables we load into Redshift, applied before staging so
+# frames are typed (and smaller) instead of all-object strings.
+#   'string'   -> pandas string dtype, trimmed
+#   'category' -> categorical, for low-cardinality labels
+#   'boolean'  -> nullable boolean, from Coda checkboxes or their text forms
+SKU_TABLE_SCHEMA = {
+    'Tab': 'category',
+    'Category': 'category',
+    'Privilege': 'string',
+    'Notes': 'string',
+    'SKU': 'string',
+    'Enabled': 'boolean',
+}
+SKU_TABLE_KEY = ['SKU', 'Privilege']
+
+# Values Coda hands back for "nothing here"
+NULL_VALUES = ['', 'null', 'None', 'nan', 'NaN']
+
+TRUE_VALUES = {'true', 't', 'yes', 'y', '1', 'checked'}
+FALSE_VALUES = {'false', 'f', 'no', 'n', '0', 'unchecked'}
+
+
+def _to_boolean(column: pd.Series) -> pd.Series:
+    lowered = column.astype('string').str.strip().str.lower()
+    result = pd.Series(pd.NA, index=column.index, dtype='boolean')
+    result[lowered.isin(TRUE_VALUES).fillna(False)] = True
+    result[lowered.isin(FALSE_VALUES).fillna(False)] = False
+    unknown = column.notna() & result.isna()
+    if unknown.any():
+        raise ValueError(f"Column {column.name!r} has values that are not booleans: {sorted(column[unknown].astype(str).unique())[:10]}")
+    return result
+
+
+def normalize_frame(df: pd.DataFrame, schema: dict, key_columns: list = None) -> pd.DataFrame:
+    """
+    Applies a declared schema to a Coda frame.
+
+    Nulls ('', 'null', ...) are mapped in one vectorized pass, each declared column is cast to its
+    type and the key columns are checked for duplicates.
+
+    Args:
+        df: Frame as exported from Coda. Columns missing from the schema are dropped.
+        schema: {column: 'string' | 'category' | 'boolean'}, in output column order.
+        key_columns: Columns that must uniquely identify a row.
+
+    Returns:
+        A new, typed DataFrame.
+
+    Raises:
+        ValueError: A declared column is missing, a boolean column has other values, or key
+            columns are duplicated or empty.
+    """
+    missing = [column for column in schema if column not in df.columns]
+    if missing:
+        raise ValueError(f"Columns missing from the Coda table: {missing}")
+
+    # One pass over all columns
+    frame = df[list(schema)].mask(df[list(schema)].isin(NULL_VALUES))
+
+    typed = {}
+    for column, dtype in schema.items():
+        if dtype == 'boolean':
+            typed[column] = _to_boolean(frame[column])
+        elif dtype in ('string', 'category'):
+            values = frame[column].astype('string').str.strip()
+            values = values.mask(values == '')
+            typed[column] = values.astype('category') if dtype == 'category' else values
+        else:
+            raise ValueError(f"Unknown type {dtype!r} for column {column!r}")
+    frame = pd.DataFrame(typed, index=df.index)
+
+    if key_columns:
+        validate_key(frame, key_columns)
+    return frame
+
+
+def validate_key(df: pd.DataFrame, key_columns: list):
+    """Raises ValueError if any key column is empty or a key appears on more than one row."""
+    empty = df[key_columns].isna().any(axis=1)
+    if empty.any():
+        raise ValueError(f"{int(empty.sum())} rows have an empty {'/'.join(key_columns)}:\n{df[empty].head(10).to_string()}")
+
+    duplicated = df.duplicated(subset=key_columns, keep=False)
+    if duplicated.any():
+        sample = df.loc[duplicated, key_columns].value_counts().head(10)
+        raise ValueError(f"{int(duplicated.sum())} rows share a {'/'.join(key_columns)} key, "
+                         f"which makes the merge into prod ambiguous:\n{sample.to_string()}")
@@ -0,0 +1,302 @@
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+# Offline benchmarks for the scrape, parse and load hot paths. Nothing here talks to ODO, Coda or
+# Redshift: scrapers run against the HTML fixtures served locally, parsers against a synthetic audit
+# log and the load/merge path against a local Postgres (only when --postgres-dsn is given).
+#
+#   python scripts/benchmarks/run_benchmarks.py --rows 200000
+#   python scripts/benchmarks/run_benchmarks.py --postgres-dsn postgresql://localhost/bench --compare results/previous.json
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(os.path.dirname(BENCH_DIR))
+FIXTURES = os.path.join(BENCH_DIR, 'fixtures')
+RESULTS_DIR = os.path.join(BENCH_DIR, 'results')
+
+# The ODO and extract_regex scripts import their neighbours by bare module name
+for path in (ROOT, os.path.join(ROOT, 'scripts', 'odo'), os.path.join(ROOT, 'scripts', 'extract_regex')):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+# Stage timings where lower is better, compared against --compare
+REGRESSION_THRESHOLD = 0.10
+
+
+def _timed(function, *args, **kwargs):
+    start = time.perf_counter()
+    result = function(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def serve_fixtures():
+    """
+    Serves the ODO fixtures on a random local port, routed by the same query string the scrapers use
+    (b=TicketViewer -> ticket_page.html, b=RSBrandProfile -> brand_profile.html).
+
+    Returns:
+        (server, base_url). Call server.shutdown() when done.
+    """
+    pages = {}
+    for name in ('ticket_page', 'brand_profile'):
+        with open(os.path.join(FIXTURES, f'{name}.html'), 'rb') as infile:
+            pages[name] = infile.read()
+
+    class FixtureHandler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            page = parse_qs(urlparse(self.path).query).get('b', [''])[0]
+            body = pages['brand_profile'] if page == 'RSBrandProfile' else pages['ticket_page']
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/html; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), FixtureHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f'http://127.0.0.1:{server.server_port}'
+
+
+def bench_ticket_parser(iterations=500):
+    """Offline lxml parse of the ticket fixture, the extraction half of scrape_ticket_record."""
+    from ticket_page_parser import parse_ticket_page
+    with open(os.path.join(FIXTURES, 'ticket_page.html')) as infile:
+        page_source = infile.read()
+    # Server HTML fetched over HTTP has no browser-inserted <tbody>, it must parse to the same record
+    with open(os.path.join(FIXTURES, 'ticket_page_no_tbody.html')) as infile:
+        if parse_ticket_page(infile.read()) != parse_ticket_page(page_source):
+            raise ValueError('ticket_page_no_tbody.html does not parse like ticket_page.html')
+    _, elapsed = _timed(lambda: [parse_ticket_page(page_source, str(i)) for i in range(iterations)])
+    return {'iterations': iterations, 'total_s': elapsed, 'pages_per_s': iterations / elapsed}
+
+
+def bench_scrapers(items=20, workers=2):
+    """
+    Runs the Selenium scrapers against the locally served fixtures with headless Chrome, comparing
+    the per-element scrapers with the single page_source pass. Skipped when Chrome is not available.
+    """
+    from browser_pool import new_chrome_driver, run_parallel_scrape
+    from scrape_from_ticket import scrape_brand_and_datacenter_from_ticket, scrape_errors_from_ticket, \
+        scrape_products_from_ticket, scrape_ticket_record
+    from scrape_from_odo_brand_page import scrape_dc_from_odo_brand_page
+    from telemetry import TELEMETRY
+
+    try:
+        new_chrome_driver().quit()
+    except Exception as e:
+        return {'skipped': f'Chrome is not available: {e.__class__.__name__}'}
+
+    TELEMETRY.path = None  # keep the timings, skip the JSON-lines file
+    server, base_url = serve_fixtures()
+    ticket_ids = [f'BENCH-{i}' for i in range(items)]
+
+    def per_element(driver, ticket_id):
+        return (scrape_products_from_ticket(driver, ticket_id), scrape_brand_and_datacenter_from_ticket(driver, ticket_id),
+                scrape_errors_from_ticket(driver, ticket_id))
+
+    scenarios = {
+        'ticket_per_element': ('TicketViewer', per_element),
+        'ticket_record': ('TicketViewer', scrape_ticket_record),
+        'brand_profile': ('RSBrandProfile', scrape_dc_from_odo_brand_page),
+    }
+    results = {}
+    try:
+        for name, (page, scrape) in scenarios.items():
+            scraped, elapsed = _timed(
+                run_parallel_scrape, ticket_ids, url_for=lambda item_id, page=page: f'{base_url}/?b={page}&tid={item_id}',
+                scrape=scrape, cookies=[], workers=workers, base_url=base_url)
+            results[name] = {'items': items, 'workers': workers, 'total_s': elapsed,
+                             'items_per_minute': items / elapsed * 60, 'failed': sum(1 for r in scraped if not r)}
+        results['stages'] = TELEMETRY.summary()['stages']
+    finally:
+        server.shutdown()
+    return results
+
+
+def bench_http_tickets(items=200, workers=16):
+    """Browserless ticket fetch (http_ticket_fetcher.py) against the locally served ticket fixture."""
+    from http_ticket_fetcher import HttpTicketFetcher
+    from telemetry import TELEMETRY
+
+    TELEMETRY.path = None
+    server, base_url = serve_fixtures()
+    fetcher = HttpTicketFetcher([], workers=workers, ticket_url=f'{base_url}/?b=TicketViewer&tid=')
+    try:
+        outcome, elapsed = _timed(fetcher.scrape_many, [f'BENCH-{i}' for i in range(items)])
+    finally:
+        fetcher.close()
+        server.shutdown()
+    return {'items': items, 'workers': workers, 'total_s': elapsed, 'items_per_minute': items / elapsed * 60,
+            'failed': len(outcome['failed']), 'needed_browser': len(outcome['fallback'])}
+
+
+def bench_audit_parser(rows=200_000):
+    """Streaming audit-log parse on a synthetic log (see extract_regex/bench_audit_events.py)."""
+    from bench_audit_events import run
+    return run(rows)
+
+
+def bench_failure_index(rows=200_000):
+    """Ingest of a synthetic audit log into the SQLite failure index, then a top-codes query."""
+    from bench_audit_events import generate_log
+    from failure_index import connect, ingest_audit_log, top_codes
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        log_path = os.path.join(tmp_dir, 'results.txt')
+        generate_log(log_path, rows)
+        with connect(os.path.join(tmp_dir, 'index.sqlite')) as db:
+            new_events, ingest_s = _timed(ingest_audit_log, db, log_path)
+            _, reingest_s = _timed(ingest_audit_log, db, log_path)
+            _, query_s = _timed(top_codes, db)
+    return {'rows': rows, 'failure_events': new_events, 'ingest_s': ingest_s, 'reingest_noop_s': reingest_s, 'top_codes_s': query_s}
+
+
+def _sku_frame(rows, seed=0, changed_fraction=0.0):
+    import numpy as np
+    import pandas as pd
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        'Tab': rng.choice(['Survey', 'Admin', 'Themes'], rows),
+        'Category': rng.choice(['Core', 'EX', 'CX', 'BX'], rows),
+        'Privilege': [f'priv_{i}' for i in range(rows)],
+        'Notes': rng.choice(['', 'legacy', 'needs review'], rows),
+        'SKU': [f'SKU-{i % 997}' for i in range(rows)],
+        'Enabled': rng.random(rows) > 0.5,
+    })
+    if changed_fraction:
+        changed = rng.random(rows) < changed_fraction
+        df.loc[changed, 'Notes'] = 'changed'
+    return df
+
+
+def bench_warehouse(dsn, rows=50_000):
+    """
+    Load and merge path against a local Postgres: execute_values vs COPY into staging, then a full
+    promote() merge, a no-op merge and a 5% change merge.
+    """
+    import psycopg2
+    from scripts.redshift.redshift import DataWarehouse
+    from scripts.redshift.object_store import LocalObjectStore
+    from scripts.redshift.promotion import promote
+
+    class LocalWarehouse(DataWarehouse):
+        def _get_db_connection(self):
+            return psycopg2.connect(dsn)
+
+    df = _sku_frame(rows)
+    results = {'rows': rows}
+    with LocalWarehouse('bench', 'bench', 'psycopg2', host='localhost', pool_size=2) as dw, \
+            tempfile.TemporaryDirectory() as store_dir:
+        store = LocalObjectStore(store_dir)
+        dw.run("create schema if not exists bench_prod; create schema if not exists bench_staging")
+        dw.run("drop table if exists bench_prod.sku_privileges")
+        dw.run("create table bench_prod.sku_privileges (Tab varchar, Category varchar, Privilege varchar, "
+               "Notes varchar, SKU varchar, Enabled boolean)")
+        dw.run("create table if not exists bench_staging.load_test (like bench_prod.sku_privileges)")
+
+        for name, load_store in (('execute_values', None), ('copy', store)):
+            dw.run("delete from bench_staging.load_test")
+            _, elapsed = _timed(dw.copy_dataframe, df, 'bench_staging', 'load_test', store=load_store, small_frame_threshold=0)
+            results[f'load_{name}_s'] = elapsed
+            results[f'load_{name}_rows_per_s'] = rows / elapsed
+
+        for name, frame in (('merge_initial', df), ('merge_noop', df), ('merge_5pct_changed', _sku_frame(rows, changed_fraction=0.05))):
+            counts, elapsed = _timed(promote, dw, frame, 'bench_prod', 'sku_privileges', 'bench_staging', ['SKU', 'Privilege'], store=store)
+            results[f'{name}_s'] = elapsed
+            results[f'{name}_counts'] = counts
+        _, elapsed = _timed(promote, dw, df, 'bench_prod', 'sku_privileges', 'bench_staging', ['SKU', 'Privilege'],
+                            store=store, full_refresh=True)
+        results['full_refresh_swap_s'] = elapsed
+    return results
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return None
+
+
+def compare(current, previous, path=()):
+    """Yields (metric, previous, current, change) for every *_s timing that got slower by more than the threshold."""
+    for key, value in current.items():
+        old = previous.get(key) if isinstance(previous, dict) else None
+        if isinstance(value, dict):
+            yield from compare(value, old or {}, path + (key,))
+        elif key.endswith('_s') and isinstance(value, (int, float)) and isinstance(old, (int, float)) and old > 0:
+            change = (value - old) / old
+            if change > REGRESSION_THRESHOLD:
+                yield '.'.join(path + (key,)), old, value, change
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Run the offline performance benchmarks and save the results as JSON.')
+    parser.add_argument('--only', action='append', choices=['ticket_parser', 'scrapers', 'http_tickets', 'audit_parser', 'failure_index', 'warehouse'],
+                        help='run only these benchmarks (repeatable)')
+    parser.add_argument('--rows', type=int, default=200_000, help='synthetic audit-log rows')
+    parser.add_argument('--scrape-items', type=int, default=20, help='pages per scraper scenario')
+    parser.add_argument('--workers', type=int, default=2, help='headless browsers for the scraper scenarios')
+    parser.add_argument('--postgres-dsn', default=os.getenv('BENCH_POSTGRES_DSN'), help='local Postgres for the load/merge benchmark')
+    parser.add_argument('--warehouse-rows', type=int, default=50_000)
+    parser.add_argument('--output', help='results file (default: results/<timestamp>.json)')
+    parser.add_argument('--compare', help='earlier results file to check for regressions')
+    args = parser.parse_args(argv)
+
+    benchmarks = {
+        'ticket_parser': lambda: bench_ticket_parser(),
+        'scrapers': lambda: bench_scrapers(args.scrape_items, args.workers),
+        'http_tickets': lambda: bench_http_tickets(args.scrape_items * 10),
+        'audit_parser': lambda: bench_audit_parser(args.rows),
+        'failure_index': lambda: bench_failure_index(args.rows),
+        'warehouse': lambda: bench_warehouse(args.postgres_dsn, args.warehouse_rows) if args.postgres_dsn
+                     else {'skipped': 'no --postgres-dsn given'},
+    }
+    report = {
+        'started_at': datetime.now().isoformat(timespec='seconds'),
+        'commit': _git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'results': {},
+    }
+    for name, benchmark in benchmarks.items():
+        if args.only and name not in args.only:
+            continue
+        print(f'Running {name}...')
+        try:
+            report['results'][name] = benchmark()
+        except Exception as e:
+            report['results'][name] = {'error': f'{e.__class__.__name__}: {e}'}
+        print(json.dumps(report['results'][name], indent=2, default=str))
+
+    output = args.output or os.path.join(RESULTS_DIR, f"{datetime.now():%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as outfile:
+        json.dump(report, outfile, indent=2, default=str)
+    print(f'Results written to {output}')
+
+    if args.compare:
+        with open(args.compare) as infile:
+            previous = json.load(infile)
+        regressions = list(compare(report['results'], previous.get('results', {})))
+        for metric, old, new, change in regressions:
+            print(f'REGRESSION {metric}: {old:.3f}s -> {new:.3f}s (+{change:.0%})')
+        if regressions:
+            return 1
+        print(f"No timing regressed by more than {REGRESSION_THRESHOLD:.0%} against {args.compare}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
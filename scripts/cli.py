@@ -0,0 +1,131 @@
+import argparse
+import os
+import sys
+
+# One entry point for the provisioning scripts:
+#   python scripts/cli.py parse-audit results.txt audit_events.parquet --failures-only
+#   python scripts/cli.py scrape-tickets --input input_tickets.txt
+#   python scripts/cli.py resolve-dc --input input.txt --refresh
+#   python scripts/cli.py export-coda
+#   python scripts/cli.py sync-warehouse
+#   python scripts/cli.py validate-skus ticket_brand_dc.journal.sqlite
+# Only argparse is imported up front. Each subcommand imports its backend (Selenium, Prefect,
+# pandas, psycopg2...) when it runs, so `--help` or a local parse starts almost instantly.
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ODO_DIR = os.path.join(ROOT, 'scripts', 'odo')
+EXTRACT_REGEX_DIR = os.path.join(ROOT, 'scripts', 'extract_regex')
+
+
+def _add_path(path):
+    # The ODO and extract_regex scripts import their neighbours by bare module name
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+
+def _load_script(path, name):
+    """Imports a script whose file name is not a valid module name (e.g. get-brand-dc.py)."""
+    import importlib.util
+
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def scrape_tickets(args):
+    _add_path(ODO_DIR)
+    script = _load_script(os.path.join(ODO_DIR, 'scrape-bu-bc-ticket.py'), 'scrape_bu_bc_ticket')
+    return script.main(args.input, args.output, workers=args.workers, journal_path=args.journal,
+                       use_http=False if args.browser_only else None, http_workers=args.http_workers)
+
+
+def resolve_dc(args):
+    _add_path(ODO_DIR)
+    script = _load_script(os.path.join(ODO_DIR, 'get-brand-dc.py'), 'get_brand_dc')
+    return script.main(args.input, args.output, refresh=args.refresh or None, use_api=args.use_api,
+                       workers=args.workers, cache_path=args.cache)
+
+
+def export_coda(args):
+    _add_path(ROOT)
+    from scripts.ai_coe.coda_pipeline.coda_data_table_pull import SKU_TABLE_EXPORTS, export_coda_tables_to_csv
+
+    export_coda_tables_to_csv(SKU_TABLE_EXPORTS)
+
+
+def sync_warehouse(args):
+    _add_path(ROOT)
+    from scripts.ai_coe.coda_pipeline.privilege_extension_redshift_pipeline import CODA_TABLES, main_flow
+
+    tables = [config for config in CODA_TABLES if config['prod_table'] in args.tables] if args.tables else None
+    main_flow(tables)
+
+
+def parse_audit(args):
+    _add_path(EXTRACT_REGEX_DIR)
+    from audit_events import parse_file
+
+    parse_file(args.input, args.output, args.failures_only)
+
+
+def validate_skus(args):
+    _add_path(ROOT)
+    from scripts.ai_coe.coda_pipeline import sku_validator
+
+    argv = [args.tickets, '--output', args.output] + (['--sku-csv', *args.sku_csv] if args.sku_csv else [])
+    return sku_validator.main(argv)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='cli.py', description='Provisioning scripts.')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    command = subparsers.add_parser('scrape-tickets', help='scrape brand ID and DC from ODO tickets')
+    command.add_argument('--input', default='input_tickets.txt', help='one ticket ID per line')
+    command.add_argument('--output', default='results.txt')
+    command.add_argument('--workers', type=int, default=4, help='headless browsers scraping at once')
+    command.add_argument('--journal', default='ticket_brand_dc.journal.sqlite', help='checkpoint file, re-runs skip scraped tickets')
+    command.add_argument('--http-workers', type=int, default=16, help='ticket pages fetched over HTTP at once')
+    command.add_argument('--browser-only', action='store_true', help='render every ticket page in Chrome instead of fetching it over HTTP')
+    command.set_defaults(handler=scrape_tickets)
+
+    command = subparsers.add_parser('resolve-dc', help='look up the data center of brand IDs')
+    command.add_argument('--input', default='input.txt', help='one brand ID per line')
+    command.add_argument('--output', default='results.txt')
+    command.add_argument('--refresh', action='store_true', help='ignore the cache and look every brand up again')
+    backend = command.add_mutually_exclusive_group()
+    backend.add_argument('--api', dest='use_api', action='store_true', default=None, help='use the ODO API (default when ODO_API_TOKEN is set)')
+    backend.add_argument('--selenium', dest='use_api', action='store_false', help='scrape the brand profile pages')
+    command.add_argument('--workers', type=int, default=4)
+    command.add_argument('--cache', default='brand_dc.cache.sqlite')
+    command.set_defaults(handler=resolve_dc)
+
+    command = subparsers.add_parser('export-coda', help='export the SKU privilege and extension tables to CSV')
+    command.set_defaults(handler=export_coda)
+
+    command = subparsers.add_parser('sync-warehouse', help='run the Coda to Redshift SKU sync flow')
+    command.add_argument('tables', nargs='*', help='prod tables to sync (default: all)')
+    command.set_defaults(handler=sync_warehouse)
+
+    command = subparsers.add_parser('parse-audit', help='parse scraped audit logs into CSV or Parquet')
+    command.add_argument('input', nargs='?', default='results.txt', help='results.txt written by scrape_errors_from_ticket')
+    command.add_argument('output', nargs='?', default='audit_events.csv', help='.csv or .parquet output file')
+    command.add_argument('--failures-only', action='store_true', help='only keep failure rows')
+    command.set_defaults(handler=parse_audit)
+
+    command = subparsers.add_parser('validate-skus', help='check ticket products against the SKU tables')
+    command.add_argument('tickets', help='ScrapeJournal .sqlite, {ticket_id: products} .json, or provisioning_lines .jsonl/.csv')
+    command.add_argument('--sku-csv', nargs='+', help='Coda SKU table exports (default: the export-coda files)')
+    command.add_argument('--output', default='sku_issues.csv')
+    command.set_defaults(handler=validate_skus)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.handler(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,273 @@
+import argparse
+import csv
+import re
+import sys
+from datetime import datetime
+from typing import NamedTuple, Optional, Tuple, Iterator
+
+# Parses the audit-log rows that scrape_errors_from_ticket writes to results.txt, one ticket per
+# line, each line the str() of a Python list of row strings such as
+#   '07-28-2025 1:00 Ticket Processing Failure: Cannot update license for brand sciencelogic: Failed to
+#    change Brand Permissions: Some Packages are not recognized or does not exist: ["1003"] eaxautomatedbrandcreation'
+# All patterns are compiled once, files are read line by line so memory stays flat.
+
+# Quoted strings inside the str() of a list, either quote style, with backslash escapes
+# (unrolled-loop form, much faster than an alternation per character)
+ROW_PATTERN = re.compile(r"'([^'\\]*(?:\\.[^'\\]*)*)'|\"([^\"\\]*(?:\\.[^\"\\]*)*)\"")
+ESCAPE_PATTERN = re.compile(r"\\(.)")
+ESCAPES = {'n': '\n', 't': '\t', '\\': '\\', "'": "'", '"': '"'}
+
+TIMESTAMP_PATTERN = re.compile(r"(\d{2})-(\d{2})-(\d{4}) (\d{1,2}):(\d{2})\s+")
+
+# Longest first so e.g. 'Employee changed' wins over a shorter prefix
+EVENT_TYPES = sorted([
+    'Getting permissions From Ticket Failure',
+    'Getting permissions From Ticket Success',
+    'Getting Brand Info Failure',
+    'Getting Brand Info Success',
+    'Getting Package and restrictions Failure',
+    'Getting Package and restrictions Success',
+    'Ticket Processing Failure',
+    'Ticket Processing Success',
+    'Changing Ticket Status',
+    'Employee changed',
+    'RSBrand changed',
+    'Brand tagged',
+    'Attribute Edits',
+    'Ticket Opened',
+    'Ticket Reopened',
+], key=len, reverse=True)
+EVENT_PATTERN = re.compile('(' + '|'.join(re.escape(e) for e in EVENT_TYPES) + r')\b:?\s*')
+
+# Brand mentions, one alternation so each row is scanned once
+BRAND_PATTERN = re.compile(r"for brand (\S+?):|Fetched brand (\S+) info|RSBrand updated to (\S+)|Brand: (\S+)")
+
+UNPARSED_PRODUCT_CODE = re.compile(r"Some product code could not be parsed: ([^.]*)\.")
+UNRECOGNIZED_PACKAGES = re.compile(r"Some Packages are not recognized or does not exist: \[([^\]]*)\]")
+NO_VALID_PACKAGES = re.compile(r"[Nn]o valid packages")
+PACKAGE_CODE = re.compile(r'"([^"]*)"')
+
+# Automation writes its account name as the last token, people show up as "First Last"
+AUTOMATION_EMPLOYEE = re.compile(r"\s(\w*automat\w*)\s*$", re.IGNORECASE)
+NAMED_EMPLOYEE_PATTERNS = [re.compile(p) for p in (
+    r"^Employee updated to \S+ (.+)$",
+    r"^RSBrand updated to \S+ (.+)$",
+    r"^Brand: \S+ (.+)$",
+)]
+
+HEADER_ROW = 'Date Event Notes Employee'
+
+FAILURE_UNPARSED_PRODUCT_CODE = 'unparsed_product_code'
+FAILURE_UNRECOGNIZED_PACKAGES = 'unrecognized_package_ids'
+FAILURE_NO_VALID_PACKAGES = 'no_valid_packages'
+FAILURE_OTHER = 'other'
+
+FIELDS = ['ticket_line', 'row_number', 'timestamp', 'event_type', 'brand', 'failure_class', 'package_codes', 'employee', 'notes']
+
+
+class AuditEvent(NamedTuple):
+    ticket_line: int                 # line of results.txt the ticket came from (1-based)
+    row_number: int                  # position of the row in the ticket's audit log
+    timestamp: Optional[datetime]
+    event_type: Optional[str]
+    brand: Optional[str]
+    failure_class: Optional[str]
+    package_codes: Tuple[str, ...]   # offending codes, '' for a blank product code
+    employee: Optional[str]
+    notes: str
+
+
+def split_rows(line):
+    """Splits one results.txt line (the str() of a list of strings) into its row strings."""
+    rows = []
+    for single, double in ROW_PATTERN.findall(line):
+        text = single or double
+        if '\\' in text:
+            text = ESCAPE_PATTERN.sub(lambda m: ESCAPES.get(m.group(1), m.group(0)), text)
+        rows.append(text)
+    return rows
+
+
+def classify_failure(notes):
+    """Returns (failure_class, package_codes) for a row's notes, (None, ()) when it is not a failure."""
+    # Cheap substring checks first, most rows are not failures
+    if 'Packages' in notes:
+        match = UNRECOGNIZED_PACKAGES.search(notes)
+        if match:
+            return FAILURE_UNRECOGNIZED_PACKAGES, tuple(PACKAGE_CODE.findall(match.group(1)))
+    if 'product code' in notes:
+        match = UNPARSED_PRODUCT_CODE.search(notes)
+        if match:
+            return FAILURE_UNPARSED_PRODUCT_CODE, tuple(code.strip() for code in match.group(1).split(','))
+    if 'valid packages' in notes and NO_VALID_PACKAGES.search(notes):
+        return FAILURE_NO_VALID_PACKAGES, ()
+    return None, ()
+
+
+def parse_row(row, ticket_line=0, row_number=0):
+    """Turns one audit-log row string into an AuditEvent (None for the header row)."""
+    if row == HEADER_ROW:
+        return None
+
+    timestamp = None
+    rest = row
+    match = TIMESTAMP_PATTERN.match(row)
+    if match:
+        month, day, year, hour, minute = match.groups()
+        timestamp = datetime(int(year), int(month), int(day), int(hour), int(minute))
+        rest = row[match.end():]
+
+    event_type = None
+    match = EVENT_PATTERN.match(rest)
+    if match:
+        event_type = match.group(1)
+        rest = rest[match.end():]
+
+    brand = None
+    match = BRAND_PATTERN.search(rest)
+    if match:
+        brand = next(group for group in match.groups() if group)
+
+    employee = None
+    notes = rest
+    match = AUTOMATION_EMPLOYEE.search(rest)
+    if match:
+        employee = match.group(1)
+        notes = rest[:match.start()]
+    else:
+        for pattern in NAMED_EMPLOYEE_PATTERNS:
+            match = pattern.match(rest)
+            if match:
+                employee = match.group(1)
+                break
+        else:
+            if '\n' in rest:
+                # Multi-line notes (attribute edits) end with the employee on its own line
+                notes, _, employee = rest.rpartition('\n')
+            elif event_type == 'Ticket Opened':
+                employee, notes = rest, ''
+
+    failure_class, package_codes = classify_failure(notes)
+    if failure_class is None and event_type and event_type.endswith('Failure'):
+        failure_class = FAILURE_OTHER
+
+    return AuditEvent(ticket_line, row_number, timestamp, event_type, brand, failure_class, package_codes,
+                      employee.strip() if employee else None, notes.strip())
+
+
+def _may_be_failure(row):
+    return 'Failure' in row or 'product code' in row or 'Packages' in row or 'valid packages' in row
+
+
+def iter_events(lines, failures_only=False) -> Iterator[AuditEvent]:
+    """
+    Yields AuditEvents from an iterable of results.txt lines, one line at a time.
+
+    Args:
+        lines: An open file or any iterable of lines.
+        failures_only: Skip rows that are not failures.
+    """
+    for ticket_line, line in enumerate(lines, start=1):
+        events = []
+        ticket_brand = None
+        for row_number, row in enumerate(split_rows(line)):
+            if failures_only and not _may_be_failure(row):
+                # Only needed for its brand, skip the full parse
+                if ticket_brand is None:
+                    match = BRAND_PATTERN.search(row)
+                    if match:
+                        ticket_brand = next(group for group in match.groups() if group)
+                continue
+            event = parse_row(row, ticket_line, row_number)
+            events.append(event)
+            # Rows like 'Getting permissions From Ticket Failure' do not name the brand, the ticket's other rows do
+            if ticket_brand is None and event is not None and event.brand:
+                ticket_brand = event.brand
+        for event in events:
+            if event is None or (failures_only and event.failure_class is None):
+                continue
+            if event.brand is None and ticket_brand is not None:
+                event = event._replace(brand=ticket_brand)
+            yield event
+
+
+def _as_record(event):
+    return (event.ticket_line, event.row_number,
+            event.timestamp.isoformat(sep=' ') if event.timestamp else None,
+            event.event_type, event.brand, event.failure_class,
+            '|'.join(event.package_codes), event.employee, event.notes)
+
+
+def write_csv(events, path):
+    """Streams events to a CSV file. Package codes are joined with '|'. Returns the number of rows."""
+    count = 0
+    with open(path, 'w', newline='') as outfile:
+        writer = csv.writer(outfile)
+        writer.writerow(FIELDS)
+        for event in events:
+            writer.writerow(_as_record(event))
+            count += 1
+    return count
+
+
+def write_parquet(events, path, batch_size=50000):
+    """Streams events to a Parquet file in batches (requires 'pyarrow'). Returns the number of rows."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([
+        ('ticket_line', pa.int32()),
+        ('row_number', pa.int32()),
+        ('timestamp', pa.timestamp('s')),
+        ('event_type', pa.string()),
+        ('brand', pa.string()),
+        ('failure_class', pa.string()),
+        ('package_codes', pa.list_(pa.string())),
+        ('employee', pa.string()),
+        ('notes', pa.string()),
+    ])
+    count = 0
+    with pq.ParquetWriter(path, schema) as writer:
+        batch = []
+        for event in events:
+            batch.append(event)
+            if len(batch) >= batch_size:
+                writer.write_table(_to_table(batch, schema))
+                count += len(batch)
+                batch = []
+        if batch:
+            writer.write_table(_to_table(batch, schema))
+            count += len(batch)
+    return count
+
+
+def _to_table(batch, schema):
+    import pyarrow as pa
+    columns = list(zip(*batch))
+    columns[6] = [list(codes) for codes in columns[6]]
+    return pa.Table.from_arrays([pa.array(values, type=field.type) for values, field in zip(columns, schema)], schema=schema)
+
+
+def parse_file(input_path, output_path, failures_only=False):
+    """Parses a results.txt file into CSV or Parquet, picked by the output file extension."""
+    with open(input_path, encoding='utf-8') as infile:
+        events = iter_events(infile, failures_only)
+        if output_path.endswith('.parquet'):
+            count = write_parquet(events, output_path)
+        else:
+            count = write_csv(events, output_path)
+    print(f"Wrote {count} events to {output_path}")
+    return count
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Parse scraped audit logs into a structured event dataset.')
+    parser.add_argument('input', nargs='?', default='results.txt', help='results.txt written by scrape_errors_from_ticket')
+    parser.add_argument('output', nargs='?', default='audit_events.csv', help='.csv or .parquet output file')
+    parser.add_argument('--failures-only', action='store_true', help='only keep failure rows')
+    args = parser.parse_args(argv)
+    parse_file(args.input, args.output, args.failures_only)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,117 @@
+import argparse
+import json
+import os
+import random
+import re
+import resource
+import sys
+import tempfile
+import time
+
+from audit_events import iter_events, write_csv, write_parquet
+
+# Benchmarks audit_events.py on a synthetic results.txt. Row templates mirror the real audit logs.
+ROW_TEMPLATES = [
+    '{ts} RSBrand changed RSBrand updated to {brand} {name}',
+    '{ts} Brand tagged Brand: {brand} {name}',
+    '{ts} Employee changed Employee updated to {user} {name}',
+    '{ts} Getting permissions From Ticket Failure: Some product code could not be parsed: {codes}. Manual intervention required. eaxautomatedbrandcreation',
+    '{ts} Ticket Processing Failure: Cannot update license for brand {brand}: Failed to change Brand Permissions: Some Packages are not recognized or does not exist: [{packages}] eaxautomatedbrandcreation',
+    '{ts} Getting permissions From Ticket Failure: No valid packages found in ticket eaxautomatedbrandcreation',
+    '{ts} Getting Brand Info Success: Fetched brand {brand} info from ticket eaxautomatedbrandcreation',
+    '{ts} Getting Package and restrictions Success: Fetched package and restrictions from ticket eaxautomatedbrandcreation',
+    '{ts} Changing Ticket Status Changing ticket status to running eaxautomatedbrandcreation',
+]
+NAMES = ['Ishan Tambe', 'Mrunal Dubbalwar', 'Julia Carmona Garcia', 'Josh Jones']
+ROWS_PER_TICKET = 9
+
+
+def generate_log(path, rows, seed=0):
+    """Writes a synthetic results.txt with about `rows` audit rows (one header row per ticket not counted)."""
+    rng = random.Random(seed)
+    written = 0
+    with open(path, 'w') as outfile:
+        while written < rows:
+            ticket_rows = ['Date Event Notes Employee']
+            brand = f'brand{rng.randrange(5000)}'
+            for _ in range(min(ROWS_PER_TICKET, rows - written)):
+                template = rng.choice(ROW_TEMPLATES)
+                ticket_rows.append(template.format(
+                    ts=f'{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}-2025 {rng.randint(0, 23)}:{rng.randint(0, 59):02d}',
+                    brand=brand,
+                    name=rng.choice(NAMES),
+                    user='USER' + str(rng.randrange(100)),
+                    codes=', '.join(rng.choice(['', 'CX-1', 'EX-20']) for _ in range(rng.randint(1, 3))),
+                    packages=','.join(f'"{rng.randint(1000, 1100)}"' for _ in range(rng.randint(1, 3)))))
+                written += 1
+            outfile.write(str(ticket_rows) + '\n')
+    return written
+
+
+def legacy_scan(path):
+    """What extract_regex.py does today: read the whole file, then findall over it."""
+    with open(path) as f:
+        t = f.read().strip()
+    return len(re.findall(r"\[([\d\",]*)\]", t)) + len(re.findall(r"Some product code could not be parsed: ((?=[^.])[^.]+)\.", t))
+
+
+def peak_rss_mb():
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def run(rows=1_000_000, keep=False):
+    """Generates the log, times each stage and returns the results as a dict."""
+    tmp_dir = tempfile.mkdtemp(prefix='audit_bench_')
+    log_path = os.path.join(tmp_dir, 'results.txt')
+    results = {'rows': rows}
+
+    start = time.perf_counter()
+    generate_log(log_path, rows)
+    results['generate_s'] = time.perf_counter() - start
+    results['log_mb'] = os.path.getsize(log_path) / 1e6
+
+    start = time.perf_counter()
+    with open(log_path) as infile:
+        events = sum(1 for _ in iter_events(infile))
+    elapsed = time.perf_counter() - start
+    results.update(parse_s=elapsed, events=events, rows_per_s=events / elapsed)
+
+    start = time.perf_counter()
+    with open(log_path) as infile:
+        write_csv(iter_events(infile), os.path.join(tmp_dir, 'events.csv'))
+    results['parse_to_csv_s'] = time.perf_counter() - start
+    # Measured before pyarrow is imported so it reflects the parser alone
+    results['peak_rss_mb_streaming'] = peak_rss_mb()
+
+    try:
+        start = time.perf_counter()
+        with open(log_path) as infile:
+            write_parquet(iter_events(infile), os.path.join(tmp_dir, 'events.parquet'))
+        results['parse_to_parquet_s'] = time.perf_counter() - start
+    except ImportError:
+        results['parse_to_parquet_s'] = None
+
+    start = time.perf_counter()
+    legacy_scan(log_path)
+    results['legacy_findall_s'] = time.perf_counter() - start
+    results['peak_rss_mb_after_legacy'] = peak_rss_mb()
+
+    if not keep:
+        for name in os.listdir(tmp_dir):
+            os.remove(os.path.join(tmp_dir, name))
+        os.rmdir(tmp_dir)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the audit-log parser on a synthetic log.')
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--keep', action='store_true', help='keep the generated files')
+    args = parser.parse_args(argv)
+    print(json.dumps(run(args.rows, args.keep), indent=2))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
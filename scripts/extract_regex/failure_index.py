@@ -0,0 +1,357 @@
+import argparse
+import hashlib
+import os
+import sqlite3
+import sys
+import time
+from contextlib import contextmanager
+
+from audit_events import iter_events
+
+# A local SQLite index over parsed audit logs, so questions like "which package codes failed most
+# this month, and for which brands" are a GROUP BY over a small aggregate table instead of a
+# regex rescan of results.txt.
+#
+#   python failure_index.py ingest-audit results.txt
+#   python failure_index.py ingest-dc ../odo/results.txt
+#   python failure_index.py top-codes --since 2025-07-01
+#   python failure_index.py by-dc --since 2025-07-01
+
+DEFAULT_DB = 'failure_index.sqlite'
+# Bumped when failure_counts or ingested_files change meaning, see _migrate()
+SCHEMA_VERSION = 1
+# Bytes hashed at the start and at the end of the already ingested part of a file
+FINGERPRINT_BLOCK = 4096
+
+SCHEMA = """
+create table if not exists failure_events (
+    source text not null,
+    ticket_line integer not null,
+    row_number integer not null,
+    day text not null,
+    event_type text,
+    brand text,
+    failure_class text not null,
+    employee text,
+    notes text,
+    primary key (source, ticket_line, row_number)
+);
+create index if not exists failure_events_by_day on failure_events (day);
+create table if not exists failure_codes (
+    source text not null,
+    ticket_line integer not null,
+    row_number integer not null,
+    code_index integer not null,
+    package_code text not null,
+    primary key (source, ticket_line, row_number, code_index)
+);
+
+-- Pre-aggregated counts, one row per (day, class, code, brand, employee). `failures` counts failed
+-- tickets, not audit rows: a failed ticket logs the same failure more than once.
+create table if not exists failure_counts (
+    day text not null,
+    failure_class text not null,
+    package_code text not null,
+    brand text not null,
+    employee text not null,
+    failures integer not null,
+    primary key (day, failure_class, package_code, brand, employee)
+);
+create index if not exists failure_counts_by_code on failure_counts (package_code, day);
+create index if not exists failure_counts_by_brand on failure_counts (brand, day);
+
+create table if not exists brand_dc (
+    brand text primary key,
+    datacenter text not null
+);
+create table if not exists ingested_files (
+    source text primary key,
+    path text not null,
+    byte_offset integer not null,
+    lines integer not null,
+    updated_at real not null,
+    fingerprint text
+);
+"""
+
+
+@contextmanager
+def connect(db_path=DEFAULT_DB):
+    db = sqlite3.connect(db_path, timeout=30)
+    try:
+        db.execute('pragma journal_mode=wal')
+        db.executescript(SCHEMA)
+        with db:
+            _migrate(db)
+            yield db
+    finally:
+        db.close()
+
+
+def _migrate(db):
+    """Brings an index written by an older version of this script up to SCHEMA_VERSION."""
+    version = db.execute('pragma user_version').fetchone()[0]
+    if version >= SCHEMA_VERSION:
+        return
+    columns = {row[1] for row in db.execute('pragma table_info(ingested_files)')}
+    if 'fingerprint' not in columns:
+        db.execute('alter table ingested_files add column fingerprint text')
+    # Counts used to be per audit row, rebuild them per ticket
+    refresh_counts(db, [row[0] for row in db.execute('select distinct day from failure_events')])
+    db.execute(f'pragma user_version = {SCHEMA_VERSION}')
+
+
+def _fingerprint(path, offset):
+    """
+    Hash of the first and the last block of the part of the file ingested so far (up to `offset`).
+
+    Appending leaves it unchanged, rewriting the file (even to the same size or larger) does not.
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as infile:
+        digest.update(infile.read(min(offset, FINGERPRINT_BLOCK)))
+        infile.seek(max(0, offset - FINGERPRINT_BLOCK))
+        digest.update(infile.read(min(offset, FINGERPRINT_BLOCK)))
+    return digest.hexdigest()[:32]
+
+
+def _forget_source(db, source):
+    """Drops everything indexed from one file and returns the days it had events on."""
+    days = {row[0] for row in db.execute('select distinct day from failure_events where source = ?', (source,))}
+    db.execute('delete from failure_events where source = ?', (source,))
+    db.execute('delete from failure_codes where source = ?', (source,))
+    return days
+
+
+def _read_new_lines(path, offset):
+    """Yields lines appended since `offset` and finally the new offset (complete lines only)."""
+    with open(path, 'rb') as infile:
+        infile.seek(offset)
+        for raw in infile:
+            if not raw.endswith(b'\n'):
+                break  # partial line still being written, pick it up next time
+            offset += len(raw)
+            yield raw.decode('utf-8')
+    yield offset
+
+
+def ingest_audit_log(db, path, source=None):
+    """
+    Adds the failure events appended to a results.txt since the last ingest and refreshes the
+    aggregates for the days they touched. Re-ingesting the same lines is a no-op.
+
+    A file that was rewritten rather than appended to (it shrank, or the part already ingested no
+    longer matches its fingerprint) is re-indexed from the start, dropping its old rows.
+
+    Returns:
+        Number of new failure events.
+    """
+    source = source or os.path.abspath(path)
+    row = db.execute('select byte_offset, lines, fingerprint from ingested_files where source = ?', (source,)).fetchone()
+    offset, lines_done, fingerprint = row if row else (0, 0, None)
+    stale_days = set()
+    if offset > os.path.getsize(path) or (offset and fingerprint != _fingerprint(path, offset)):
+        print(f'{path} was rewritten since it was last ingested, re-reading it from the start')
+        stale_days = _forget_source(db, source)
+        offset, lines_done = 0, 0
+
+    reader = _read_new_lines(path, offset)
+    new_lines = []
+    for item in reader:
+        if isinstance(item, int):
+            offset = item
+            break
+        new_lines.append(item)
+
+    changes_before = db.total_changes
+    touched_days = set()
+    event_rows, code_rows = [], []
+
+    def flush():
+        # insert or ignore keeps re-reads of already indexed lines idempotent
+        db.executemany('insert or ignore into failure_events values (?, ?, ?, ?, ?, ?, ?, ?, ?)', event_rows)
+        events_inserted = db.total_changes
+        db.executemany('insert or ignore into failure_codes values (?, ?, ?, ?, ?)', code_rows)
+        event_rows.clear()
+        code_rows.clear()
+        return events_inserted
+
+    new_events = 0
+    for event in iter_events(new_lines, failures_only=True):
+        ticket_line = event.ticket_line + lines_done
+        day = event.timestamp.date().isoformat() if event.timestamp else ''
+        touched_days.add(day)
+        event_rows.append((source, ticket_line, event.row_number, day, event.event_type, event.brand,
+                           event.failure_class, event.employee, event.notes))
+        code_rows.extend((source, ticket_line, event.row_number, i, code)
+                         for i, code in enumerate(event.package_codes or ('',)))
+        if len(event_rows) >= 10000:
+            new_events += flush() - changes_before
+            changes_before = db.total_changes
+    new_events += flush() - changes_before
+
+    db.execute('insert or replace into ingested_files values (?, ?, ?, ?, ?, ?)',
+               (source, path, offset, lines_done + len(new_lines), time.time(), _fingerprint(path, offset)))
+    refresh_counts(db, touched_days | stale_days)
+    print(f'Ingested {new_events} new failure events from {len(new_lines)} tickets in {path}')
+    return new_events
+
+
+def refresh_counts(db, days):
+    """
+    Rebuilds the failure_counts rows for the given days from the event tables.
+
+    Counts distinct tickets: one failed ticket logs e.g. both "Getting permissions From Ticket
+    Failure" and "Ticket Processing Failure" for the same code.
+    """
+    for day in days:
+        db.execute('delete from failure_counts where day = ?', (day,))
+        db.execute("""
+            insert into failure_counts (day, failure_class, package_code, brand, employee, failures)
+            select e.day, e.failure_class, c.package_code, coalesce(e.brand, ''), coalesce(e.employee, ''),
+                   count(distinct e.source || char(31) || e.ticket_line)
+            from failure_events e
+            join failure_codes c on c.source = e.source and c.ticket_line = e.ticket_line and c.row_number = e.row_number
+            where e.day = ?
+            group by 1, 2, 3, 4, 5
+            """, (day,))
+
+
+def ingest_brand_dc(db, path):
+    """
+    Loads brand -> data center results, either `brand|DC` (get-brand-dc.py) or
+    `ticket|brand|DC` (scrape-bu-bc-ticket.py) lines. Later files win.
+    """
+    rows = []
+    with open(path) as infile:
+        for line in infile:
+            parts = [part.strip() for part in line.strip().split('|')]
+            if len(parts) >= 2 and parts[-2] and parts[-1] and parts[-1] != 'None':
+                rows.append((parts[-2], parts[-1]))
+    db.executemany('insert or replace into brand_dc values (?, ?)', rows)
+    print(f'Loaded {len(rows)} brand data centers from {path}')
+    return len(rows)
+
+
+def _window(since, until):
+    clauses, params = [], []
+    if since:
+        clauses.append('day >= ?')
+        params.append(since)
+    if until:
+        clauses.append('day <= ?')
+        params.append(until)
+    return clauses, params
+
+
+def _where(clauses):
+    return ('where ' + ' and '.join(clauses)) if clauses else ''
+
+
+def top_codes(db, since=None, until=None, failure_class=None, limit=20):
+    """Package codes that fail most, with how many brands and which brands are hit hardest."""
+    clauses, params = _window(since, until)
+    if failure_class:
+        clauses.append('failure_class = ?')
+        params.append(failure_class)
+    query = f"""
+        with per_brand as (
+            select package_code, brand, sum(failures) as failures
+            from failure_counts {_where(clauses)}
+            group by 1, 2
+        ), ranked as (
+            select *, row_number() over (partition by package_code order by failures desc) as rank
+            from per_brand
+        )
+        select case when package_code = '' then '(blank)' else package_code end as package_code,
+               sum(failures) as failures, count(distinct brand) as brands,
+               group_concat(case when rank <= 5 then brand || ' (' || failures || ')' end, ', ') as top_brands
+        from ranked
+        group by 1
+        order by failures desc
+        limit ?"""
+    return ['package_code', 'failures', 'brands', 'top_brands'], db.execute(query, params + [limit]).fetchall()
+
+
+def failures_by(db, dimension, since=None, until=None, limit=100):
+    """Failure counts grouped by 'day', 'employee', 'brand', 'class' or 'dc'."""
+    clauses, params = _window(since, until)
+    if dimension == 'dc':
+        query = f"""
+            select coalesce(d.datacenter, 'unknown') as datacenter, sum(f.failures) as failures, count(distinct f.brand) as brands
+            from failure_counts f left join brand_dc d on d.brand = f.brand
+            {_where(['f.' + c for c in clauses])}
+            group by 1 order by failures desc limit ?"""
+        return ['datacenter', 'failures', 'brands'], db.execute(query, params + [limit]).fetchall()
+
+    column = {'day': 'day', 'employee': 'employee', 'brand': 'brand', 'class': 'failure_class'}[dimension]
+    order = 'day desc' if dimension == 'day' else 'failures desc'
+    query = f"""
+        select {column}, sum(failures) as failures, count(distinct package_code) as package_codes
+        from failure_counts {_where(clauses)}
+        group by 1 order by {order} limit ?"""
+    return [dimension, 'failures', 'package_codes'], db.execute(query, params + [limit]).fetchall()
+
+
+def brands_for_code(db, package_code, since=None, until=None, limit=50):
+    """Brands (and their data centers) hitting a given package code."""
+    clauses, params = _window(since, until)
+    clauses.append('package_code = ?')
+    params.append(package_code)
+    query = f"""
+        select f.brand, coalesce(d.datacenter, '') as datacenter, sum(f.failures) as failures, max(f.day) as last_seen
+        from failure_counts f left join brand_dc d on d.brand = f.brand
+        {_where(['f.' + c for c in clauses])}
+        group by 1, 2 order by failures desc limit ?"""
+    return ['brand', 'datacenter', 'failures', 'last_seen'], db.execute(query, params + [limit]).fetchall()
+
+
+def print_table(columns, rows):
+    rows = [['' if value is None else str(value) for value in row] for row in rows]
+    widths = [max([len(column)] + [len(row[i]) for row in rows]) for i, column in enumerate(columns)]
+    print('  '.join(column.ljust(width) for column, width in zip(columns, widths)))
+    for row in rows:
+        print('  '.join(value.ljust(width) for value, width in zip(row, widths)))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Query an index of automation failures from scraped audit logs.')
+    parser.add_argument('--db', default=DEFAULT_DB, help='index file (default: %(default)s)')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    ingest = commands.add_parser('ingest-audit', help='add new lines of a results.txt of audit logs')
+    ingest.add_argument('paths', nargs='+')
+    ingest_dc = commands.add_parser('ingest-dc', help='load brand|DC or ticket|brand|DC results')
+    ingest_dc.add_argument('paths', nargs='+')
+
+    def add_window(command):
+        command.add_argument('--since', help='first day, YYYY-MM-DD')
+        command.add_argument('--until', help='last day, YYYY-MM-DD')
+        command.add_argument('--limit', type=int, default=20)
+        return command
+
+    codes = add_window(commands.add_parser('top-codes', help='most failing package codes and their brands'))
+    codes.add_argument('--class', dest='failure_class', help='e.g. unrecognized_package_ids')
+    for dimension in ('day', 'dc', 'employee', 'brand', 'class'):
+        add_window(commands.add_parser(f'by-{dimension}', help=f'failures by {dimension}'))
+    brands = add_window(commands.add_parser('brands', help='brands hitting one package code'))
+    brands.add_argument('code')
+
+    args = parser.parse_args(argv)
+    with connect(args.db) as db:
+        if args.command == 'ingest-audit':
+            for path in args.paths:
+                ingest_audit_log(db, path)
+        elif args.command == 'ingest-dc':
+            for path in args.paths:
+                ingest_brand_dc(db, path)
+        elif args.command == 'top-codes':
+            print_table(*top_codes(db, args.since, args.until, args.failure_class, args.limit))
+        elif args.command == 'brands':
+            print_table(*brands_for_code(db, args.code, args.since, args.until, args.limit))
+        else:
+            print_table(*failures_by(db, args.command[len('by-'):], args.since, args.until, args.limit))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
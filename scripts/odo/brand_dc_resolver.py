@@ -0,0 +1,192 @@
+import os
+import sqlite3
+import threading
+import time
+
+BRAND_PROFILE_URL = 'https://odo.corp.qualtrics.com/?a=ResearchSuite&b=RSBrandProfile&bid='
+# A brand's data center practically never changes, re-check it every few months
+DEFAULT_TTL_DAYS = 90
+
+
+class OdoApiBackend:
+    """Looks brands up through the ODO public API (see odo_api.py)."""
+
+    def __init__(self, client):
+        self.client = client
+
+    def __call__(self, brand_ids, on_result):
+        for brand_id, result in self.client.get_brand_datacenters(brand_ids).items():
+            on_result(brand_id, result, None)
+
+
+class SeleniumBackend:
+    """
+    Scrapes the ODO brand profile page with a pool of headless browsers.
+
+    The SSO login in a visible browser only happens the first time there is something to look up,
+    so a run served entirely from the cache never opens a browser (or imports Selenium).
+    """
+
+    def __init__(self, workers=4, cookies=None, driver_factory=None, login_driver_factory=None):
+        """
+        Args:
+            workers: Browsers scraping at once.
+            cookies: An already captured ODO session, skips the interactive login.
+            driver_factory: Builds the headless worker browsers (defaults to headless Chrome).
+            login_driver_factory: Builds the visible browser used to log in (defaults to a visible Chrome).
+        """
+        self.workers = workers
+        self.cookies = cookies
+        self.driver_factory = driver_factory
+        self.login_driver_factory = login_driver_factory
+
+    def _login(self):
+        from browser_pool import capture_session_cookies, new_chrome_driver
+        from waits import wait_for_login
+
+        driver = (self.login_driver_factory or (lambda: new_chrome_driver(headless=False)))()
+        try:
+            driver.get(BRAND_PROFILE_URL)
+            # Returns as soon as the manual SSO login lands back on ODO
+            wait_for_login(driver)
+            return capture_session_cookies(driver)
+        finally:
+            driver.quit()
+
+    def __call__(self, brand_ids, on_result):
+        from browser_pool import new_chrome_driver, run_parallel_scrape
+        from scrape_from_odo_brand_page import scrape_dc_from_odo_brand_page
+
+        if self.cookies is None:
+            self.cookies = self._login()
+        run_parallel_scrape(
+            brand_ids,
+            url_for=lambda brand_id: f'{BRAND_PROFILE_URL}{brand_id}',
+            scrape=scrape_dc_from_odo_brand_page,
+            cookies=self.cookies,
+            workers=self.workers,
+            driver_factory=self.driver_factory or new_chrome_driver,
+            on_result=on_result)
+
+
+class BrandDcResolver:
+    """
+    Resolves brand IDs to data centers, remembering every answer in a local SQLite cache.
+
+    resolve_many() de-duplicates its input, serves brands looked up within the TTL from the cache and
+    sends only the rest to the backend. Each result is cached the moment the backend reports it, so
+    an interrupted run resumes where it stopped.
+    """
+
+    def __init__(self, backend, path='brand_dc.cache.sqlite', ttl_days=DEFAULT_TTL_DAYS):
+        """
+        Args:
+            backend: Callable (brand_ids, on_result) that looks brands up and calls
+                on_result(brand_id, {"brandid": ..., "datacenter": ...} or None, error) for each,
+                e.g. OdoApiBackend or SeleniumBackend.
+            path: SQLite cache file, created if missing.
+            ttl_days: Age after which a cached data center is looked up again (None never expires).
+        """
+        self.backend = backend
+        self.ttl = ttl_days * 86400 if ttl_days is not None else None
+        self.failures = {}
+        self._lock = threading.Lock()
+        # One connection shared by the backend's worker threads, serialized by the lock
+        self._db = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._db.execute('pragma journal_mode=wal')
+        self._db.execute("""
+            create table if not exists brand_dc (
+                brand_id text primary key,
+                datacenter text not null,
+                resolved_at real not null
+            )""")
+        self._db.commit()
+
+    def cached(self, brand_ids, refresh=False):
+        """Returns {brand_id: datacenter} for the given brands that are cached and not expired."""
+        if refresh:
+            return {}
+        oldest = time.time() - self.ttl if self.ttl is not None else 0
+        found = {}
+        brand_ids = list(brand_ids)
+        with self._lock:
+            # Chunked to stay under SQLite's bound-parameter limit
+            for start in range(0, len(brand_ids), 500):
+                chunk = brand_ids[start:start + 500]
+                found.update(self._db.execute(
+                    f"select brand_id, datacenter from brand_dc where resolved_at >= ? and brand_id in ({', '.join('?' * len(chunk))})",
+                    [oldest] + chunk).fetchall())
+        return found
+
+    def _record(self, brand_id, result, error=None):
+        datacenter = result.get('datacenter') if result else None
+        if error is not None or not datacenter:
+            with self._lock:
+                self.failures[brand_id] = str(error) if error is not None else 'no data center found'
+            return
+        with self._lock:
+            self._db.execute("insert or replace into brand_dc values (?, ?, ?)", (brand_id, datacenter, time.time()))
+            self._db.commit()
+            self.failures.pop(brand_id, None)
+
+    def resolve_many(self, brand_ids, refresh=False):
+        """
+        Resolves many brands, looking up only the ones not already cached.
+
+        Args:
+            brand_ids: Brand IDs, duplicates allowed.
+            refresh: Ignore the cache and look every brand up again.
+
+        Returns:
+            dict: {brand_id: datacenter or None}, in first-seen input order.
+        """
+        unique_ids = list(dict.fromkeys(brand_id.strip() for brand_id in brand_ids if brand_id.strip()))
+        results = self.cached(unique_ids, refresh)
+        misses = [brand_id for brand_id in unique_ids if brand_id not in results]
+        print(f'{len(unique_ids)} unique brands: {len(results)} cached, {len(misses)} to look up')
+
+        if misses:
+            started = time.perf_counter()
+            self.backend(misses, self._record)
+            results.update(self.cached(misses))
+            failed = sum(1 for brand_id in misses if brand_id in self.failures)
+            print(f'Looked up {len(misses)} brands in {time.perf_counter() - started:.1f}s, {failed} failed')
+        return {brand_id: results.get(brand_id) for brand_id in unique_ids}
+
+    def resolve(self, brand_id, refresh=False):
+        return self.resolve_many([brand_id], refresh)[brand_id]
+
+    def invalidate(self, brand_ids=None):
+        """Drops cached data centers (all of them when brand_ids is None) so they are looked up again."""
+        with self._lock:
+            if brand_ids is None:
+                removed = self._db.execute("delete from brand_dc").rowcount
+            else:
+                removed = self._db.executemany("delete from brand_dc where brand_id = ?", [(b,) for b in brand_ids]).rowcount
+            self._db.commit()
+        return removed
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+def write_brand_dc_results(results, path='results.txt'):
+    """Writes `brand|DC` lines for every resolved brand, in order. Returns the number of lines written."""
+    tmp_path = f'{path}.tmp'
+    written = 0
+    with open(tmp_path, 'w') as outfile:
+        for brand_id, datacenter in results.items():
+            if datacenter:
+                outfile.write(str(brand_id) + "|" + str(datacenter) + "\n")
+                written += 1
+    os.replace(tmp_path, path)
+    return written
+
+
+def write_failures(failures, path='failed_brands.txt'):
+    """Writes `brand|error` for every brand that could not be resolved."""
+    with open(path, 'w') as outfile:
+        for brand_id, error in failures.items():
+            outfile.write(f'{brand_id}|{error}\n')
+    return len(failures)
@@ -0,0 +1,117 @@
+import queue
+import threading
+import time
+from selenium import webdriver
+from telemetry import TELEMETRY, InstrumentedDriver
+
+ODO_BASE_URL = 'https://odo.corp.qualtrics.com'
+
+
+def new_chrome_driver(headless=True):
+    """
+    Starts a Chrome instance for scraping. Headless by default, the login window is the only
+    one a person needs to see.
+    """
+    options = webdriver.ChromeOptions()
+    if headless:
+        options.add_argument('--headless=new')
+    options.add_argument('--window-size=1400,1000')
+    options.add_argument('--disable-gpu')
+    return webdriver.Chrome(options=options)
+
+
+def capture_session_cookies(driver):
+    """
+    Returns the cookies of an authenticated driver so other browsers can reuse the session.
+    """
+    return driver.get_cookies()
+
+
+def inject_session_cookies(driver, cookies, base_url=ODO_BASE_URL):
+    """
+    Loads the cookies captured from the logged-in driver into another driver.
+
+    Selenium only accepts cookies for the domain currently loaded, so we open base_url first.
+    """
+    driver.get(base_url)
+    for cookie in cookies:
+        cookie = dict(cookie)
+        # Chrome rejects float expiries and unknown sameSite values coming back from get_cookies()
+        if 'expiry' in cookie:
+            cookie['expiry'] = int(cookie['expiry'])
+        if cookie.get('sameSite') not in (None, 'Strict', 'Lax', 'None'):
+            cookie.pop('sameSite')
+        try:
+            driver.add_cookie(cookie)
+        except Exception as e:
+            print(f"Could not set cookie {cookie.get('name')}: {e}")
+
+
+def run_parallel_scrape(item_ids, url_for, scrape, cookies, workers=4, base_url=ODO_BASE_URL, driver_factory=new_chrome_driver, on_result=None):
+    """
+    Scrapes a list of IDs with a pool of headless browsers sharing one authenticated session.
+
+    Each worker starts its own browser, injects the captured session cookies and then pulls IDs
+    off a shared queue, so faster workers simply take more of them.
+
+    Args:
+        item_ids: Ticket or brand IDs to scrape.
+        url_for: Function mapping an ID to the page URL to load.
+        scrape: Function (driver, item_id) -> result, called once the page is loaded.
+        cookies: Session cookies from capture_session_cookies().
+        workers: Number of browsers to run at once.
+        base_url: URL loaded before injecting the cookies (must be on the cookies' domain).
+        driver_factory: Zero-argument function returning a new WebDriver (point it at local fixtures for tests).
+        on_result: Optional function (item_id, result, error) called from the worker as soon as each ID
+            finishes, e.g. ScrapeJournal.record to checkpoint the run.
+
+    Returns:
+        A list of scrape results in the same order as item_ids (None where scraping failed).
+    """
+    item_ids = list(item_ids)
+    results = [None] * len(item_ids)
+    work = queue.Queue()
+    for index, item_id in enumerate(item_ids):
+        work.put((index, item_id))
+
+    def worker(worker_number):
+        try:
+            # Times page loads and lookups, and retries page loads that time out
+            driver = InstrumentedDriver(driver_factory())
+        except Exception as e:
+            print(f'Worker {worker_number} could not start a browser: {e}')
+            return
+        try:
+            inject_session_cookies(driver, cookies, base_url)
+            while True:
+                try:
+                    index, item_id = work.get_nowait()
+                except queue.Empty:
+                    return
+                error = None
+                driver.item_id = item_id
+                start = time.perf_counter()
+                try:
+                    driver.get(url_for(item_id))
+                    results[index] = scrape(driver, item_id)
+                except Exception as e:
+                    error = e
+                    print(f'Error thrown on {item_id} (worker {worker_number}): {e}')
+                TELEMETRY.record_item(item_id, time.perf_counter() - start,
+                                      'error' if error is not None else ('ok' if results[index] else 'empty'),
+                                      worker=worker_number)
+                if on_result is not None:
+                    on_result(item_id, results[index], error)
+        finally:
+            driver.quit()
+
+    workers = max(1, min(workers, len(item_ids)))
+    threads = [threading.Thread(target=worker, args=(n,), daemon=True) for n in range(workers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    if not work.empty():
+        print(f'{work.qsize()} IDs were not scraped because every browser worker failed to start.')
+    return results
@@ -1,38 +1,40 @@
-from selenium import webdriver
-from selenium.webdriver.common.keys import Keys
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.wait import WebDriverWait 
-from selenium.webdriver.support import expected_conditions as EC
-import time
-# from staging.q4_2024_staging_arrays import array1, array2, array3, array4, array5, array6
-from staging.feb_march_2025 import array1, array2, array3, array4, array5
-from scripts.scrape_from_ticket import scrape_products_from_ticket, scrape_errors_from_ticket, scrape_brand_and_datacenter_from_ticket
-from tiering.get_brand_tiering import scrape_odo_brand_info
-from scripts.scrape_from_odo_brand_page import scrape_dc_from_odo_brand_page
-
-driver = webdriver.Chrome()
-driver.get(f'https://odo.corp.qualtrics.com/?a=ResearchSuite&b=RSBrandProfile&bid=')
-
-
-time.sleep(60)
-
-# Scrape Brand ID and DC
-with open("input.txt", "r") as infile, open("results.txt", "w") as outfile:
-    for line in infile:
-        brand_id = line.strip()
-        if brand_id:
-            driver.get(f'https://odo.corp.qualtrics.com/?a=ResearchSuite&b=RSBrandProfile&bid={brand_id}')
-            return_obj = scrape_dc_from_odo_brand_page(driver, brand_id)
-            if return_obj:
-                row = {
-                    "brandid": return_obj["brandid"],
-                    "datacenter": return_obj["datacenter"]
-                }
-                outfile.write(str(brand_id) + "|" + str(row["datacenter"]) + "\n")
-                print(f'Successfully scraped ticket {brand_id}')
-
-
-
-
-driver.close()
-
+import os
+import sys
+from brand_dc_resolver import BrandDcResolver, OdoApiBackend, SeleniumBackend, write_brand_dc_results, write_failures
+
+WORKERS = 4
+
+
+def main(input_path="input.txt", output_path="results.txt", refresh=None, use_api=None, workers=WORKERS, cache_path="brand_dc.cache.sqlite"):
+    # With an ODO API token, look brands up over HTTP instead of driving Chrome
+    if use_api is None:
+        use_api = bool(os.getenv('ODO_API_TOKEN'))
+    # Set REFRESH_BRAND_DC=1 to ignore the cache and look every brand up again
+    if refresh is None:
+        refresh = os.getenv('REFRESH_BRAND_DC') == '1'
+
+    with open(input_path, "r") as infile:
+        brand_ids = [line.strip() for line in infile if line.strip()]
+
+    # Data centers found on earlier runs are kept in brand_dc.cache.sqlite, only new brands are looked up
+    if use_api:
+        from odo_api import OdoApiClient
+        backend = OdoApiBackend(OdoApiClient())
+    else:
+        backend = SeleniumBackend(workers=workers)
+    resolver = BrandDcResolver(backend, cache_path)
+    results = resolver.resolve_many(brand_ids, refresh=refresh)
+
+    written = write_brand_dc_results(results, output_path)
+    print(f'Wrote {written} brands to {output_path}')
+    failed = write_failures(resolver.failures, "failed_brands.txt")
+    print(f'{failed} brands failed, see failed_brands.txt')
+    resolver.close()
+
+    if not use_api and 'telemetry' in sys.modules:
+        # Per-stage p50/p95/p99 and throughput of the browser scrape, the JSON events are in scrape_telemetry.jsonl
+        sys.modules['telemetry'].TELEMETRY.print_summary()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,208 @@
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+import requests
+from requests.adapters import HTTPAdapter
+from odo_api import RETRY_STATUSES
+from ticket_page_parser import REQUIRED_FIELDS, IncompleteTicketError, missing_fields, parse_ticket_page
+from telemetry import TELEMETRY
+
+TICKET_URL = 'https://odo.corp.qualtrics.com/?TopNav=Tickets&a=Tickets&b=TicketViewer&tid='
+
+
+class SessionExpiredError(Exception):
+    """ODO answered with the SSO login page, the captured session is no longer valid."""
+
+
+def session_from_cookies(cookies, user_agent=None, pool_size=8):
+    """
+    Builds a pooled requests.Session carrying the cookies of a logged-in Selenium driver.
+
+    Args:
+        cookies: driver.get_cookies() / capture_session_cookies() output.
+        user_agent: The browser's user agent, some SSO sessions are tied to it.
+        pool_size: Connections kept open to ODO, match it to the number of workers.
+    """
+    session = requests.Session()
+    for cookie in cookies:
+        session.cookies.set(cookie['name'], cookie['value'], domain=cookie.get('domain', ''), path=cookie.get('path', '/'))
+    if user_agent:
+        session.headers['User-Agent'] = user_agent
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+class HttpTicketFetcher:
+    """
+    Fetches ticket pages over HTTP with the session of the logged-in browser, no browser rendering.
+
+    The brand/DC rows, License Information tables and audit log are in the server HTML, so each page
+    is parsed with the same lxml extraction scrape_ticket_record uses. Pages that come back without
+    the required fields (rendered client-side, partial page...) are handed to a fallback, normally
+    the Selenium pool, so only those pay for a browser.
+    """
+
+    def __init__(self, cookies, user_agent=None, workers=8, ticket_url=TICKET_URL, host=None,
+                 required_fields=REQUIRED_FIELDS, max_retries=3, timeout=30, session=None):
+        """
+        Args:
+            cookies: Session cookies from capture_session_cookies().
+            user_agent: User agent of the browser the cookies came from.
+            workers: Maximum number of requests in flight.
+            ticket_url: Ticket page URL the ticket ID is appended to, point it at local fixtures for tests.
+            host: Host a valid session stays on, a redirect anywhere else means the login expired
+                (defaults to ticket_url's host).
+            required_fields: Record fields a page must yield to count as scraped, a page missing any
+                of them goes to the browser fallback.
+            max_retries: Attempts per page on connection errors, 429 and 5xx.
+            timeout: Seconds before a single request times out.
+            session: A ready requests.Session to use instead of building one from the cookies.
+        """
+        self.workers = workers
+        self.ticket_url = ticket_url
+        self.host = host or urlparse(ticket_url).netloc
+        self.required_fields = required_fields
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.session = session or session_from_cookies(cookies, user_agent, pool_size=workers)
+        self._expired = threading.Event()
+
+    def _backoff(self, attempt, retry_after=None):
+        # Full jitter so parallel workers do not retry in lockstep
+        delay = random.uniform(0, min(30, 0.5 * 2 ** attempt))
+        if retry_after:
+            delay = max(delay, float(retry_after))
+        time.sleep(delay)
+
+    def fetch(self, ticket_id):
+        """
+        Downloads one ticket page.
+
+        Returns:
+            The page HTML.
+
+        Raises:
+            SessionExpiredError: ODO redirected to the login pages.
+            requests.RequestException: The page could not be fetched after max_retries attempts.
+        """
+        url = f'{self.ticket_url}{ticket_id}'
+        for attempt in range(1, self.max_retries + 1):
+            start = time.perf_counter()
+            try:
+                response = self.session.get(url, timeout=self.timeout)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                TELEMETRY.record_stage('http_fetch', time.perf_counter() - start, ticket_id, 'error', url=url)
+                if attempt == self.max_retries:
+                    raise
+                TELEMETRY.record_retry('http_fetch', ticket_id, attempt, type(e).__name__)
+                self._backoff(attempt)
+                continue
+
+            if response.status_code in RETRY_STATUSES and attempt < self.max_retries:
+                TELEMETRY.record_stage('http_fetch', time.perf_counter() - start, ticket_id, 'error', url=url)
+                TELEMETRY.record_retry('http_fetch', ticket_id, attempt, str(response.status_code))
+                self._backoff(attempt, response.headers.get('Retry-After'))
+                continue
+
+            outcome = 'ok' if response.ok else 'error'
+            TELEMETRY.record_stage('http_fetch', time.perf_counter() - start, ticket_id, outcome, url=url,
+                                   status=response.status_code, bytes=len(response.content))
+            if response.status_code in (401, 403) or urlparse(response.url).netloc != self.host:
+                raise SessionExpiredError(f'ODO session expired (landed on {urlparse(response.url).netloc}, '
+                                          f'HTTP {response.status_code}), log in again and re-run')
+            response.raise_for_status()
+            return response.text
+
+    def is_complete(self, record):
+        return not missing_fields(record, self.required_fields)
+
+    def scrape(self, ticket_id):
+        """
+        Fetches and parses one ticket.
+
+        Returns:
+            (record, complete): the parse_ticket_page record and whether it has the required fields.
+        """
+        html = self.fetch(ticket_id)
+        start = time.perf_counter()
+        record = parse_ticket_page(html, ticket_id)
+        TELEMETRY.record_stage('extract:http_ticket_record', time.perf_counter() - start, ticket_id,
+                               'ok' if record['brandid'] or record['products'] else 'empty')
+        return record, self.is_complete(record)
+
+    def scrape_many(self, ticket_ids, on_result=None, fallback=None):
+        """
+        Scrapes many tickets over HTTP, at most `workers` at a time.
+
+        Args:
+            ticket_ids: Ticket IDs to scrape.
+            on_result: Optional function (ticket_id, record, error) called as soon as each ticket
+                finishes, e.g. ScrapeJournal.record.
+            fallback: Optional function (ticket_ids, on_result) scraping the pages that were not
+                complete over HTTP, e.g. a run_parallel_scrape with scrape_ticket_record.
+
+        Returns:
+            dict: {"scraped": [...], "fallback": [...], "failed": {ticket_id: error}}
+        """
+        ticket_ids = list(dict.fromkeys(ticket_ids))
+        scraped, incomplete, failed = [], [], {}
+        lock = threading.Lock()
+
+        def work(ticket_id):
+            if self._expired.is_set():
+                # No point sending the rest to the login page, a re-run picks them up
+                with lock:
+                    failed[ticket_id] = 'skipped, ODO session expired'
+                return
+            start = time.perf_counter()
+            record, error = None, None
+            try:
+                record, complete = self.scrape(ticket_id)
+            except SessionExpiredError as e:
+                if not self._expired.is_set():
+                    print(f'❌ {e}')
+                self._expired.set()
+                error = e
+            except Exception as e:
+                print(f'Error thrown on {ticket_id} (http): {e}')
+                error = e
+            else:
+                if not complete:
+                    with lock:
+                        incomplete.append(ticket_id)
+                    return
+
+            TELEMETRY.record_item(ticket_id, time.perf_counter() - start,
+                                  'error' if error is not None else 'ok', mode='http')
+            with lock:
+                if error is not None:
+                    failed[ticket_id] = str(error)
+                else:
+                    scraped.append(ticket_id)
+            if on_result is not None:
+                on_result(ticket_id, record, error)
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=max(1, min(self.workers, len(ticket_ids)))) as executor:
+            list(executor.map(work, ticket_ids))
+        print(f'Fetched {len(scraped)} of {len(ticket_ids)} tickets over HTTP in {time.perf_counter() - started:.1f}s, '
+              f'{len(incomplete)} need a browser, {len(failed)} failed')
+
+        if incomplete and fallback is not None and not self._expired.is_set():
+            fallback(incomplete, on_result)
+        elif incomplete:
+            # Nothing will scrape these, report them instead of dropping them silently
+            reason = 'skipped, ODO session expired' if self._expired.is_set() else 'incomplete page, no browser fallback'
+            for ticket_id in incomplete:
+                failed[ticket_id] = reason
+                if on_result is not None:
+                    # Journaled as failed, so a re-run retries it
+                    on_result(ticket_id, None, IncompleteTicketError(f'{reason} for ticket {ticket_id}'))
+        return {'scraped': scraped, 'fallback': incomplete, 'failed': failed}
+
+    def close(self):
+        self.session.close()
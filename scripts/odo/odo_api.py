@@ -0,0 +1,169 @@
+import os
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from requests.adapters import HTTPAdapter
+
+ODO_API_BASE = 'https://odo-public-api.corp.qualtrics.com/odo-api'
+
+# Key of the data center in the odo-api/brand/{brand} JSON, the "Data Center" box of the brand profile page
+DATACENTER_FIELD = 'dataCenter'
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class MissingDatacenterFieldError(Exception):
+    """The brand JSON has no data center field, the API response changed or the field name is wrong."""
+
+
+class OdoApiClient:
+    """
+    Calls the ODO public API directly over HTTP, no browser needed.
+
+    Uses one pooled requests.Session, retries 429/5xx/connection errors with jittered exponential
+    backoff and caps how many requests run at once in the batch helpers.
+    """
+
+    def __init__(self, token=None, base_url=ODO_API_BASE, max_workers=8, max_retries=4, timeout=30,
+                 datacenter_field=DATACENTER_FIELD):
+        """
+        Args:
+            token: Bearer token for the API (defaults to the ODO_API_TOKEN environment variable).
+            base_url: API root, point it at a local mock server for tests.
+            max_workers: Maximum number of requests in flight in get_brands()/get_brand_datacenters().
+            max_retries: Attempts per brand before giving up.
+            timeout: Seconds before a single request times out.
+            datacenter_field: Key of the data center in the brand JSON.
+        """
+        token = token or os.getenv('ODO_API_TOKEN')
+        if not token:
+            raise ValueError('ODO_API_TOKEN is missing.')
+
+        self.base_url = base_url.rstrip('/')
+        self.max_workers = max_workers
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.datacenter_field = datacenter_field
+
+        self.session = requests.Session()
+        self.session.headers.update({'Authorization': f'Bearer {token}'})
+        adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def _backoff(self, attempt, retry_after=None):
+        # Full jitter so parallel workers do not retry in lockstep
+        delay = random.uniform(0, min(30, 0.5 * 2 ** attempt))
+        if retry_after:
+            delay = max(delay, float(retry_after))
+        time.sleep(delay)
+
+    def get_brand(self, brand):
+        """
+        Fetches a brand's JSON from odo-api/brand/{brand}.
+
+        Returns:
+            The parsed JSON, or None if the brand does not exist or could not be fetched.
+        """
+        url = f'{self.base_url}/brand/{brand}'
+        for attempt in range(1, self.max_retries + 1):
+            try:
+                response = self.session.get(url, timeout=self.timeout)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if attempt == self.max_retries:
+                    print(f'❌ Request failed for brand {brand}: {e}')
+                    return None
+                self._backoff(attempt)
+                continue
+
+            if response.status_code == 404:
+                print(f'❌ No information found for brand {brand}')
+                return None
+            if response.status_code in RETRY_STATUSES and attempt < self.max_retries:
+                self._backoff(attempt, response.headers.get('Retry-After'))
+                continue
+
+            try:
+                response.raise_for_status()
+                return response.json()
+            except requests.exceptions.HTTPError as e:
+                print(f'❌ HTTP Error for brand {brand}: {e.response.status_code} - {e.response.reason}')
+                return None
+            except ValueError:
+                print(f'❌ Failed to parse JSON for brand {brand}')
+                return None
+
+    def get_brands(self, brands):
+        """
+        Fetches many brands concurrently (at most max_workers at a time). Duplicates are fetched once.
+
+        Returns:
+            dict: {brand: parsed JSON or None}
+        """
+        unique_brands = list(dict.fromkeys(brands))
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            return dict(zip(unique_brands, executor.map(self.get_brand, unique_brands)))
+
+    def get_brand_datacenter(self, brand):
+        """
+        Looks up a brand's data center.
+
+        Returns:
+            {"brandid": ..., "datacenter": ...} like scrape_dc_from_odo_brand_page, or None.
+
+        Raises:
+            MissingDatacenterFieldError: The brand JSON has no datacenter_field.
+        """
+        return brand_datacenter_from_json(brand, self.get_brand(brand), self.datacenter_field)
+
+    def get_brand_datacenters(self, brands):
+        """
+        Looks up the data center of many brands concurrently.
+
+        Returns:
+            dict: {brand: {"brandid": ..., "datacenter": ...} or None}
+
+        Raises:
+            MissingDatacenterFieldError: A brand JSON has no datacenter_field.
+        """
+        return {brand: brand_datacenter_from_json(brand, data, self.datacenter_field)
+                for brand, data in self.get_brands(brands).items()}
+
+
+def brand_datacenter_from_json(brand, data, field=DATACENTER_FIELD):
+    """
+    Pulls the data center out of a brand's API JSON.
+
+    Returns:
+        {"brandid": ..., "datacenter": ...}, or None if the brand was not found or its data center is empty.
+
+    Raises:
+        MissingDatacenterFieldError: The JSON has no `field` key at all. Every brand would come back
+            without a data center, so this stops the run instead of reporting them one by one.
+    """
+    if not data:
+        return None
+    if field not in data:
+        raise MissingDatacenterFieldError(f'Brand {brand} JSON has no {field!r} field (keys: {sorted(data)}), '
+                                          f'check the ODO API response and the datacenter_field setting')
+    datacenter = data[field]
+    if datacenter is None or not str(datacenter).strip():
+        print(f'No Data Center Information found for brand {brand}')
+        return None
+    return {"brandid": brand, "datacenter": str(datacenter).strip()}
+
+
+def lookup_datacenters_for_file(client, input_path="input.txt", output_path="results.txt"):
+    """
+    Resolves the data center of every brand in input_path and writes `brand|DC` lines, in input order.
+    """
+    with open(input_path, "r") as infile:
+        brand_ids = [line.strip() for line in infile if line.strip()]
+
+    results = client.get_brand_datacenters(brand_ids)
+    with open(output_path, "w") as outfile:
+        for brand_id in brand_ids:
+            if results.get(brand_id):
+                outfile.write(str(brand_id) + "|" + str(results[brand_id]["datacenter"]) + "\n")
+    return results
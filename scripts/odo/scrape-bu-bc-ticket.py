@@ -1,53 +1,87 @@
+import os
+import sys
 from selenium import webdriver
-from selenium.webdriver.common.keys import Keys
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.wait import WebDriverWait 
-from selenium.webdriver.support import expected_conditions as EC
-import time
-# from staging.q4_2024_staging_arrays import array1, array2, array3, array4, array5, array6
-from staging.feb_march_2025 import array1, array2, array3, array4, array5
-from scripts.scrape_from_ticket import scrape_products_from_ticket, scrape_errors_from_ticket, scrape_brand_and_datacenter_from_ticket
-from tiering.get_brand_tiering import scrape_odo_brand_info
-
-driver = webdriver.Chrome()
-driver.get(f'https://odo.corp.qualtrics.com/?TopNav=Tickets&a=Tickets&b=TicketViewer&tid=')
-
-
-time.sleep(60)
-# Scrape Errors
-# with open("input_tickets.txt", "r") as infile, open("results.txt", "w") as outfile:
-#     for line in infile:
-#         ticket_id = line.strip()
-#         if ticket_id:
-#             ticket_errors = scrape_errors_from_ticket(driver, ticket_id)
-#             outfile.write(str(ticket_errors) + "\n")
-
-# Scrape Products
-# with open("input_tickets.txt", "r") as infile, open("results.txt", "w") as outfile:
-#     for line in infile:
-#         ticket_id = line.strip()
-#         if ticket_id:
-#             array_of_products = scrape_products_from_ticket(driver, ticket_id)
-#             outfile.write(str(array_of_products) + "\n")
-
-# Scrape Brand ID and DC
-with open("input_tickets.txt", "r") as infile, open("results.txt", "w") as outfile:
-    for line in infile:
-        ticket_id = line.strip()
-        if ticket_id:
-            driver.get(f'https://odo.corp.qualtrics.com/?TopNav=Tickets&a=Tickets&b=TicketViewer&tid={ticket_id}')
-            return_obj = scrape_brand_and_datacenter_from_ticket(driver, ticket_id)
-            if return_obj:
-                row = {
-                    "ticket_id": ticket_id,
-                    "brandid": return_obj["brandid"],
-                    "datacenter": return_obj["datacenter"]
-                }
-                print(f'Successfully scraped ticket {ticket_id}')
-            outfile.write(str(ticket_id) + "|" + str(row["brandid"]) + "|" + str(row["datacenter"]) + "\n")
-
-
-
-
-driver.close()
+from scrape_from_ticket import scrape_ticket_record
+from browser_pool import capture_session_cookies, run_parallel_scrape
+from waits import wait_for_login
+from scrape_journal import ScrapeJournal
+from http_ticket_fetcher import HttpTicketFetcher, TICKET_URL
+from telemetry import TELEMETRY
 
+WORKERS = 4
+HTTP_WORKERS = 16
+
+
+def main(input_path="input_tickets.txt", output_path="results.txt", workers=WORKERS, journal_path="ticket_brand_dc.journal.sqlite",
+         use_http=None, http_workers=HTTP_WORKERS):
+    # Ticket pages are fetched over HTTP with the browser's session, Chrome only renders the pages that
+    # come back incomplete. Set SCRAPE_TICKETS_WITH_BROWSER=1 to render every page in Chrome instead.
+    if use_http is None:
+        use_http = os.getenv('SCRAPE_TICKETS_WITH_BROWSER') != '1'
+
+    driver = webdriver.Chrome()
+    driver.get(TICKET_URL)
+
+    # Returns as soon as the manual SSO login lands back on ODO
+    wait_for_login(driver)
+    # Scrape Errors
+    # with open("input_tickets.txt", "r") as infile, open("results.txt", "w") as outfile:
+    #     for line in infile:
+    #         ticket_id = line.strip()
+    #         if ticket_id:
+    #             ticket_errors = scrape_errors_from_ticket(driver, ticket_id)
+    #             outfile.write(str(ticket_errors) + "\n")
+
+    # Scrape Products
+    # with open("input_tickets.txt", "r") as infile, open("results.txt", "w") as outfile:
+    #     for line in infile:
+    #         ticket_id = line.strip()
+    #         if ticket_id:
+    #             array_of_products = scrape_products_from_ticket(driver, ticket_id)
+    #             outfile.write(str(array_of_products) + "\n")
+
+    # Scrape Brand ID and DC
+    # Every result is checkpointed in the journal, so a re-run only scrapes missing or failed tickets
+    journal = ScrapeJournal(journal_path)
+
+    with open(input_path, "r") as infile:
+        ticket_ids = [line.strip() for line in infile if line.strip()]
+
+    todo = journal.pending(ticket_ids)
+    print(f'{len(ticket_ids) - len(todo)} tickets already scraped, {len(todo)} to go')
+
+    # Log in once in the visible browser, then hand the session to the HTTP client / headless workers
+    cookies = capture_session_cookies(driver)
+    user_agent = driver.execute_script('return navigator.userAgent')
+    driver.close()
+
+    def scrape_in_browsers(ticket_ids, on_result):
+        run_parallel_scrape(
+            ticket_ids,
+            url_for=lambda ticket_id: f'{TICKET_URL}{ticket_id}',
+            # One page_source pull per ticket, the journal keeps the full record (products, audit rows too)
+            scrape=scrape_ticket_record,
+            cookies=cookies,
+            workers=workers,
+            on_result=on_result)
+
+    if todo and use_http:
+        fetcher = HttpTicketFetcher(cookies, user_agent, workers=http_workers, ticket_url=TICKET_URL)
+        outcome = fetcher.scrape_many(todo, on_result=journal.record, fallback=scrape_in_browsers)
+        fetcher.close()
+        if outcome['fallback']:
+            print(f"{len(outcome['fallback'])} tickets needed a browser")
+    elif todo:
+        scrape_in_browsers(todo, journal.record)
+
+    journal.export(ticket_ids, output_path, lambda ticket_id, row: str(ticket_id) + "|" + str(row["brandid"]) + "|" + str(row["datacenter"]))
+    failed = journal.export_failures("failed_tickets.txt")
+    print(f'{failed} tickets failed, see failed_tickets.txt')
+    journal.close()
+
+    # Per-stage p50/p95/p99 and throughput, the JSON events are in scrape_telemetry.jsonl
+    TELEMETRY.print_summary()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,7 +1,9 @@
 from selenium.common.exceptions import NoSuchElementException
 from selenium.webdriver.common.by import By
+from telemetry import instrumented
 # No need to import the full webdriver or keys here, as they are passed in from the main script
 
+@instrumented('extract:dc_from_odo_brand_page')
 def scrape_dc_from_odo_brand_page(driver, brand_id):
     """
     Scrapes the Brand ID and Data Center values from the ODO Brand Profile page.
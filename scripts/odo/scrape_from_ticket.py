@@ -1,11 +1,10 @@
-from selenium import webdriver
-from selenium.webdriver.common.keys import Keys
 from selenium.webdriver.common.by import By
-from selenium.webdriver.support.wait import WebDriverWait 
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import NoSuchElementException
-from selenium.webdriver.common.by import By
-import time
+from selenium.common.exceptions import NoSuchElementException, TimeoutException
+from waits import wait_for
+from ticket_page_parser import IncompleteTicketError, missing_fields, parse_ticket_page
+from telemetry import instrumented
+
+AUDIT_LOG_TIMEOUT = 10
 
 
 def scrape_products_from_ticket_array(driver, array_of_ticket_ids):
@@ -14,6 +13,7 @@ def scrape_products_from_ticket_array(driver, array_of_ticket_ids):
         print(f'{ticket_id}: ', product_array_of_ticket)
 
 
+@instrumented('extract:brand_and_datacenter_from_ticket')
 def scrape_brand_and_datacenter_from_ticket(driver, ticket_id):
     try:
         datacenter_element = driver.find_element('xpath', '//td[text() = "Data Center:"]/following-sibling::td')
@@ -26,6 +26,7 @@ def scrape_brand_and_datacenter_from_ticket(driver, ticket_id):
         print(f'No Datacenter Information found for ticket {ticket_id}')
 
 
+@instrumented('extract:products_from_ticket')
 def scrape_products_from_ticket(driver, ticket_id):
     products_array = []
     try:
@@ -53,10 +54,12 @@ def scrape_products_from_ticket(driver, ticket_id):
     return products_array
 
 
+@instrumented('extract:errors_from_ticket')
 def scrape_errors_from_ticket(driver, ticket_id):
     error_array = []
     # try:
-    time.sleep(2)
+    # Wait for the audit log rows to render instead of sleeping a fixed 2s
+    wait_for(driver, (By.CSS_SELECTOR, ".audit-log-table tr"), timeout=AUDIT_LOG_TIMEOUT, label='audit_log_table')
     audit_table = driver.find_element(By.CLASS_NAME, ("audit-log-table"))
     trs = audit_table.find_elements(By.TAG_NAME, 'tr')
     for tr in trs:
@@ -67,4 +70,31 @@ def scrape_errors_from_ticket(driver, ticket_id):
     # except:
     #     print(f'Error thrown on {ticket_id}')
 
-    return error_array
\ No newline at end of file
+    return error_array
+
+
+@instrumented('extract:ticket_record')
+def scrape_ticket_record(driver, ticket_id):
+    """
+    Scrapes products, brand/DC and audit rows from the loaded ticket page in a single pass.
+
+    Instead of one browser round trip per element and per .text, the page HTML is pulled once and
+    parsed offline with lxml (see ticket_page_parser.py).
+
+    Raises:
+        IncompleteTicketError: The page has no brand ID or data center (login screen, not rendered...),
+            so the journal records the ticket as failed and a re-run retries it.
+    """
+    try:
+        # The audit log renders after the rest of the page, give it a moment before snapshotting
+        wait_for(driver, (By.CSS_SELECTOR, ".audit-log-table tr"), timeout=AUDIT_LOG_TIMEOUT, label='audit_log_table')
+    except TimeoutException:
+        print(f'No audit log found for ticket {ticket_id}')
+
+    record = parse_ticket_page(driver.page_source, ticket_id)
+    if not record["products"]:
+        print(f'No License Information found for ticket {ticket_id}')
+    missing = missing_fields(record)
+    if missing:
+        raise IncompleteTicketError(f'No {" or ".join(missing)} found for ticket {ticket_id}')
+    return record
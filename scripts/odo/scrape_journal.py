@@ -0,0 +1,111 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+
+class ScrapeJournal:
+    """
+    A durable, append-as-you-go record of a scrape run, keyed by ticket or brand ID.
+
+    Every result is committed to SQLite the moment it arrives, so a crash loses at most the page
+    in flight. On restart, pending() returns only the IDs that are missing or failed, and export()
+    rebuilds the results file from the journal in input order.
+    """
+
+    def __init__(self, path):
+        """
+        Args:
+            path: SQLite file for this run (e.g. 'ticket_brand_dc.journal.sqlite'), created if missing.
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        # One connection shared by the browser worker threads, serialized by the lock
+        self._db = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._db.execute('pragma journal_mode=wal')
+        self._db.execute('pragma synchronous=normal')
+        self._db.execute("""
+            create table if not exists entries (
+                item_id text primary key,
+                status text not null,
+                result text,
+                error text,
+                attempts integer not null default 0,
+                updated_at real not null
+            )""")
+        self._db.commit()
+
+    def _upsert(self, item_id, status, result, error):
+        with self._lock:
+            self._db.execute("""
+                insert into entries (item_id, status, result, error, attempts, updated_at) values (?, ?, ?, ?, 1, ?)
+                on conflict (item_id) do update set
+                    status = excluded.status, result = excluded.result, error = excluded.error,
+                    attempts = entries.attempts + 1, updated_at = excluded.updated_at
+                """, (item_id, status, result, error, time.time()))
+            self._db.commit()
+
+    def record(self, item_id, result, error=None):
+        """
+        Records the outcome for one ID. A None result or an error counts as a failure.
+        """
+        if error is None and result is not None:
+            self._upsert(item_id, 'done', json.dumps(result), None)
+        else:
+            self._upsert(item_id, 'failed', None, str(error) if error is not None else 'no result')
+
+    def pending(self, item_ids):
+        """Returns the IDs (in input order, de-duplicated) that are not completed yet, including failed ones."""
+        with self._lock:
+            done = {row[0] for row in self._db.execute("select item_id from entries where status = 'done'")}
+        return [item_id for item_id in dict.fromkeys(item_ids) if item_id not in done]
+
+    def failed(self):
+        """Returns {item_id: (error, attempts)} for every ID whose last attempt failed."""
+        with self._lock:
+            return {row[0]: (row[1], row[2]) for row in
+                    self._db.execute("select item_id, error, attempts from entries where status = 'failed'")}
+
+    def results(self):
+        """Returns {item_id: result} for every completed ID."""
+        with self._lock:
+            return {row[0]: json.loads(row[1]) for row in
+                    self._db.execute("select item_id, result from entries where status = 'done'")}
+
+    def export(self, item_ids, path, format_line):
+        """
+        Writes one line per completed ID, in input order, replacing `path` atomically.
+
+        Args:
+            item_ids: The run's input IDs, in order.
+            path: Output file (e.g. 'results.txt').
+            format_line: Function (item_id, result) -> line without the trailing newline.
+
+        Returns:
+            Number of lines written.
+        """
+        results = self.results()
+        tmp_path = f'{path}.tmp'
+        written = 0
+        with open(tmp_path, 'w') as outfile:
+            for item_id in item_ids:
+                if item_id in results:
+                    outfile.write(format_line(item_id, results[item_id]) + '\n')
+                    written += 1
+            outfile.flush()
+            os.fsync(outfile.fileno())
+        os.replace(tmp_path, path)
+        return written
+
+    def export_failures(self, path):
+        """Writes `item_id|attempts|error` for every failed ID, for a targeted retry or a look by hand."""
+        failed = self.failed()
+        with open(path, 'w') as outfile:
+            for item_id, (error, attempts) in failed.items():
+                outfile.write(f'{item_id}|{attempts}|{error}\n')
+        return len(failed)
+
+    def close(self):
+        with self._lock:
+            self._db.close()
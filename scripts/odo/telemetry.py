@@ -0,0 +1,204 @@
+import functools
+import json
+import math
+import os
+import threading
+import time
+from selenium.common.exceptions import TimeoutException, WebDriverException
+
+# Structured timing events for the ODO scrapers, one JSON object per line, e.g.
+#   {"ts": 1722150000.1, "event": "stage", "stage": "navigation", "item_id": "TKT-1", "seconds": 1.42, "outcome": "ok"}
+# and an end-of-run summary with p50/p95/p99 per stage and throughput.
+TELEMETRY_LOG = os.getenv('SCRAPE_TELEMETRY_LOG', 'scrape_telemetry.jsonl')
+NAVIGATION_RETRIES = 2
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(fraction * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+class Telemetry:
+    """
+    Collects stage timings, retries and item outcomes from all scrape workers. Thread-safe.
+
+    Events go to a JSON-lines file (opened on the first event), timings stay in memory for summary().
+    """
+
+    def __init__(self, path=TELEMETRY_LOG):
+        """
+        Args:
+            path: JSON-lines file to append events to, None to keep them in memory only.
+        """
+        self.path = path
+        self.started = time.time()
+        self._lock = threading.Lock()
+        self._handle = None
+        self._stages = {}    # stage -> list of seconds
+        self._errors = {}    # stage -> count
+        self._retries = {}   # stage -> count
+        self._outcomes = {}  # outcome -> count
+
+    def emit(self, event, **fields):
+        """Writes one JSON event."""
+        if self.path is None:
+            return
+        line = json.dumps({'ts': round(time.time(), 3), 'event': event, **fields}, default=str)
+        with self._lock:
+            if self._handle is None:
+                self._handle = open(self.path, 'a')
+            self._handle.write(line + '\n')
+            self._handle.flush()
+
+    def record_stage(self, stage, seconds, item_id=None, outcome='ok', emit=True, **fields):
+        """Records how long one stage took for one item."""
+        with self._lock:
+            self._stages.setdefault(stage, []).append(seconds)
+            if outcome == 'error':
+                self._errors[stage] = self._errors.get(stage, 0) + 1
+        if emit:
+            self.emit('stage', stage=stage, item_id=item_id, seconds=round(seconds, 4), outcome=outcome, **fields)
+
+    def record_retry(self, stage, item_id=None, attempt=None, reason=None):
+        with self._lock:
+            self._retries[stage] = self._retries.get(stage, 0) + 1
+        self.emit('retry', stage=stage, item_id=item_id, attempt=attempt, reason=reason)
+
+    def record_item(self, item_id, seconds, outcome, **fields):
+        """Records the end of one item (ticket or brand), 'ok', 'empty' or 'error'."""
+        with self._lock:
+            self._outcomes[outcome] = self._outcomes.get(outcome, 0) + 1
+        self.record_stage('item', seconds, item_id, outcome, emit=False)
+        self.emit('item', item_id=item_id, seconds=round(seconds, 4), outcome=outcome, **fields)
+
+    def summary(self):
+        """
+        Returns:
+            {'elapsed_s', 'items', 'outcomes', 'items_per_minute', 'stages': {stage: {'count', 'errors',
+            'retries', 'p50_s', 'p95_s', 'p99_s', 'total_s'}}}
+        """
+        with self._lock:
+            elapsed = time.time() - self.started
+            stages = {}
+            for stage, seconds in self._stages.items():
+                ordered = sorted(seconds)
+                stages[stage] = {
+                    'count': len(ordered),
+                    'errors': self._errors.get(stage, 0),
+                    'retries': self._retries.get(stage, 0),
+                    'p50_s': percentile(ordered, 0.50),
+                    'p95_s': percentile(ordered, 0.95),
+                    'p99_s': percentile(ordered, 0.99),
+                    'total_s': sum(ordered),
+                }
+            items = sum(self._outcomes.values())
+            return {
+                'elapsed_s': elapsed,
+                'items': items,
+                'outcomes': dict(self._outcomes),
+                'items_per_minute': items / elapsed * 60 if elapsed > 0 else 0.0,
+                'stages': stages,
+            }
+
+    def print_summary(self):
+        summary = self.summary()
+        print(f"{summary['items']} items in {summary['elapsed_s']:.1f}s "
+              f"({summary['items_per_minute']:.1f}/min), outcomes: {summary['outcomes']}")
+        print(f"{'stage':<28}{'count':>7}{'errors':>8}{'retries':>9}{'p50':>9}{'p95':>9}{'p99':>9}{'total':>10}")
+        for stage, stats in sorted(summary['stages'].items(), key=lambda item: -item[1]['total_s']):
+            print(f"{stage:<28}{stats['count']:>7}{stats['errors']:>8}{stats['retries']:>9}"
+                  f"{stats['p50_s']:>8.2f}s{stats['p95_s']:>8.2f}s{stats['p99_s']:>8.2f}s{stats['total_s']:>9.1f}s")
+        if self.path is not None and self._handle is not None:
+            print(f'Events written to {self.path}')
+        self.emit('summary', **summary)
+
+    def close(self):
+        with self._lock:
+            if self._handle is not None:
+                self._handle.close()
+                self._handle = None
+
+
+TELEMETRY = Telemetry()
+
+
+class InstrumentedDriver:
+    """
+    Wraps a WebDriver so page loads and element lookups are timed.
+
+    get() is retried on timeouts and WebDriver errors, everything else is passed straight through to
+    the wrapped driver, so it can be handed to the scrape_* functions and WebDriverWait unchanged.
+    """
+
+    def __init__(self, driver, telemetry=None, navigation_retries=NAVIGATION_RETRIES):
+        self._driver = driver
+        self._telemetry = telemetry or TELEMETRY
+        self._navigation_retries = navigation_retries
+        self.item_id = None
+
+    def __getattr__(self, name):
+        return getattr(self._driver, name)
+
+    def get(self, url):
+        for attempt in range(1, self._navigation_retries + 2):
+            start = time.perf_counter()
+            try:
+                self._driver.get(url)
+            except (TimeoutException, WebDriverException) as e:
+                self._telemetry.record_stage('navigation', time.perf_counter() - start, self.item_id, 'error', url=url)
+                if attempt > self._navigation_retries:
+                    raise
+                self._telemetry.record_retry('navigation', self.item_id, attempt, type(e).__name__)
+                continue
+            self._telemetry.record_stage('navigation', time.perf_counter() - start, self.item_id, url=url)
+            return
+
+    def _timed_lookup(self, method, *args, **kwargs):
+        start = time.perf_counter()
+        outcome = 'ok'
+        try:
+            return method(*args, **kwargs)
+        except WebDriverException:
+            outcome = 'error'
+            raise
+        finally:
+            # Lookups happen many times per page (and on every wait poll), keep them out of the event log
+            self._telemetry.record_stage('dom_lookup', time.perf_counter() - start, self.item_id, outcome, emit=False)
+
+    def find_element(self, *args, **kwargs):
+        return self._timed_lookup(self._driver.find_element, *args, **kwargs)
+
+    def find_elements(self, *args, **kwargs):
+        return self._timed_lookup(self._driver.find_elements, *args, **kwargs)
+
+    @property
+    def page_source(self):
+        start = time.perf_counter()
+        try:
+            return self._driver.page_source
+        finally:
+            self._telemetry.record_stage('page_source', time.perf_counter() - start, self.item_id, emit=False)
+
+
+def instrumented(stage):
+    """
+    Decorator for scrape_*(driver, item_id, ...) functions: times the extraction and records whether
+    it returned something ('ok'), nothing ('empty') or raised ('error').
+    """
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(driver, *args, **kwargs):
+            item_id = args[0] if args else kwargs.get('ticket_id', kwargs.get('brand_id'))
+            start = time.perf_counter()
+            outcome = 'error'
+            try:
+                result = function(driver, *args, **kwargs)
+                outcome = 'ok' if result else 'empty'
+                return result
+            finally:
+                TELEMETRY.record_stage(stage, time.perf_counter() - start, item_id, outcome)
+        return wrapper
+    return decorator
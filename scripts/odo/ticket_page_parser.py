@@ -0,0 +1,86 @@
+from lxml import html as lxml_html
+
+# Same XPaths the Selenium scrapers in scrape_from_ticket.py use, evaluated offline
+LICENSE_LABEL_XPATH = '//*[text() = "License Information"]'
+DATACENTER_XPATH = '//td[text() = "Data Center:"]/following-sibling::td'
+BRANDID_XPATH = '//td[text() = "Requested Brand ID:"]/following-sibling::td'
+AUDIT_ROWS_XPATH = "//*[contains(concat(' ', normalize-space(@class), ' '), ' audit-log-table ')]//tr"
+
+# A ticket only counts as scraped once these are on the page. Anything less (the SSO login screen
+# after the session expired, a half-rendered page...) is a failure to retry, not a result.
+REQUIRED_FIELDS = ('brandid', 'datacenter')
+
+
+class IncompleteTicketError(Exception):
+    """The ticket page is missing fields we need, see REQUIRED_FIELDS."""
+
+
+def missing_fields(record, required_fields=REQUIRED_FIELDS):
+    """Returns the required fields the record has no value for."""
+    return [field for field in required_fields if not record.get(field)]
+
+
+def _text(element):
+    """Whitespace-normalized text of an element, close to what Selenium's .text returns."""
+    return ' '.join(element.text_content().split())
+
+
+def parse_products(tree):
+    """
+    Returns the License Information tables as a list of {label: value} dicts, one per tbody.
+
+    A browser wraps every table's rows in a tbody, the raw server HTML fetched over HTTP may not, so
+    a table without one is read from its own rows.
+    """
+    labels = tree.xpath(LICENSE_LABEL_XPATH)
+    if not labels:
+        return []
+    license_information_div = labels[0].getparent()
+    products_array = []
+    for table in license_information_div.iter('table'):
+        bodies = table.findall('tbody')
+        cell_groups = [list(tbody.iter('td')) for tbody in bodies] if bodies else [table.xpath('./tr/td')]
+        for cells in cell_groups:
+            tds = [_text(td) for td in cells]
+            # Cells alternate label, value, label, value...
+            products_array.append(dict(zip(tds[0::2], tds[1::2])))
+    return products_array
+
+
+def parse_brand_and_datacenter(tree):
+    """Returns (brandid, datacenter), None for whichever is missing from the page."""
+    brandid = tree.xpath(BRANDID_XPATH)
+    datacenter = tree.xpath(DATACENTER_XPATH)
+    return (_text(brandid[0]) if brandid else None,
+            _text(datacenter[0]) if datacenter else None)
+
+
+def parse_audit_rows(tree):
+    """Returns the audit-log-table rows as strings, header row included, like scrape_errors_from_ticket."""
+    rows = []
+    for tr in tree.xpath(AUDIT_ROWS_XPATH):
+        cells = [_text(cell) for cell in tr.xpath('./th|./td')]
+        rows.append(' '.join(cell for cell in cells if cell))
+    return rows
+
+
+def parse_ticket_page(page_source, ticket_id=None):
+    """
+    Extracts everything we scrape from a ticket page in one offline pass over its HTML.
+
+    Args:
+        page_source: The ticket page HTML (driver.page_source, or a saved fixture).
+        ticket_id: Ticket ID to tag the record with.
+
+    Returns:
+        {"ticket_id", "brandid", "datacenter", "products", "audit_rows"}
+    """
+    tree = lxml_html.fromstring(page_source)
+    brandid, datacenter = parse_brand_and_datacenter(tree)
+    return {
+        "ticket_id": ticket_id,
+        "brandid": brandid,
+        "datacenter": datacenter,
+        "products": parse_products(tree),
+        "audit_rows": parse_audit_rows(tree),
+    }
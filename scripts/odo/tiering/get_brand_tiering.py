@@ -1,14 +1,9 @@
-from selenium import webdriver
-from selenium.webdriver.common.keys import Keys
 from selenium.webdriver.common.by import By
-from selenium.webdriver.support.wait import WebDriverWait 
-from selenium.common.exceptions import NoSuchElementException
-from selenium.webdriver.support import expected_conditions as EC
-import time
-# from staging.q4_2024_staging_arrays import array1, array2, array3, array4, array5, array6
-from staging.feb_march_2025 import array1, array2, array3, array4, array5
-from scripts.scrape_from_ticket import scrape_products_from_ticket, scrape_errors_from_ticket
+from selenium.common.exceptions import NoSuchElementException, TimeoutException
 import json
+from waits import wait_for
+
+BRAND_INFO_TIMEOUT = 10
 
 def scrape_odo_brand_info(driver, brand):
     """
@@ -27,9 +22,8 @@ def scrape_odo_brand_info(driver, brand):
     driver.get(f'https://odo-public-api.corp.qualtrics.com/odo-api/brand/{brand}')
     
     try:
-        # Wait a moment for the page to load, then find the <pre> tag
-        time.sleep(2) 
-        pre_element = driver.find_element(By.TAG_NAME, 'pre')
+        # Wait for the <pre> tag holding the JSON instead of sleeping a fixed 2s
+        pre_element = wait_for(driver, (By.TAG_NAME, 'pre'), timeout=BRAND_INFO_TIMEOUT, label='odo_brand_json')
         
         # Get the text content from the <pre> tag
         json_text = pre_element.text
@@ -40,7 +34,7 @@ def scrape_odo_brand_info(driver, brand):
         print(data)
         return data
 
-    except NoSuchElementException:
+    except (NoSuchElementException, TimeoutException):
         print(f'❌ No information found for brand {brand}')
         return None
     except json.JSONDecodeError:
@@ -0,0 +1,113 @@
+import threading
+import time
+from urllib.parse import urlparse
+from selenium.common.exceptions import TimeoutException
+from selenium.webdriver.support.wait import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+from telemetry import TELEMETRY
+
+DEFAULT_TIMEOUT = 10
+POLL_FREQUENCY = 0.1
+ODO_HOST = 'odo.corp.qualtrics.com'
+
+
+class WaitTimings:
+    """
+    Collects how long every wait actually took, per label, so slow selectors stand out.
+    Thread-safe, shared by all browser workers.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._timings = {}  # label -> list of (seconds, found)
+
+    def record(self, label, seconds, found):
+        with self._lock:
+            self._timings.setdefault(label, []).append((seconds, found))
+
+    def summary(self):
+        """Returns {label: {'count', 'timeouts', 'avg_s', 'max_s', 'total_s'}}."""
+        with self._lock:
+            summary = {}
+            for label, timings in self._timings.items():
+                seconds = [s for s, _ in timings]
+                summary[label] = {
+                    'count': len(timings),
+                    'timeouts': sum(1 for _, found in timings if not found),
+                    'avg_s': sum(seconds) / len(seconds),
+                    'max_s': max(seconds),
+                    'total_s': sum(seconds),
+                }
+            return summary
+
+    def print_summary(self):
+        for label, stats in sorted(self.summary().items(), key=lambda item: -item[1]['total_s']):
+            print(f"{label}: {stats['count']} waits, {stats['timeouts']} timeouts, "
+                  f"avg {stats['avg_s']:.2f}s, max {stats['max_s']:.2f}s, total {stats['total_s']:.1f}s")
+
+
+WAIT_TIMINGS = WaitTimings()
+
+
+def wait_for(driver, locator, timeout=DEFAULT_TIMEOUT, condition=EC.presence_of_element_located, label=None):
+    """
+    Waits until `condition(locator)` holds and returns its result (usually the element).
+
+    Returns as soon as the element shows up instead of sleeping a fixed amount, and records the
+    time actually spent under `label` in WAIT_TIMINGS.
+
+    Args:
+        driver: The Selenium WebDriver instance.
+        locator: A (By.<strategy>, selector) tuple.
+        timeout: Seconds to wait before raising TimeoutException.
+        condition: An expected_conditions factory taking the locator.
+        label: Name to report the timing under (defaults to the selector).
+    """
+    start = time.perf_counter()
+    found = False
+    try:
+        result = WebDriverWait(driver, timeout, poll_frequency=POLL_FREQUENCY).until(condition(locator))
+        found = True
+        return result
+    finally:
+        elapsed = time.perf_counter() - start
+        WAIT_TIMINGS.record(label or locator[1], elapsed, found)
+        TELEMETRY.record_stage(f'dom_wait:{label or locator[1]}', elapsed, getattr(driver, 'item_id', None),
+                               'ok' if found else 'timeout')
+
+
+def wait_for_all(driver, locator, timeout=DEFAULT_TIMEOUT, label=None):
+    """Waits until at least one element matches and returns all matches."""
+    return wait_for(driver, locator, timeout, EC.presence_of_all_elements_located, label)
+
+
+def wait_for_login(driver, host=ODO_HOST, ready_locator=None, timeout=300):
+    """
+    Blocks until the person at the keyboard has finished logging in, replacing the fixed 60s sleep.
+
+    Login is considered done once the browser is back on `host` (not the SSO pages), the page has
+    finished loading and, if given, `ready_locator` is present. The condition must hold on two
+    polls in a row so an intermediate redirect does not count.
+    """
+    print(f'Waiting up to {timeout}s for login to {host} to complete...')
+    start = time.perf_counter()
+    seen_ready = [False]
+
+    def logged_in(driver):
+        ready = (urlparse(driver.current_url).netloc == host
+                 and driver.execute_script('return document.readyState') == 'complete')
+        if ready and ready_locator is not None:
+            ready = bool(driver.find_elements(*ready_locator))
+        if ready and seen_ready[0]:
+            return True
+        seen_ready[0] = ready
+        return False
+
+    try:
+        WebDriverWait(driver, timeout, poll_frequency=1).until(logged_in)
+    except TimeoutException:
+        WAIT_TIMINGS.record('login', time.perf_counter() - start, False)
+        raise TimeoutException(f'Login to {host} did not complete within {timeout}s')
+    elapsed = time.perf_counter() - start
+    WAIT_TIMINGS.record('login', elapsed, True)
+    print(f'Login detected after {elapsed:.1f}s')
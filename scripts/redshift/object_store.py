@@ -0,0 +1,89 @@
+import os
+import shutil
+from typing import Optional
+
+
+# Object stores hold the files DataWarehouse.copy_dataframe() loads with COPY. Each store implements
+#   put(local_path, key) -> str   upload a local file, returns its location
+#   delete(key)                   remove it once the load is done
+# plus one of
+#   copy_source(key) -> str       the FROM ... credentials part of a Redshift COPY statement, or
+#   open(key) -> file             a binary file object streamed to the database with COPY ... FROM STDIN
+
+
+class S3ObjectStore:
+    """
+    Stages load files in S3 so Redshift can pull them in parallel with a single COPY.
+
+    Requires 'boto3' to be installed, unless a client is passed in.
+    """
+
+    def __init__(self, bucket: str, prefix: str = '', iam_role: Optional[str] = None, region: Optional[str] = None, client=None):
+        """
+        Parameters:
+            bucket (str): S3 bucket the Redshift cluster can read from.
+            prefix (str): Key prefix for staged files (e.g. 'redshift-loads/').
+            iam_role (str): ARN of the IAM role Redshift assumes to read the bucket (required).
+            region (str): Bucket region, only needed if it differs from the cluster's.
+            client: Optional boto3 S3 client. One is created when omitted.
+        """
+        if not iam_role:
+            raise ValueError("Configuration Error: S3ObjectStore needs the IAM role ARN Redshift uses to read the bucket (REDSHIFT_COPY_IAM_ROLE).")
+        self.bucket = bucket
+        self.prefix = prefix
+        self.iam_role = iam_role
+        self.region = region
+        if client is None:
+            import boto3
+            client = boto3.client('s3', region_name=region)
+        self.client = client
+
+    def _object_key(self, key: str) -> str:
+        return f"{self.prefix}{key}"
+
+    def put(self, local_path: str, key: str) -> str:
+        self.client.upload_file(local_path, self.bucket, self._object_key(key))
+        return f"s3://{self.bucket}/{self._object_key(key)}"
+
+    def delete(self, key: str):
+        self.client.delete_object(Bucket=self.bucket, Key=self._object_key(key))
+
+    def copy_source(self, key: str) -> str:
+        clause = f"from 's3://{self.bucket}/{self._object_key(key)}' iam_role '{self.iam_role}'"
+        if self.region:
+            clause += f" region '{self.region}'"
+        return clause
+
+
+class LocalObjectStore:
+    """
+    A local-filesystem stand-in for S3, used for tests and local Postgres.
+
+    Files are streamed to the server with COPY ... FROM STDIN, so only CSV loads are supported.
+    """
+
+    def __init__(self, root: str):
+        """
+        Parameters:
+            root (str): Directory the staged files are copied into (created if missing).
+        """
+        self.root = os.path.expanduser(root)
+        os.makedirs(self.root, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, key)
+
+    def put(self, local_path: str, key: str) -> str:
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        shutil.copyfile(local_path, path)
+        return path
+
+    def delete(self, key: str):
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def open(self, key: str):
+        return open(self._path(key), 'rb')
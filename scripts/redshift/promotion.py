@@ -0,0 +1,186 @@
+import uuid
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+# Staging -> prod promotion on top of DataWarehouse. Everything (create/clear, load, update,
+# insert, optional delete or table swap) runs in one transaction, so a failure leaves prod as it was.
+# Plain SQL that Redshift and Postgres both accept, so it can be exercised against a local Postgres.
+
+
+def _table_columns(conn, schema: str, table: str) -> Dict[str, str]:
+    """Returns {column_name: data_type} for a table, in ordinal order."""
+    with conn.cursor() as cursor:
+        cursor.execute(
+            "select column_name, data_type from information_schema.columns "
+            "where table_schema = %s and table_name = %s order by ordinal_position",
+            (schema.lower(), table.lower()))
+        columns = dict(cursor.fetchall())
+    if not columns:
+        raise ValueError(f"Table {schema}.{table} does not exist or has no columns.")
+    return columns
+
+
+def _row_hash(alias: str, columns: Dict[str, str], quote) -> str:
+    """
+    md5 over a row's columns, NULL-safe. Booleans are spelled out since Redshift cannot cast them to varchar.
+
+    Values are cast to varchar(65535), Redshift's maximum, since a bare varchar is VARCHAR(256) there and
+    would truncate long text, hiding changes past the 256th byte. (varchar(max) is not valid in Postgres.)
+    """
+    parts = []
+    for name, data_type in columns.items():
+        column = f"{alias}.{quote(name)}"
+        if data_type == 'boolean':
+            value = f"case when {column} then 't' when not {column} then 'f' end"
+        else:
+            value = f"cast({column} as varchar(65535))"
+        parts.append(f"coalesce({value}, '\\N')")
+    if not parts:
+        return "''"
+    return 'md5(' + " || chr(31) || ".join(parts) + ')'
+
+
+def _fetch_count(conn, query: str) -> int:
+    with conn.cursor() as cursor:
+        cursor.execute(query)
+        return cursor.fetchone()[0]
+
+
+def _execute(conn, query: str) -> int:
+    with conn.cursor() as cursor:
+        cursor.execute(query)
+        return cursor.rowcount
+
+
+def promote(warehouse, df: pd.DataFrame, prod_schema: str, prod_table: str, staging_schema: str,
+            key_columns: List[str], store=None, delete_missing: bool = False, full_refresh: bool = False,
+            conn=None) -> Dict[str, int]:
+    """
+    Loads a DataFrame into a prod table through a staging table in a single transaction.
+
+    Merge mode (the default) stages df in {staging_schema}.{prod_table}_temp, updates prod rows
+    whose non-key columns hash differently from the staged row, inserts staged keys prod does not
+    have and, with delete_missing, deletes prod rows whose key was not staged. Rows that did not
+    change are not rewritten.
+
+    Full refresh mode loads df into a new table next to prod and swaps the two by renaming, so
+    readers see either the old or the new table, never a half-loaded one. Grants on the old table
+    are not carried over to the new one.
+
+    Parameters:
+        warehouse (DataWarehouse): Where to run.
+        df (pd.DataFrame): Rows to promote. Column names must match prod's.
+        prod_schema (str), prod_table (str): Target table.
+        staging_schema (str): Schema for the staging table (merge mode).
+        key_columns (list): Columns identifying a row, e.g. ['SKU', 'Privilege'].
+        store: Object store for the COPY load, see DataWarehouse.copy_dataframe.
+        delete_missing (bool): Merge mode only. Only use it when df is a full snapshot.
+        full_refresh (bool): Replace prod with df by an atomic table swap.
+        conn: Run on this connection and leave committing to the caller.
+
+    Returns:
+        dict: {'inserted', 'updated', 'unchanged', 'deleted'} row counts.
+    """
+    def run(conn):
+        if full_refresh:
+            return _swap(warehouse, conn, df, prod_schema, prod_table, key_columns, store)
+        return _merge(warehouse, conn, df, prod_schema, prod_table, staging_schema, key_columns, store, delete_missing)
+
+    if conn is not None:
+        counts = run(conn)
+    else:
+        with warehouse.connection() as conn:
+            try:
+                counts = run(conn)
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+
+    if warehouse.cache is not None:
+        warehouse.invalidate_cache(f"{prod_schema}.{prod_table}")
+    print(f"Promoted {len(df)} rows to {prod_schema}.{prod_table}: {counts}")
+    return counts
+
+
+def _split_columns(conn, schema: str, table: str, key_columns: List[str]):
+    columns = _table_columns(conn, schema, table)
+    keys = [key.lower() for key in key_columns]
+    missing = [key for key in keys if key not in columns]
+    if missing:
+        raise ValueError(f"Key columns {missing} are not in {schema}.{table}.")
+    return columns, keys, {name: data_type for name, data_type in columns.items() if name not in keys}
+
+
+def _diff_counts(conn, source: str, target: str, keys: List[str], values: Dict[str, str], quote) -> Dict[str, int]:
+    """Counts source rows that are new, changed or the same compared to target, and target rows missing from source."""
+    join = ' and '.join(f"s.{quote(k)} = t.{quote(k)}" for k in keys)
+    first_key = quote(keys[0])
+    query = f"""
+        select
+            sum(case when t.{first_key} is null then 1 else 0 end),
+            sum(case when t.{first_key} is not null and {_row_hash('s', values, quote)} <> {_row_hash('t', values, quote)} then 1 else 0 end),
+            sum(case when t.{first_key} is not null and {_row_hash('s', values, quote)} = {_row_hash('t', values, quote)} then 1 else 0 end)
+        from {source} s left join {target} t on {join}"""
+    with conn.cursor() as cursor:
+        cursor.execute(query)
+        inserted, updated, unchanged = (value or 0 for value in cursor.fetchone())
+    deleted = _fetch_count(conn, f"select count(*) from {target} t where not exists (select 1 from {source} s where {join})")
+    return {'inserted': inserted, 'updated': updated, 'unchanged': unchanged, 'deleted': deleted}
+
+
+def _merge(warehouse, conn, df, prod_schema, prod_table, staging_schema, key_columns, store, delete_missing):
+    quote = warehouse._quote_identifier
+    prod = f"{prod_schema}.{prod_table}"
+    staging = f"{staging_schema}.{prod_table}_temp"
+
+    # delete, not truncate: truncate commits the transaction on Redshift
+    _execute(conn, f"create table if not exists {staging} (like {prod})")
+    _execute(conn, f"delete from {staging}")
+    warehouse.copy_dataframe(df, schema=staging_schema, table=f"{prod_table}_temp", store=store, conn=conn)
+
+    columns, keys, values = _split_columns(conn, prod_schema, prod_table, key_columns)
+    join = ' and '.join(f"s.{quote(k)} = {prod_table}.{quote(k)}" for k in keys)
+    staged = _fetch_count(conn, f"select count(*) from {staging}")
+
+    updated = 0
+    if values:
+        assignments = ', '.join(f"{quote(name)} = s.{quote(name)}" for name in values)
+        updated = _execute(conn, f"""
+            update {prod} set {assignments}
+            from {staging} s
+            where {join} and {_row_hash('s', values, quote)} <> {_row_hash(prod_table, values, quote)}""")
+
+    column_list = ', '.join(quote(name) for name in columns)
+    inserted = _execute(conn, f"""
+        insert into {prod} ({column_list})
+        select {', '.join(f's.{quote(name)}' for name in columns)}
+        from {staging} s
+        where not exists (select 1 from {prod} where {join})""")
+
+    deleted = 0
+    if delete_missing:
+        deleted = _execute(conn, f"""
+            delete from {prod}
+            where not exists (select 1 from {staging} s where {join})""")
+
+    return {'inserted': inserted, 'updated': updated, 'unchanged': staged - inserted - updated, 'deleted': deleted}
+
+
+def _swap(warehouse, conn, df, prod_schema, prod_table, key_columns, store):
+    quote = warehouse._quote_identifier
+    prod = f"{prod_schema}.{prod_table}"
+    suffix = uuid.uuid4().hex[:8]
+    new_table, old_table = f"{prod_table}_new_{suffix}", f"{prod_table}_old_{suffix}"
+
+    _execute(conn, f"create table {prod_schema}.{new_table} (like {prod})")
+    warehouse.copy_dataframe(df, schema=prod_schema, table=new_table, store=store, conn=conn)
+
+    _, keys, values = _split_columns(conn, prod_schema, prod_table, key_columns)
+    counts = _diff_counts(conn, f"{prod_schema}.{new_table}", prod, keys, values, quote)
+
+    _execute(conn, f"alter table {prod} rename to {old_table}")
+    _execute(conn, f"alter table {prod_schema}.{new_table} rename to {prod_table}")
+    _execute(conn, f"drop table {prod_schema}.{old_table}")
+    return counts
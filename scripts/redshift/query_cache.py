@@ -0,0 +1,238 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Optional, Dict, Any, List, Sequence
+
+import pandas as pd
+# Requires 'pyarrow' to be installed for the Parquet result files.
+
+
+# String literals and quoted identifiers are kept verbatim, everything else is normalized
+_QUOTED = re.compile(r"('(?:[^']|'')*'|\"(?:[^\"]|\"\")*\")")
+_COMMENTS = re.compile(r"--[^\n]*|/\*.*?\*/", re.DOTALL)
+_WHITESPACE = re.compile(r"\s+")
+_TABLE_REFERENCE = re.compile(r'\b(?:from|join)\s+((?:"[^"]+"|[\w$]+)(?:\.(?:"[^"]+"|[\w$]+)){0,2})', re.IGNORECASE)
+
+
+def normalize_sql(query: str) -> str:
+    """
+    Normalizes a SQL string so cosmetic differences do not produce different cache keys.
+
+    Comments are removed, whitespace is collapsed, keywords and identifiers are lowercased and
+    a trailing semicolon is dropped. Quoted strings and identifiers are left untouched.
+    """
+    parts = _QUOTED.split(query)
+    normalized = []
+    for i, part in enumerate(parts):
+        if i % 2:
+            normalized.append(part)  # a quoted literal/identifier
+        else:
+            part = _COMMENTS.sub(' ', part)
+            normalized.append(_WHITESPACE.sub(' ', part).lower())
+    return ''.join(normalized).strip().rstrip(';').strip()
+
+
+def referenced_tables(query: str) -> List[str]:
+    """Returns the (lowercased, unquoted) table names a query reads from via FROM/JOIN clauses."""
+    tables = set()
+    for match in _TABLE_REFERENCE.finditer(normalize_sql(query)):
+        tables.add(match.group(1).replace('"', '').lower())
+    return sorted(tables)
+
+
+class QueryCache:
+    """
+    An on-disk cache of query results, keyed on normalized SQL plus parameters and a namespace
+    naming the database they ran against (DataWarehouse passes host:port/database), so one cache
+    directory can serve several warehouses.
+
+    Results are stored as Parquet files next to a small SQLite index that tracks expiry,
+    last access time, size and the tables each query reads from. The least recently used
+    results are evicted once the cache grows past `max_bytes`.
+    """
+
+    def __init__(self, directory: str, max_bytes: int = 512 * 1024 * 1024, default_ttl: float = 3600.0):
+        """
+        Parameters:
+            directory (str): Folder holding the Parquet files and index (created if missing).
+            max_bytes (int): Size cap for all cached results together.
+            default_ttl (float): Seconds a result stays valid unless a per-query ttl is given.
+        """
+        self.directory = os.path.expanduser(directory)
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        os.makedirs(self.directory, exist_ok=True)
+        self._index_path = os.path.join(self.directory, 'index.sqlite')
+        with self._connect() as db:
+            db.execute("pragma journal_mode=wal")
+            db.execute("""
+                create table if not exists entries (
+                    key text primary key,
+                    query text not null,
+                    created_at real not null,
+                    expires_at real not null,
+                    last_access real not null,
+                    size_bytes integer not null
+                )""")
+            db.execute("create table if not exists entry_tables (key text not null, table_name text not null)")
+            db.execute("create index if not exists entry_tables_by_name on entry_tables (table_name)")
+            db.execute("create index if not exists entries_by_access on entries (last_access)")
+
+    @contextmanager
+    def _connect(self):
+        """Opens the index, commits on success and always closes it."""
+        db = sqlite3.connect(self._index_path, timeout=30)
+        try:
+            with db:
+                yield db
+        finally:
+            db.close()
+
+    def _path_for(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.parquet")
+
+    @staticmethod
+    def make_key(query: str, params: Optional[Any] = None, namespace: str = '') -> str:
+        """Returns the cache key for a query and its parameters, run against the `namespace` database."""
+        payload = json.dumps([namespace, normalize_sql(query), params], sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _remove(self, db, keys: Sequence[str]):
+        for key in keys:
+            db.execute("delete from entries where key = ?", (key,))
+            db.execute("delete from entry_tables where key = ?", (key,))
+            try:
+                os.remove(self._path_for(key))
+            except FileNotFoundError:
+                pass
+
+    def get(self, query: str, params: Optional[Any] = None, namespace: str = '') -> Optional[pd.DataFrame]:
+        """
+        Returns the cached result for a query, or None if it is missing or expired.
+        """
+        key = self.make_key(query, params, namespace)
+        now = time.time()
+        with self._lock, self._connect() as db:
+            row = db.execute("select expires_at from entries where key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            if row[0] <= now:
+                self._remove(db, [key])
+                self.misses += 1
+                return None
+            try:
+                df = pd.read_parquet(self._path_for(key))
+            except (FileNotFoundError, OSError):
+                # Index and files out of sync (e.g. files cleaned up by hand)
+                self._remove(db, [key])
+                self.misses += 1
+                return None
+            db.execute("update entries set last_access = ? where key = ?", (now, key))
+            self.hits += 1
+            return df
+
+    def put(self, query: str, df: pd.DataFrame, params: Optional[Any] = None, ttl: Optional[float] = None,
+            tables: Optional[Sequence[str]] = None, namespace: str = '') -> bool:
+        """
+        Stores a query result.
+
+        Caching is best effort: a frame Parquet cannot store (duplicate column names from a join,
+        object columns mixing types...) is logged and left uncached rather than failing the query.
+
+        Parameters:
+            query (str): The SQL query the result came from.
+            df (pd.DataFrame): The result to cache.
+            params: The query parameters, if any.
+            ttl (float): Seconds this result stays valid (defaults to default_ttl).
+            tables (list): Tables to register for invalidation. Parsed from the query when omitted.
+            namespace (str): The database the query ran against.
+
+        Returns:
+            bool: True if the result was cached.
+        """
+        key = self.make_key(query, params, namespace)
+        path = self._path_for(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            df.to_parquet(tmp_path, index=False)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            print(f"Could not cache query result, returning it uncached: {e.__class__.__name__}: {e}")
+            try:
+                os.remove(tmp_path)
+            except FileNotFoundError:
+                pass
+            return False
+
+        now = time.time()
+        ttl = self.default_ttl if ttl is None else ttl
+        tables = referenced_tables(query) if tables is None else [t.lower() for t in tables]
+        with self._lock, self._connect() as db:
+            db.execute("delete from entry_tables where key = ?", (key,))
+            db.execute(
+                "insert or replace into entries (key, query, created_at, expires_at, last_access, size_bytes) values (?, ?, ?, ?, ?, ?)",
+                (key, normalize_sql(query), now, now + ttl, now, os.path.getsize(path)))
+            db.executemany("insert into entry_tables (key, table_name) values (?, ?)", [(key, t) for t in tables])
+            self._evict(db)
+        return True
+
+    def _evict(self, db):
+        """Drops expired entries, then least recently used ones until the cache fits in max_bytes."""
+        expired = [r[0] for r in db.execute("select key from entries where expires_at <= ?", (time.time(),))]
+        self._remove(db, expired)
+
+        total = db.execute("select coalesce(sum(size_bytes), 0) from entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        victims = []
+        for key, size in db.execute("select key, size_bytes from entries order by last_access"):
+            if total <= self.max_bytes:
+                break
+            victims.append(key)
+            total -= size
+        self._remove(db, victims)
+
+    def invalidate(self, query: str, params: Optional[Any] = None, namespace: str = ''):
+        """Drops the cached result for one query."""
+        with self._lock, self._connect() as db:
+            self._remove(db, [self.make_key(query, params, namespace)])
+
+    def invalidate_table(self, table: str) -> int:
+        """
+        Drops every cached result that reads from `table`.
+
+        Accepts either 'schema.table' (exact match) or a bare table name (matches it in any schema).
+
+        Returns:
+            int: Number of cached results removed.
+        """
+        table = table.replace('"', '').lower()
+        suffix = f".{table}"
+        with self._lock, self._connect() as db:
+            # Compare the suffix literally, like would treat the _ in sku_privileges as a wildcard
+            keys = [r[0] for r in db.execute(
+                "select distinct key from entry_tables where table_name = ? or substr(table_name, -?) = ?",
+                (table, len(suffix), suffix))]
+            self._remove(db, keys)
+        return len(keys)
+
+    def clear(self):
+        """Drops every cached result."""
+        with self._lock, self._connect() as db:
+            self._remove(db, [r[0] for r in db.execute("select key from entries")])
+
+    def stats(self) -> Dict[str, int]:
+        """Returns hit/miss counters plus the number and total size of cached results."""
+        with self._lock, self._connect() as db:
+            entries, size = db.execute("select count(*), coalesce(sum(size_bytes), 0) from entries").fetchone()
+        return {'hits': self.hits, 'misses': self.misses, 'entries': entries, 'size_bytes': size}
@@ -1,7 +1,347 @@
 import pandas as pd
 # Requires 'psycopg2' to be installed in the environment for actual database connection.
 import psycopg2 
-from typing import Optional, Dict, Any
+from psycopg2.extras import execute_values
+import gzip
+import os
+import re
+import tempfile
+import threading
+import time
+import uuid
+from collections import deque
+from concurrent.futures import CancelledError, ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from typing import Optional, Dict, Any, Callable, Iterator, List, Sequence, Tuple, Union
+
+
+class ConnectionPool:
+    """
+    A bounded, thread-safe pool of DB-API connections.
+
+    Connections are created lazily through the supplied `connect` callable, health-checked
+    before they are handed out, and closed once they have sat idle for longer than
+    `idle_timeout` seconds. Any DB-API 2.0 driver (psycopg2, or a fake one in tests) works.
+    """
+
+    def __init__(self, connect: Callable[[], Any], max_size: int = 5, idle_timeout: float = 300.0,
+                 health_check_query: str = 'select 1', acquire_timeout: Optional[float] = 30.0):
+        """
+        Parameters:
+            connect (callable): Zero-argument factory returning a new DB-API connection.
+            max_size (int): Maximum number of connections open at once (idle + borrowed).
+            idle_timeout (float): Seconds an idle connection may live before it is evicted.
+            health_check_query (str): Query run on an idle connection before it is reused.
+            acquire_timeout (float): Seconds to wait for a free connection before giving up (None waits forever).
+        """
+        if max_size < 1:
+            raise ValueError(f"Configuration Error: pool max_size must be at least 1, got {max_size}")
+
+        self._connect = connect
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.health_check_query = health_check_query
+        self.acquire_timeout = acquire_timeout
+
+        self._idle = deque()  # (connection, last_returned_at), most recently returned on the right
+        self._size = 0        # open connections, idle + borrowed
+        self._closed = False
+        self._cond = threading.Condition()
+
+        # Counters, read them through stats()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.failed_health_checks = 0
+
+    def _evict_idle(self):
+        """Closes idle connections past idle_timeout. Caller must hold the lock."""
+        now = time.monotonic()
+        # Oldest connections sit on the left of the deque
+        while self._idle and now - self._idle[0][1] > self.idle_timeout:
+            conn, _ = self._idle.popleft()
+            self._size -= 1
+            self.evictions += 1
+            self._close_quietly(conn)
+
+    @staticmethod
+    def _close_quietly(conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def _is_healthy(self, conn) -> bool:
+        """Returns True if the connection is open and answers the health check query."""
+        if getattr(conn, 'closed', 0):
+            return False
+        try:
+            cursor = conn.cursor()
+            try:
+                cursor.execute(self.health_check_query)
+                cursor.fetchone()
+            finally:
+                cursor.close()
+            # Do not leave the health check's implicit transaction open for the borrower
+            conn.rollback()
+            return True
+        except Exception:
+            return False
+
+    def acquire(self, timeout: Optional[float] = None):
+        """
+        Borrows a connection, reusing a healthy idle one when possible.
+
+        Parameters:
+            timeout (float): Overrides acquire_timeout for this call.
+
+        Returns:
+            A live DB-API connection. Hand it back with release().
+        """
+        timeout = self.acquire_timeout if timeout is None else timeout
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        while True:
+            with self._cond:
+                while True:
+                    if self._closed:
+                        raise RuntimeError("Connection pool is closed.")
+                    self._evict_idle()
+                    if self._idle:
+                        conn, _ = self._idle.pop()
+                        reuse = True
+                        break
+                    if self._size < self.max_size:
+                        # Reserve the slot now, connect outside the lock
+                        self._size += 1
+                        reuse = False
+                        break
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        raise TimeoutError(f"Timed out waiting for a database connection (pool size {self.max_size}).")
+                    self._cond.wait(remaining)
+
+            if not reuse:
+                try:
+                    conn = self._connect()
+                except Exception:
+                    with self._cond:
+                        self._size -= 1
+                        self._cond.notify()
+                    raise
+                with self._cond:
+                    self.misses += 1
+                return conn
+
+            if self._is_healthy(conn):
+                with self._cond:
+                    self.hits += 1
+                return conn
+
+            # Stale connection (server restart, idle disconnect...), drop it and try again
+            self._close_quietly(conn)
+            with self._cond:
+                self._size -= 1
+                self.failed_health_checks += 1
+                self._cond.notify()
+
+    def release(self, conn, discard: bool = False):
+        """
+        Returns a borrowed connection to the pool.
+
+        Any open transaction is rolled back, commit before releasing if you wrote data.
+
+        Parameters:
+            conn: The connection obtained from acquire().
+            discard (bool): Close the connection instead of keeping it (e.g. after an error).
+        """
+        if not discard:
+            try:
+                conn.rollback()
+            except Exception:
+                discard = True
+
+        with self._cond:
+            if discard or self._closed:
+                self._size -= 1
+                self._close_quietly(conn)
+            else:
+                self._idle.append((conn, time.monotonic()))
+                self._evict_idle()
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self, timeout: Optional[float] = None):
+        """
+        Context manager that borrows a connection and always hands it back.
+
+        The connection is discarded rather than reused if the block raises.
+        """
+        conn = self.acquire(timeout)
+        discard = False
+        try:
+            yield conn
+        except Exception:
+            discard = True
+            raise
+        finally:
+            # finally (not else) so an abandoned generator still hands its connection back
+            self.release(conn, discard=discard)
+
+    def close(self):
+        """Closes all idle connections. Borrowed connections are closed as they are released."""
+        with self._cond:
+            self._closed = True
+            while self._idle:
+                conn, _ = self._idle.popleft()
+                self._size -= 1
+                self._close_quietly(conn)
+            self._cond.notify_all()
+
+    def stats(self) -> Dict[str, int]:
+        """Returns the pool counters and current occupancy."""
+        with self._cond:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'failed_health_checks': self.failed_health_checks,
+                'open': self._size,
+                'idle': len(self._idle),
+                'in_use': self._size - len(self._idle),
+                'max_size': self.max_size,
+            }
+
+
+class QueryBatch:
+    """
+    Handle on a batch of queries started by DataWarehouse.submit_many().
+
+    The queries run on a bounded set of worker threads, each holding one connection while its query
+    runs. Read results as they finish with as_completed(), or all at once with results(). cancel()
+    drops the queries still waiting and cancels the running ones on the server.
+    """
+
+    def __init__(self, warehouse, queries: Dict[str, Union[str, Tuple[str, Optional[Sequence]]]], max_workers: int,
+                 timeout: Optional[float] = None):
+        self.warehouse = warehouse
+        self.timeout = timeout
+        self.started = time.perf_counter()
+        self._lock = threading.Lock()
+        self._running = {}  # name -> connection its query is running on
+        self._timed_out = set()
+        self._cancelled = False
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='dw_query')
+        self._futures = {}
+        for name, query in queries.items():
+            query, params = (query, None) if isinstance(query, str) else query
+            self._futures[self._executor.submit(self._run, name, query, params)] = name
+        # Workers keep going on their own, this only stops new submissions
+        self._executor.shutdown(wait=False)
+
+    def _cancel_query(self, name):
+        """Timer callback, cancels a query that ran past the timeout."""
+        # Under the lock, so the connection cannot go back to the pool (and another query) meanwhile
+        with self._lock:
+            conn = self._running.get(name)
+            if conn is not None:
+                self._timed_out.add(name)
+                conn.cancel()
+
+    def _run(self, name, query, params):
+        cache = self.warehouse.cache
+        if cache is not None:
+            df = cache.get(query, params, namespace=self.warehouse.cache_namespace)
+            if df is not None:
+                return df
+
+        start = time.perf_counter()
+        with self.warehouse.connection() as conn:
+            with self._lock:
+                if self._cancelled:
+                    raise CancelledError(f"Query {name} was cancelled.")
+                self._running[name] = conn
+            # The timeout covers the query itself, not the wait for a free connection
+            timer = threading.Timer(self.timeout, self._cancel_query, (name,)) if self.timeout else None
+            if timer is not None:
+                timer.daemon = True
+                timer.start()
+            try:
+                df = pd.read_sql(query, conn, params=params)
+            except Exception as e:
+                with self._lock:
+                    if name in self._timed_out:
+                        raise TimeoutError(f"Query {name} was cancelled after exceeding the {self.timeout}s timeout.") from e
+                    if self._cancelled:
+                        raise CancelledError(f"Query {name} was cancelled.") from e
+                raise
+            finally:
+                if timer is not None:
+                    timer.cancel()
+                with self._lock:
+                    self._running.pop(name, None)
+
+        print(f"Query {name} finished in {time.perf_counter() - start:.2f}s. Fetched {len(df)} records.")
+        if cache is not None:
+            cache.put(query, df, params=params, namespace=self.warehouse.cache_namespace)
+        return df
+
+    def cancel(self) -> int:
+        """
+        Cancels every query that has not finished yet.
+
+        Returns:
+            int: Number of queries cancelled (waiting + running).
+        """
+        waiting = sum(1 for future in self._futures if future.cancel())
+        with self._lock:
+            self._cancelled = True
+            for conn in self._running.values():
+                # psycopg2 sends a cancel request to the server, the blocked read_sql then raises
+                conn.cancel()
+            return waiting + len(self._running)
+
+    def as_completed(self, timeout: Optional[float] = None) -> Iterator[Tuple[str, Optional[pd.DataFrame], Optional[BaseException]]]:
+        """
+        Yields (name, DataFrame or None, error or None) for each query, in the order they finish.
+
+        Parameters:
+            timeout (float): Overall seconds to wait for the whole batch (raises TimeoutError).
+        """
+        for future in as_completed(self._futures, timeout=timeout):
+            name = self._futures[future]
+            try:
+                yield name, future.result(), None
+            except (Exception, CancelledError) as e:
+                yield name, None, e
+
+    def results(self, raise_errors: bool = True, timeout: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Waits for the batch and returns {name: DataFrame}.
+
+        Parameters:
+            raise_errors (bool): On the first failed query, cancel the rest and raise. Set False to
+                get every query's outcome, failed ones mapped to their exception.
+            timeout (float): Overall seconds to wait for the whole batch.
+        """
+        results = {}
+        for name, df, error in self.as_completed(timeout):
+            if error is not None and raise_errors:
+                self.cancel()
+                raise RuntimeError(f"Query {name} failed: {error}") from error
+            results[name] = df if error is None else error
+        failed = sum(1 for value in results.values() if isinstance(value, BaseException))
+        print(f"Ran {len(results)} queries in {time.perf_counter() - self.started:.2f}s, {failed} failed.")
+        # Same order the queries were submitted in
+        return {name: results[name] for name in self._futures.values()}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        # Leaving the block early (error, break...) should not leave queries running on the cluster
+        self.cancel()
+
 
 class DataWarehouse:
     """
@@ -11,7 +351,8 @@ class DataWarehouse:
     to be passed in, typically sourced from secure environment variables.
     """
     
-    def __init__(self, user: str, password: str, connection: str, host: Optional[str] = None, port: int = 5439, database: str = 'warehouse'):
+    def __init__(self, user: str, password: str, connection: str, host: Optional[str] = None, port: int = 5439, database: str = 'warehouse',
+                 pool_size: Optional[int] = None, pool_idle_timeout: float = 300.0, cache=None):
         """
         Initializes the DataWarehouse connection parameters.
         
@@ -22,6 +363,11 @@ class DataWarehouse:
             host (str): Redshift cluster host address (required, defaults to None).
             port (int): Redshift cluster port.
             database (str): Redshift database name.
+            pool_size (int): If set, keep up to this many connections open and reuse them across queries.
+                Leave as None to open and close a connection per query.
+            pool_idle_timeout (float): Seconds a pooled connection may sit idle before it is closed.
+            cache (QueryCache): Optional result cache (see query_cache.py). When set, get_pandas_df
+                serves repeated queries from local disk until their ttl runs out.
         """
         self.user = user
         self.password = password
@@ -49,7 +395,14 @@ class DataWarehouse:
         # This is the expected connection string format for psycopg2:
         self.conn_details = f"dbname={self.database} user={self.user} password={self.password} host={self.host} port={self.port}"
         
-        print(f"DataWarehouse connection details configured (Host: {self.host}, User: {self.user})")
+        self.cache = cache
+        # Keeps results from different clusters/databases apart when they share a cache directory
+        self.cache_namespace = f"{self.host}:{self.port}/{self.database}"
+        self.pool = None
+        if pool_size:
+            self.pool = ConnectionPool(self._get_db_connection, max_size=pool_size, idle_timeout=pool_idle_timeout)
+
+        print(f"DataWarehouse connection details configured (Host: {self.host}, User: {self.user}, Pool size: {pool_size or 'off'})")
 
 
     def _get_db_connection(self):
@@ -67,29 +420,374 @@ class DataWarehouse:
             raise ValueError(f"Unsupported connection type: {self.connection_type}. Only 'psycopg2' is supported.")
 
 
-    def get_pandas_df(self, query: str) -> pd.DataFrame:
+    @contextmanager
+    def connection(self):
+        """
+        Borrows a database connection for the duration of a `with` block.
+
+        In pooled mode the connection goes back to the pool afterwards (any open transaction
+        is rolled back, so commit writes inside the block); otherwise it is closed.
+
+        Usage:
+            with dw.connection() as conn:
+                df = pd.read_sql(query, conn)
+        """
+        if self.pool is not None:
+            with self.pool.connection() as conn:
+                yield conn
+            return
+
+        conn = self._get_db_connection()
+        try:
+            yield conn
+        finally:
+            conn.close()
+            print("Database connection closed.")
+
+    def pool_stats(self) -> Dict[str, int]:
+        """Returns pool hit/miss counters, or an empty dict when pooling is off."""
+        return self.pool.stats() if self.pool is not None else {}
+
+    def invalidate_cache(self, table: str) -> int:
+        """
+        Drops cached results that read from `table` ('schema.table' or a bare table name).
+
+        Returns:
+            int: Number of cached results removed (0 when no cache is configured).
+        """
+        if self.cache is None:
+            return 0
+        removed = self.cache.invalidate_table(table)
+        print(f"Invalidated {removed} cached results for {table}.")
+        return removed
+
+    def close(self):
+        """Closes any pooled connections. Safe to call when pooling is off."""
+        if self.pool is not None:
+            self.pool.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+    def get_pandas_df(self, query: str, params: Optional[Sequence] = None, ttl: Optional[float] = None,
+                      use_cache: bool = True) -> pd.DataFrame:
         """
         Executes a SQL query and returns the results as a pandas DataFrame.
         
         Parameters:
             query (str): The SQL query to execute.
+            params (sequence): Optional query parameters, passed through to psycopg2.
+            ttl (float): Seconds to keep this result in the cache (defaults to the cache's default_ttl).
+            use_cache (bool): Set False to bypass the cache for this call (the fresh result is still stored).
             
         Returns:
             pd.DataFrame: DataFrame containing query results.
         """
-        conn = None
+        if self.cache is not None and use_cache:
+            df = self.cache.get(query, params, namespace=self.cache_namespace)
+            if df is not None:
+                print(f"Query served from cache. Fetched {len(df)} records.")
+                return df
+
         try:
             print("--- Establishing Redshift Connection and Executing Query ---")
-            conn = self._get_db_connection()
-            # pandas.read_sql handles the connection cursor and fetching data efficiently
-            df = pd.read_sql(query, conn)
+            with self.connection() as conn:
+                # pandas.read_sql handles the connection cursor and fetching data efficiently
+                df = pd.read_sql(query, conn, params=params)
             print(f"Query executed successfully. Fetched {len(df)} records.")
-            return df
         except Exception as e:
             # Provide more context on database failure
             print(f"CRITICAL DATABASE ERROR during query execution: {e}")
             raise
+
+        if self.cache is not None:
+            self.cache.put(query, df, params=params, ttl=ttl, namespace=self.cache_namespace)
+        return df
+
+    def submit_many(self, queries: Dict[str, Union[str, Tuple[str, Optional[Sequence]]]], max_concurrency: int = 4,
+                    timeout: Optional[float] = None) -> QueryBatch:
+        """
+        Starts a batch of independent queries running concurrently and returns at once.
+
+        Each query runs on its own connection. In pooled mode at most pool_size run at a time, so the
+        pool bounds the fan-out; otherwise at most `max_concurrency` connections are opened at once.
+
+        Usage:
+            with dw.submit_many({'brands': brand_query, 'tickets': (ticket_query, [since])}, timeout=300) as batch:
+                for name, df, error in batch.as_completed():
+                    ...
+
+        Parameters:
+            queries (dict): {name: query} or {name: (query, params)}.
+            max_concurrency (int): Queries running at once when pooling is off.
+            timeout (float): Seconds each query may run before it is cancelled on the server and
+                reported as a TimeoutError (None for no limit).
+
+        Returns:
+            QueryBatch: Handle to read results from and cancel the batch with.
+        """
+        workers = self.pool.max_size if self.pool is not None else max_concurrency
+        if workers < 1:
+            raise ValueError(f"max_concurrency must be at least 1, got {workers}")
+        print(f"--- Running {len(queries)} queries, up to {min(workers, len(queries))} at a time ---")
+        return QueryBatch(self, queries, max_workers=max(1, min(workers, len(queries))), timeout=timeout)
+
+    def run_many(self, queries: Dict[str, Union[str, Tuple[str, Optional[Sequence]]]], max_concurrency: int = 4,
+                 timeout: Optional[float] = None, raise_errors: bool = True) -> Dict[str, Any]:
+        """
+        Runs a batch of independent queries concurrently and returns {name: DataFrame}.
+
+        Wall-clock time is close to the slowest query's rather than the sum of all of them.
+        See submit_many() for the parameters; with raise_errors=False failed queries map to their
+        exception instead of aborting the batch.
+        """
+        with self.submit_many(queries, max_concurrency, timeout) as batch:
+            return batch.results(raise_errors)
+
+
+    def _iter_row_chunks(self, query: str, chunksize: int, params: Optional[Sequence] = None) -> Iterator[Tuple[List[str], list]]:
+        """
+        Runs a query through a server-side (named) cursor and yields (column_names, rows) per chunk.
+
+        Only `chunksize` rows are ever held client-side, the rest stay on the cluster until fetched.
+        The connection is held until the generator is exhausted or closed.
+        """
+        if chunksize < 1:
+            raise ValueError(f"chunksize must be at least 1, got {chunksize}")
+
+        with self.connection() as conn:
+            # A named cursor makes psycopg2 DECLARE a server-side cursor instead of buffering everything
+            cursor = conn.cursor(name=f"dw_stream_{uuid.uuid4().hex[:12]}")
+            cursor.itersize = chunksize
+            try:
+                cursor.execute(query, params)
+                while True:
+                    rows = cursor.fetchmany(chunksize)
+                    if not rows:
+                        break
+                    # Named cursors only populate description after the first fetch
+                    yield [col[0] for col in cursor.description], rows
+            finally:
+                cursor.close()
+
+    def iter_pandas_df(self, query: str, chunksize: int = 50000, params: Optional[Sequence] = None) -> Iterator[pd.DataFrame]:
+        """
+        Executes a SQL query and yields the results as DataFrames of at most `chunksize` rows.
+
+        Memory stays flat however large the result set is, as long as the caller does not keep
+        every chunk around.
+
+        Parameters:
+            query (str): The SQL query to execute.
+            chunksize (int): Maximum number of rows per DataFrame.
+            params (sequence): Optional query parameters, passed through to psycopg2.
+
+        Yields:
+            pd.DataFrame: The next chunk of query results.
+        """
+        total = 0
+        for columns, rows in self._iter_row_chunks(query, chunksize, params):
+            total += len(rows)
+            yield pd.DataFrame.from_records(rows, columns=columns)
+        print(f"Query streamed successfully. Fetched {total} records.")
+
+    def iter_arrow_batches(self, query: str, chunksize: int = 50000, params: Optional[Sequence] = None):
+        """
+        Executes a SQL query and yields the results as pyarrow RecordBatches of at most `chunksize` rows.
+
+        Requires 'pyarrow' to be installed.
+
+        Parameters:
+            query (str): The SQL query to execute.
+            chunksize (int): Maximum number of rows per batch.
+            params (sequence): Optional query parameters, passed through to psycopg2.
+
+        Yields:
+            pyarrow.RecordBatch: The next chunk of query results.
+        """
+        import pyarrow as pa
+
+        for columns, rows in self._iter_row_chunks(query, chunksize, params):
+            # Transpose the row tuples into columns without going through pandas
+            arrays = [pa.array(list(values)) for values in zip(*rows)]
+            yield pa.RecordBatch.from_arrays(arrays, names=columns)
+
+    def export_query_to_file(self, query: str, path: str, file_format: str = 'parquet', chunksize: int = 50000,
+                             params: Optional[Sequence] = None, schema=None) -> int:
+        """
+        Streams the results of a SQL query straight to a Parquet or CSV file, chunk by chunk.
+
+        The full result set is never built in memory. CSV paths ending in '.gz' are gzip compressed.
+
+        Parameters:
+            query (str): The SQL query to execute.
+            path (str): Output file path.
+            file_format (str): 'parquet' (requires 'pyarrow') or 'csv'.
+            chunksize (int): Rows fetched and written per chunk.
+            params (sequence): Optional query parameters, passed through to psycopg2.
+            schema (pyarrow.Schema): Optional Parquet schema. By default the first chunk's inferred
+                schema is used and later chunks are cast to it.
+
+        Returns:
+            int: Number of rows written.
+        """
+        total = 0
+
+        if file_format == 'parquet':
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            writer = None
+            try:
+                for batch in self.iter_arrow_batches(query, chunksize, params):
+                    table = pa.Table.from_batches([batch])
+                    if writer is None:
+                        writer = pq.ParquetWriter(path, schema or table.schema)
+                    if not table.schema.equals(writer.schema):
+                        table = table.cast(writer.schema)
+                    writer.write_table(table)
+                    total += batch.num_rows
+            finally:
+                if writer is not None:
+                    writer.close()
+            if writer is None:
+                print(f"Query returned no rows, {path} was not written.")
+                return 0
+
+        elif file_format == 'csv':
+            opener = gzip.open if path.endswith('.gz') else open
+            with opener(path, 'wt', newline='') as handle:
+                for chunk in self.iter_pandas_df(query, chunksize, params):
+                    chunk.to_csv(handle, header=(total == 0), index=False)
+                    total += len(chunk)
+
+        else:
+            raise ValueError(f"Unsupported file format: {file_format}. Use 'parquet' or 'csv'.")
+
+        print(f"Exported {total} records to {path}.")
+        return total
+
+    def run(self, query: str, params: Optional[Sequence] = None, conn=None) -> int:
+        """
+        Executes a statement that returns no rows (DDL, insert, merge...) and commits it.
+
+        Parameters:
+            query (str): The SQL statement to execute.
+            params (sequence): Optional query parameters, passed through to psycopg2.
+            conn: Run on this connection instead and leave committing to the caller
+                (e.g. to group several statements in one transaction).
+
+        Returns:
+            int: The statement's rowcount (-1 when the driver does not report one).
+        """
+        if conn is not None:
+            with conn.cursor() as cursor:
+                cursor.execute(query, params)
+                return cursor.rowcount
+
+        with self.connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute(query, params)
+                rowcount = cursor.rowcount
+            conn.commit()
+        return rowcount
+
+    @staticmethod
+    def _quote_identifier(name: str) -> str:
+        """Leaves plain identifiers alone (so case folding still applies) and quotes anything else."""
+        if re.match(r'^[A-Za-z_][A-Za-z0-9_$]*$', name):
+            return name
+        return '"' + name.replace('"', '""') + '"'
+
+    def _insert_with_execute_values(self, cursor, target: str, df: pd.DataFrame, columns: List[str], page_size: int = 1000):
+        """Loads a (small) frame with multi-row INSERTs built by psycopg2's execute_values."""
+        column_list = ', '.join(self._quote_identifier(c) for c in columns)
+        # NaN/NaT -> NULL
+        values = df[columns].astype(object).where(pd.notna(df[columns]), None)
+        rows = list(values.itertuples(index=False, name=None))
+        execute_values(cursor, f"insert into {target} ({column_list}) values %s", rows, page_size=page_size)
+
+    def copy_dataframe(self, df: pd.DataFrame, schema: str, table: str, store=None, file_format: str = 'csv',
+                       columns: Optional[List[str]] = None, small_frame_threshold: int = 1000, conn=None) -> int:
+        """
+        Bulk loads a DataFrame into an existing table with a single COPY statement.
+
+        The frame is serialized to a gzip CSV (or Parquet) file, staged in `store` and loaded in one
+        COPY, which Redshift parallelizes across slices. Frames with at most `small_frame_threshold`
+        rows, or calls without a store, fall back to batched execute_values INSERTs where the
+        staging round trip is not worth it.
+
+        Parameters:
+            df (pd.DataFrame): Data to load. Column names must match the target table's.
+            schema (str): Target schema.
+            table (str): Target table.
+            store: An object store from object_store.py (S3ObjectStore for Redshift,
+                LocalObjectStore for local Postgres/tests).
+            file_format (str): 'csv' (gzip compressed) or 'parquet'. Parquet needs an S3 store.
+            columns (list): Columns to load, in order (defaults to all of df's columns).
+            small_frame_threshold (int): Row count at or below which execute_values is used.
+            conn: Load on this connection and leave committing to the caller.
+
+        Returns:
+            int: Number of rows loaded.
+        """
+        columns = list(columns or df.columns)
+        target = f"{schema}.{table}"
+        if file_format not in ('csv', 'parquet'):
+            raise ValueError(f"Unsupported file format: {file_format}. Use 'csv' or 'parquet'.")
+
+        def load(conn):
+            with conn.cursor() as cursor:
+                if store is None or len(df) <= small_frame_threshold:
+                    print(f"Loading {len(df)} rows into {target} with execute_values.")
+                    self._insert_with_execute_values(cursor, target, df, columns)
+                else:
+                    self._copy_from_store(cursor, df, target, columns, store, file_format)
+
+        if conn is not None:
+            load(conn)
+        else:
+            with self.connection() as conn:
+                load(conn)
+                conn.commit()
+
+        if self.cache is not None:
+            self.invalidate_cache(target)
+        return len(df)
+
+    def _copy_from_store(self, cursor, df: pd.DataFrame, target: str, columns: List[str], store, file_format: str):
+        """Serializes df, stages it in the object store and runs the COPY."""
+        column_list = ', '.join(self._quote_identifier(c) for c in columns)
+        extension = 'csv.gz' if file_format == 'csv' else 'parquet'
+        key = f"{target.replace('.', '/')}/{uuid.uuid4().hex}.{extension}"
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            local_path = os.path.join(tmp_dir, f"load.{extension}")
+            if file_format == 'csv':
+                df[columns].to_csv(local_path, index=False, header=True, compression='gzip')
+            else:
+                df[columns].to_parquet(local_path, index=False)
+
+            location = store.put(local_path, key)
+            print(f"Staged {len(df)} rows for {target} at {location}.")
+
+        try:
+            if hasattr(store, 'copy_source'):
+                if file_format == 'csv':
+                    options = "format as csv gzip ignoreheader 1 emptyasnull"
+                else:
+                    options = "format as parquet"
+                cursor.execute(f"copy {target} ({column_list}) {store.copy_source(key)} {options}")
+            else:
+                if file_format != 'csv':
+                    raise ValueError("Parquet loads need an S3 store, local stores can only stream CSV.")
+                # Postgres stand-in: stream the staged file through the client connection
+                with store.open(key) as handle, gzip.GzipFile(fileobj=handle) as csv_stream:
+                    cursor.copy_expert(f"copy {target} ({column_list}) from stdin with (format csv, header true)", csv_stream)
+            print(f"COPY into {target} finished.")
         finally:
-            if conn:
-                conn.close()
-                print("Database connection closed.")
+            store.delete(key)
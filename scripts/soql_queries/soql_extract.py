@@ -0,0 +1,344 @@
+import argparse
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+import requests
+from requests.adapters import HTTPAdapter
+
+# Renders ticket_creation_query.soql with parameters, pages through the Salesforce REST query API
+# and flattens the nested relationships into one table per object, streamed to a sink.
+#
+#   python soql_extract.py --start 2025-07-01 --end 2025-08-01 --window-days 7 --out extract/
+
+QUERY_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'ticket_creation_query.soql')
+API_VERSION = 'v59.0'
+
+ROOT_TABLE = 'brand_accounts'
+# Child relationship -> output table
+CHILD_TABLES = {
+    'Client_Brand__r': 'client_brands',
+    'Brand_Admins__r': 'brand_admins',
+    'Provisioning_Lines__r': 'provisioning_lines',
+}
+PARENT_KEY = 'Brand_Account__c'
+
+LINE_COMMENT = re.compile(r'//[^\n]*')
+RELATIVE_WINDOW = re.compile(r'([\w.]+)\s*=\s*LAST_N_DAYS:\d+')
+PREVIOUS_DAY = re.compile(r'([\w.]+)\s*=\s*YESTERDAY\b')
+CURRENT_DAY = re.compile(r'\bTODAY\b')
+# Trigger branch with no date condition, it matches every active line whatever the window
+CATCH_ALL = re.compile(r' OR \( Disabled_Date__c = NULL AND Active__c = TRUE AND Quantity_Allocated__c > 0 \)')
+BRAND_ADMIN_CUTOFF = re.compile(r'(DAY_ONLY\(ba\.CreatedDate\)\s*>\s*)\d{4}-\d{2}-\d{2}')
+DATETIME_FIELDS = ('CreatedDate', 'LastModifiedDate', 'SystemModstamp')
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+def _literal(field, value):
+    """SOQL literal for a date bound: datetime fields need a full UTC timestamp, date fields a plain date."""
+    if field.split('.')[-1] in DATETIME_FIELDS:
+        return f'{value.isoformat()}T00:00:00Z'
+    return value.isoformat()
+
+
+def _quote(value):
+    return "'" + str(value).replace('\\', '\\\\').replace("'", "\\'") + "'"
+
+
+def _bounds(field, start, end):
+    return f'({field} >= {_literal(field, start)} AND {field} < {_literal(field, end)})'
+
+
+def render_query(start=None, end=None, brand_names=None, brand_ids=None, brand_admins_created_after=None, template=None,
+                 catch_all=True):
+    """
+    Renders the ticket creation query.
+
+    Args:
+        start, end: Optional date window [start, end), evaluated as if the query ran on each of its days:
+            LAST_N_DAYS:3 triggers become [start, end), YESTERDAY triggers [start - 1, end - 1) and TODAY
+            the window's last day, so a past range can be re-extracted and consecutive windows do not
+            re-match each other's triggers.
+        brand_names: Only include these Brand_Account__c names.
+        brand_ids: Only include these Brand_Account__c IDs.
+        brand_admins_created_after: Replaces the hard-coded Brand_Admins cutoff date (a date).
+        template: Query text to render (defaults to ticket_creation_query.soql).
+        catch_all: With a window, keep the trigger branch that matches every active line regardless
+            of dates. extract() keeps it in one window only.
+
+    Returns:
+        The SOQL string, comments stripped and whitespace collapsed.
+    """
+    if template is None:
+        with open(QUERY_PATH) as infile:
+            template = infile.read()
+
+    # SOQL has no comment syntax, the // notes in the file are for people only
+    query = ' '.join(LINE_COMMENT.sub('', template).split())
+
+    if (start is None) != (end is None):
+        raise ValueError('start and end must be given together')
+    if start is not None:
+        one_day = timedelta(days=1)
+        query = RELATIVE_WINDOW.sub(lambda m: _bounds(m.group(1), start, end), query)
+        query = PREVIOUS_DAY.sub(lambda m: _bounds(m.group(1), start - one_day, end - one_day), query)
+        query = CURRENT_DAY.sub((end - one_day).isoformat(), query)
+        if not catch_all:
+            query, removed = CATCH_ALL.subn('', query)
+            if not removed:
+                raise ValueError('Catch-all trigger branch not found in the query, update CATCH_ALL to match it')
+    if brand_admins_created_after is not None:
+        query = BRAND_ADMIN_CUTOFF.sub(lambda m: m.group(1) + brand_admins_created_after.isoformat(), query)
+
+    filters = []
+    if brand_names:
+        filters.append(f"bac.Name IN ({', '.join(_quote(name) for name in brand_names)})")
+    if brand_ids:
+        filters.append(f"bac.Id IN ({', '.join(_quote(brand_id) for brand_id in brand_ids)})")
+    if filters:
+        query = query + ' AND ' + ' AND '.join(filters)
+
+    return query
+
+
+def split_windows(start, end, window_days):
+    """Splits [start, end) into consecutive windows of at most window_days days."""
+    windows = []
+    current = start
+    while current < end:
+        window_end = min(current + timedelta(days=window_days), end)
+        windows.append((current, window_end))
+        current = window_end
+    return windows
+
+
+class SalesforceClient:
+    """
+    Minimal Salesforce REST query client with a pooled session, following nextRecordsUrl cursors.
+
+    Retries 429/5xx/connection errors with jittered exponential backoff, like OdoApiClient.
+    """
+
+    def __init__(self, instance_url=None, access_token=None, api_version=API_VERSION, max_connections=8, timeout=120,
+                 max_retries=4):
+        """
+        Args:
+            instance_url: e.g. https://qualtrics.my.salesforce.com (defaults to SF_INSTANCE_URL).
+                Point it at a recorded/fake endpoint for tests.
+            access_token: OAuth access token (defaults to SF_ACCESS_TOKEN).
+            max_retries: Attempts per request before giving up.
+        """
+        self.instance_url = (instance_url or os.getenv('SF_INSTANCE_URL') or '').rstrip('/')
+        access_token = access_token or os.getenv('SF_ACCESS_TOKEN')
+        if not self.instance_url or not access_token:
+            raise ValueError('SF_INSTANCE_URL and SF_ACCESS_TOKEN must be set.')
+        self.api_version = api_version
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.session = requests.Session()
+        self.session.headers.update({'Authorization': f'Bearer {access_token}'})
+        adapter = HTTPAdapter(pool_connections=max_connections, pool_maxsize=max_connections)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def _backoff(self, attempt, retry_after=None):
+        # Full jitter so parallel windows do not retry in lockstep
+        delay = random.uniform(0, min(30, 0.5 * 2 ** attempt))
+        if retry_after:
+            delay = max(delay, float(retry_after))
+        time.sleep(delay)
+
+    def _get(self, path, params=None):
+        url = f'{self.instance_url}{path}'
+        for attempt in range(1, self.max_retries + 1):
+            try:
+                response = self.session.get(url, params=params, timeout=self.timeout)
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt == self.max_retries:
+                    raise
+                self._backoff(attempt)
+                continue
+
+            if response.status_code in RETRY_STATUSES and attempt < self.max_retries:
+                self._backoff(attempt, response.headers.get('Retry-After'))
+                continue
+            response.raise_for_status()
+            return response.json()
+
+    def iter_pages(self, soql):
+        """Yields each page of a query result, following nextRecordsUrl until done."""
+        page = self._get(f'/services/data/{self.api_version}/query', {'q': soql})
+        while True:
+            yield page
+            if page.get('done', True) or not page.get('nextRecordsUrl'):
+                return
+            page = self._get(page['nextRecordsUrl'])
+
+    def iter_records(self, soql):
+        for page in self.iter_pages(soql):
+            for record in page.get('records', []):
+                yield record
+
+    def child_records(self, relationship):
+        """All records of a nested subquery result, fetching further pages if Salesforce cut it short."""
+        records = list(relationship.get('records', []))
+        next_url = None if relationship.get('done', True) else relationship.get('nextRecordsUrl')
+        while next_url:
+            page = self._get(next_url)
+            records.extend(page.get('records', []))
+            next_url = None if page.get('done', True) else page.get('nextRecordsUrl')
+        return records
+
+
+def flatten_record(record, prefix=''):
+    """Flattens parent relationships (Account__r.Owner.EIN__c) into dotted columns, dropping 'attributes'."""
+    row = {}
+    for key, value in record.items():
+        if key == 'attributes':
+            continue
+        if isinstance(value, dict) and 'records' not in value:
+            row.update(flatten_record(value, f'{prefix}{key}.'))
+        else:
+            row[f'{prefix}{key}'] = value
+    return row
+
+
+def normalize_record(client, record):
+    """
+    Splits one Brand_Account__c record into rows per table.
+
+    Yields:
+        (table_name, row) pairs, the brand account first.
+    """
+    # A subquery with no matches comes back as null rather than an empty result
+    children = {key: value for key, value in record.items()
+                if (isinstance(value, dict) and 'records' in value) or (key in CHILD_TABLES and value is None)}
+    parent = flatten_record({key: value for key, value in record.items() if key not in children})
+    yield ROOT_TABLE, parent
+    for relationship, result in children.items():
+        if result is None:
+            continue
+        table = CHILD_TABLES.get(relationship, relationship)
+        for child in client.child_records(result):
+            row = flatten_record(child)
+            row[PARENT_KEY] = parent.get('Id')
+            yield table, row
+
+
+class JsonlTableSink:
+    """Appends rows to one JSON-lines file per table as they stream in. Thread-safe."""
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self.counts = {}
+        self._handles = {}
+        self._lock = threading.Lock()
+
+    def write(self, table, row):
+        with self._lock:
+            if table not in self._handles:
+                self._handles[table] = open(os.path.join(self.directory, f'{table}.jsonl'), 'w')
+            self._handles[table].write(json.dumps(row, default=str) + '\n')
+            self.counts[table] = self.counts.get(table, 0) + 1
+
+    def close(self):
+        with self._lock:
+            for handle in self._handles.values():
+                handle.close()
+
+
+class DataFrameTableSink:
+    """Collects rows per table, call to_frames() for a {table: DataFrame} dict once the extract is done."""
+
+    def __init__(self):
+        self.rows = {}
+        self._lock = threading.Lock()
+
+    def write(self, table, row):
+        with self._lock:
+            self.rows.setdefault(table, []).append(row)
+
+    def close(self):
+        pass
+
+    def to_frames(self):
+        import pandas as pd
+        return {table: pd.DataFrame(rows) for table, rows in self.rows.items()}
+
+
+def extract(client, sink, start=None, end=None, window_days=7, max_workers=4, **render_args):
+    """
+    Runs the ticket creation query, split into parallel date windows, streaming normalized rows to the sink.
+
+    The catch-all trigger branch only runs in the latest window, the others only match their own
+    dated triggers. Each window renders the provisioning lines subquery with its own dates, so a brand
+    account matched by several windows can come back with different lines: rows are merged across
+    windows and written once per (table, Id), giving the same output whichever window finishes first.
+
+    Returns:
+        Number of brand accounts written.
+    """
+    if start is not None and end is not None:
+        windows = split_windows(start, end, window_days)
+    else:
+        windows = [(start, end)]
+
+    seen = set()
+    seen_lock = threading.Lock()
+
+    def run_window(window):
+        written = 0
+        soql = render_query(window[0], window[1], catch_all=window is windows[-1], **render_args)
+        for record in client.iter_records(soql):
+            for table, row in normalize_record(client, record):
+                key = (table, row.get('Id'))
+                if key[1] is not None:
+                    with seen_lock:
+                        if key in seen:
+                            continue
+                        seen.add(key)
+                sink.write(table, row)
+                if table == ROOT_TABLE:
+                    written += 1
+        print(f'Window {window[0]} - {window[1]}: {written} new brand accounts')
+        return written
+
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return sum(executor.map(run_window, windows))
+    finally:
+        sink.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Extract ticket creation data from Salesforce into one file per table.')
+    parser.add_argument('--start', type=date.fromisoformat, help='window start, YYYY-MM-DD (inclusive)')
+    parser.add_argument('--end', type=date.fromisoformat, help='window end, YYYY-MM-DD (exclusive)')
+    parser.add_argument('--window-days', type=int, default=7)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--brand', action='append', dest='brand_names', help='brand name filter, repeatable')
+    parser.add_argument('--admins-created-after', type=date.fromisoformat, dest='brand_admins_created_after')
+    parser.add_argument('--out', default='soql_extract', help='output directory for the .jsonl tables')
+    parser.add_argument('--print-query', action='store_true', help='only print the rendered SOQL')
+    args = parser.parse_args(argv)
+
+    if args.print_query:
+        print(render_query(args.start, args.end, args.brand_names, brand_admins_created_after=args.brand_admins_created_after))
+        return
+
+    sink = JsonlTableSink(args.out)
+    started = datetime.now()
+    total = extract(SalesforceClient(), sink, args.start, args.end, args.window_days, args.workers,
+                    brand_names=args.brand_names, brand_admins_created_after=args.brand_admins_created_after)
+    print(f'Extracted {total} brand accounts in {datetime.now() - started}: {sink.counts}')
+
+
+if __name__ == '__main__':
+    sys.exit(main())